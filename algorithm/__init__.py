@@ -1,6 +1,12 @@
 # export bfs_graphlet_counter.py
+# export brute_force_graphlet_counter.py
 # export dp_graphlet_counter.py
+# export ego_graphlet_counter.py
+# export motif_matcher.py
 
 # Path: algorithm/__init__.py
 from algorithm.bfs_graphlet_counter import BFSGraphletCounter
-from algorithm.dp_graphlet_counter import DPGraphletCounter
\ No newline at end of file
+from algorithm.brute_force_graphlet_counter import BruteForceGraphletCounter
+from algorithm.dp_graphlet_counter import DPGraphletCounter
+from algorithm.ego_graphlet_counter import EgoGraphletCounter
+from algorithm.motif_matcher import MotifMatcher
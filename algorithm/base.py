@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
 
+from util.census_extras import CensusExtras
+from util.participation import ParticipationMatrix
+from util.reservoir import Reservoir
+from util.sampled_moments import SampledCountMoments
+
 
 class BaseAlgorithm(ABC):
     def __init__(self, graph, edge_color_map):
@@ -10,6 +15,14 @@ class BaseAlgorithm(ABC):
         """
         self._graph = graph
         self._edge_color_map = edge_color_map
+        # number of random example node groups kept per graphlet class, 0 to keep none
+        self._reservoir_size = 0
+        # collect the moments of the classified groups needed for the analytic expectation of sampled counts
+        self._collect_sampled_moments = False
+        # collect the node x graphlet class participation counts of the classified groups
+        self._collect_participation = False
+        # the examples, errors, bounds, moments and participation of the last census
+        self.extras = CensusExtras()
 
     @abstractmethod
     def count_graphlets(self, graphlet_size=3):
@@ -18,6 +31,14 @@ class BaseAlgorithm(ABC):
         :return:  the map of graphlet hash to graphlet
         """
 
+    def count_graphlets_of_sizes(self, graphlet_sizes):
+        """
+        Count the graphlets of several sizes
+        :param graphlet_sizes: list of graphlet sizes
+        :return: the map of key: graphlet size, value: the map of graphlet hash to graphlet
+        """
+        return {graphlet_size: self.count_graphlets(graphlet_size) for graphlet_size in sorted(set(graphlet_sizes))}
+
     def generate_graphlet_visualization(self, algo, graphlets):
         """
         Generate the visualization of the graphlets
@@ -27,6 +48,43 @@ class BaseAlgorithm(ABC):
         for index, graphlet in enumerate(graphlets):
             graphlet.visualize("graphlet_{}_{}".format(algo, index + 1), self.edge_color_map)
 
+    def _get_reservoir(self, graphlet_size, hash_key):
+        """
+        Get the example reservoir of a graphlet class, created on first use
+        :param graphlet_size: the size of the graphlet
+        :param hash_key: the graphlet hash
+        :return: the reservoir
+        """
+        reservoirs = self.extras.graphlet_examples.setdefault(graphlet_size, {})
+        if hash_key not in reservoirs:
+            reservoirs[hash_key] = Reservoir(self._reservoir_size)
+        return reservoirs[hash_key]
+
+    def _get_sampled_moments(self, graphlet_size, node_names, memory_budget_mb=None):
+        """
+        Get the sampled count moments of a graphlet size, created on first use
+        :param graphlet_size: the size of the graphlet
+        :param node_names: the node names of the rows, used when the moments are created
+        :param memory_budget_mb: if set, the memory budget of the subset counts, used when the moments are created
+        :return: the moments
+        """
+        sampled_moments = self.extras.sampled_moments
+        if graphlet_size not in sampled_moments:
+            sampled_moments[graphlet_size] = SampledCountMoments(graphlet_size, node_names, memory_budget_mb)
+        return sampled_moments[graphlet_size]
+
+    def _get_participation(self, graphlet_size, node_names):
+        """
+        Get the participation matrix of a graphlet size, created on first use
+        :param graphlet_size: the size of the graphlet
+        :param node_names: the node names of the rows, used when the matrix is created
+        :return: the participation matrix
+        """
+        participation = self.extras.participation
+        if graphlet_size not in participation:
+            participation[graphlet_size] = ParticipationMatrix(node_names)
+        return participation[graphlet_size]
+
     @property
     def graph(self):
         return self._graph
@@ -35,7 +93,13 @@ class BaseAlgorithm(ABC):
     def edge_color_map(self):
         return self._edge_color_map
 
-    def get_algorithm_by_name(self, name):
+    @staticmethod
+    def get_algorithm_by_name(name):
+        """
+        Get the algorithm class from the algorithm name
+        :param name: the name of the algorithm
+        :return: the algorithm class or None if no algorithm has that name
+        """
         # get child classes
-        subclasses = BaseAlgorithm.__subclasses__()
-        print(subclasses)
+        classes = {cls.__name__: cls for cls in BaseAlgorithm.__subclasses__()}
+        return classes.get(name)
@@ -102,6 +102,8 @@ class BFSGraphletCounter(BaseAlgorithm):
         :param graphlet_size: the size of the graphlet
         :return: the map of graphlet hash to graphlet
         """
+        self._graphlet_count_map = {}
+        self._processed_nodes = set()
         node_list = list(self.graph.get_nodes())
         for node_name in node_list:
             node = self.graph.get_node(node_name)
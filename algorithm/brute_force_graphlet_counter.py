@@ -1,103 +1,184 @@
+import itertools
+from multiprocessing import Pool
+
 from algorithm.base import BaseAlgorithm
-from graph import Graphlet
+from graph import Graphlet, SharedGraph
 from util.heap import MyHeap
+from util.logger_util import LoggerUtil
+from util.reservoir import Reservoir
+
+logger = LoggerUtil.get_logger("brute_force_graphlet_counter")
+
+# the counter of a pool worker process, set up once per process by _init_worker
+_worker_counter = None
+
+
+def _init_worker(descriptor, reservoir_size):
+    """
+    Attach a pool worker process to the shared graph
+    :param descriptor: the descriptor of the shared graph
+    :param reservoir_size: the number of example node groups kept per graphlet class
+    :return: None
+    """
+    global _worker_counter
+    _worker_counter = BruteForceGraphletCounter(SharedGraph.open(descriptor), {}, reservoir_size=reservoir_size)
+
+
+def _count_chunk(args):
+    """
+    Count the graphlets of one chunk in a pool worker process
+    :param args: (index of the first node, size of the graphlet)
+    :return: the map of key: graphlet hash, value: [node names of an example, count, reservoir of examples]
+    """
+    return _worker_counter._count_chunk(*args)
 
 
 class BruteForceGraphletCounter(BaseAlgorithm):
+    """
+    Checks every combination of nodes, meant as a reference to validate the faster counters
+    Combinations are generated lazily and split into chunks by their first node, so memory stays
+    proportional to the number of graphlet classes and chunks can run on a pool of processes
+    """
 
-    def __init__(self, graph, edge_color_map):
+    def __init__(self, graph, edge_color_map, num_workers=1, reservoir_size=0):
         """
         Initialize the graphlet counter
         :param graph: the graph
         :param edge_color_map: the map of key: edge name, value: edge color
+        :param num_workers: the number of processes checking combinations
+        :param reservoir_size: the number of random example node groups kept per graphlet class, 0 to keep none
         """
         super().__init__(graph, edge_color_map)
         self._graphlet_count_map = {}
-        self._processed_nodes = set()
+        self._num_workers = num_workers
+        self._reservoir_size = reservoir_size
+        self._node_names = sorted(self._graph.get_nodes())
+        node_index_map = {node_name: i for i, node_name in enumerate(self._node_names)}
+        # bit i of the mask of a node is set if the node is an undirected neighbor of node i
+        self._adjacency_masks = []
+        for node_name in self._node_names:
+            mask = 0
+            for neighbor_name in self._graph.get_node(node_name).undirected_edges:
+                if neighbor_name != node_name:
+                    mask |= 1 << node_index_map[neighbor_name]
+            self._adjacency_masks.append(mask)
 
     def count_graphlets(self, graphlet_target_size=3):
         """
         Count the graphlets in the graph
-        :return:  the map of graphlet hash to graphlet
+        :return:  the map of graphlet hash to (graphlet, count)
         """
-        count = 0
-        node_names = list(self._graph.get_nodes())
-        node_combinations = self._get_node_combinations(node_names, graphlet_target_size)
-        for node_combination in node_combinations:
-            is_valid = self._check_valid_combination(node_combination, graphlet_target_size)
-            if is_valid:
-                count += 1
-                self._create_and_save_graphlet(node_combination)
-        print("Total number of graphlets: ", count)
+        self._graphlet_count_map = {}
+        self.extras.graphlet_examples[graphlet_target_size] = {}
+        chunks = ((first_index, graphlet_target_size) for first_index in range(len(self._node_names)))
+        count_map = {}
+        if self._num_workers > 1:
+            # workers attach to one flat copy of the graph instead of unpickling the node objects
+            shared_graph = self._graph if isinstance(self._graph, SharedGraph) else SharedGraph.export(self._graph)
+            try:
+                with Pool(self._num_workers, initializer=_init_worker,
+                          initargs=(shared_graph.descriptor, self._reservoir_size)) as pool:
+                    for chunk_count_map in pool.imap_unordered(_count_chunk, chunks):
+                        self._merge_count_map(count_map, chunk_count_map)
+            finally:
+                if shared_graph is not self._graph:
+                    shared_graph.close()
+                    shared_graph.unlink()
+        else:
+            for chunk in chunks:
+                self._merge_count_map(count_map, self._count_chunk(*chunk))
+        for hash_key, (node_group, count, reservoir) in count_map.items():
+            g = Graphlet([self.graph.get_node(node_name) for node_name in node_group], self.graph)
+            self._graphlet_count_map[hash_key] = (g, count)
+            if reservoir is not None:
+                self.extras.graphlet_examples[graphlet_target_size][hash_key] = reservoir
+        logger.info("Total number of graphlets: %d", sum(value[1] for value in count_map.values()))
         return self._graphlet_count_map
 
-    def _get_node_combinations(self, node_names, size):
+    @staticmethod
+    def _merge_count_map(count_map, chunk_count_map):
+        """
+        Add the counts of a chunk to the total counts
+        :param count_map: the map of key: graphlet hash, value: [node names of an example, count, reservoir]
+        :param chunk_count_map: the counts of the chunk
+        :return: None
+        """
+        for hash_key, (node_group, count, reservoir) in chunk_count_map.items():
+            if hash_key in count_map:
+                count_map[hash_key][1] += count
+                if reservoir is not None:
+                    count_map[hash_key][2].merge(reservoir)
+            else:
+                count_map[hash_key] = [node_group, count, reservoir]
+
+    def _count_chunk(self, first_index, size):
         """
-        Get all possible combinations of nodes
-        :param node_names: list of node names
+        Count the graphlets of all combinations whose first node is the node at first_index
+        :param first_index: the index of the first node
         :param size: size of the combination
-        :return: list of combinations
+        :return: the map of key: graphlet hash, value: [node names of an example, count, reservoir or None]
         """
-        if size == 1:
-            return [[node_name] for node_name in node_names]
-        else:
-            combinations = []
-            for i in range(len(node_names)):
-                for combination in self._get_node_combinations(node_names[i + 1:], size - 1):
-                    combination.append(node_names[i])
-                    combinations.append(combination)
-            return combinations
-
-    def _check_valid_combination(self, node_combination, size):
+        chunk_count_map = {}
+        for node_combination in self._get_node_combinations(first_index, size):
+            if self._check_valid_combination(node_combination):
+                node_group = [self._node_names[i] for i in node_combination]
+                g = Graphlet([self.graph.get_node(node_name) for node_name in node_group], self.graph)
+                hash_key = hash(g)
+                if hash_key in chunk_count_map:
+                    chunk_count_map[hash_key][1] += 1
+                else:
+                    reservoir = Reservoir(self._reservoir_size) if self._reservoir_size else None
+                    chunk_count_map[hash_key] = [node_group, 1, reservoir]
+                if self._reservoir_size:
+                    chunk_count_map[hash_key][2].add(tuple(node_group))
+        return chunk_count_map
+
+    def _get_node_combinations(self, first_index, size):
         """
-        Check if the combination is valid
-        :param node_combination: list of node names
+        Lazily generate all combinations of node indexes starting with first_index
+        :param first_index: the index of the first node
         :param size: size of the combination
-        :return: True if valid, False otherwise
+        :return: generator of sorted index tuples
         """
-        nodes_set = set(node_combination)
-        node_index_map = {node_name: i for i, node_name in enumerate(node_combination)}
-        edge_count = 0
-        for i, node_name in enumerate(node_combination):
-            node = self.graph.get_node(node_name)
-            for neighbor in node.get_undirected_neighbors():
-                if neighbor.name in nodes_set and node_index_map[neighbor.name] > i:
-                    edge_count += 1
-                    if edge_count >= size - 1:
-                        return True
-        return False
-
-    def _create_and_save_graphlet(self, node_group):
+        for rest in itertools.combinations(range(first_index + 1, len(self._node_names)), size - 1):
+            yield (first_index,) + rest
+
+    def _check_valid_combination(self, node_combination):
         """
-        Create and save the graphlet
-        :param node_group: list of node names
-        :return: None
+        Check if the combination of nodes is connected
+        :param node_combination: tuple of node indexes
+        :return: True if valid, False otherwise
         """
-        node_set = []
-        for node_name in node_group:
-            node = self.graph.get_node(node_name)
-            node_set.append(node)
-        g = Graphlet(node_set, self.graph)
-        hash_key = hash(g)
-        self._graphlet_count_map.setdefault(hash_key, [])
-        self._graphlet_count_map[hash_key].append(g)
-
-    def display_frequent_graphlet_stats(self, count=5):
+        group_mask = 0
+        for i in node_combination:
+            group_mask |= 1 << i
+        reached = 1 << node_combination[0]
+        stack = [node_combination[0]]
+        while stack:
+            new_nodes = self._adjacency_masks[stack.pop()] & group_mask & ~reached
+            reached |= new_nodes
+            while new_nodes:
+                lowest = new_nodes & -new_nodes
+                stack.append(lowest.bit_length() - 1)
+                new_nodes ^= lowest
+        return reached == group_mask
+
+    def display_frequent_graphlet_stats(self, count=5, name='brute_force_algo'):
         """
-        Display the most frequent graphlets
+        Log the most frequent graphlets
         :param count: number of graphlets to display
+        :param name: the name of the algorithm
         :return: None
         """
-        heap = MyHeap(key=lambda x: len(x[1]))
-        for graphlet_hash, graphlets in self._graphlet_count_map.items():
-            heap.push((graphlet_hash, graphlets))
+        heap = MyHeap(key=lambda x: x[2])
+        for graphlet_hash, value in self._graphlet_count_map.items():
+            heap.push((graphlet_hash, value[0], value[1]))
             if len(heap) > count:
                 heap.pop()
         top_graphlets = []
         while len(heap) > 0:
-            graphlet_hash, graphlets = heap.pop()
-            top_graphlets.append((graphlets[0], len(graphlets)))
+            graphlet_hash, graphlet, count = heap.pop()
+            top_graphlets.append((graphlet, count))
         top_graphlets.reverse()
         for graphlet, count in top_graphlets:
-            print("Graphlet: {} Count: {} with algo {}".format(graphlet, count, 'brute_force_algo'))
-        self.generate_graphlet_visualization('brute_force_algo', [graphlet for graphlet, freq in top_graphlets])
+            logger.info("Graphlet: %s, Count: %s, with algo: %s", graphlet, count, 'brute_force_algo')
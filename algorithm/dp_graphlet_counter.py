@@ -1,61 +1,419 @@
+import itertools
+import random
+import time
+
+import numpy as np
 from tqdm import tqdm
 
 from algorithm.base import BaseAlgorithm
-from graph import Graphlet
+from algorithm.hub_star_counter import HubStarCounter
+from graph import BatchClassifier, Graphlet, get_node_order
 from util.heap import MyHeap
+from util.anytime import RootSampleEstimator
+from util.census_extras import CensusExtras
 from util.logger_util import LoggerUtil
+from util.shard import get_shard
+from util.space_saving import SpaceSaving
+from util.spill import SpillableGroupSet
 
 logger = LoggerUtil.get_logger("dp_graphlet_counter")
 
+# share of the deadline spent timing the roots before the extrapolated round
+PILOT_SHARE = 0.1
+
 
 class DPGraphletCounter(BaseAlgorithm):
-    def __init__(self, graph, mode_color_map):
+    def __init__(self, graph, mode_color_map, mode_constraint=None, batch_size=None, node_order=None,
+                 memory_budget_mb=None, spill_dir=None, reservoir_size=0, hub_degree_threshold=None,
+                 deadline=None, root_order_seed=None, collect_sampled_moments=False, collect_participation=False,
+                 heavy_hitters=None, shard=None):
         """
         Initialize the graphlet counter
         :param graph: the graph
         :param mode_color_map: the map of key: node name, value: node color
+        :param mode_constraint: the mode constraint graphlets must meet, None to count all graphlets
+        :param batch_size: if set, node groups are classified with numpy in batches of this size
+        :param node_order: the node ordering used to relabel the nodes before enumeration, "name", "degree",
+        "degeneracy" or "rcm", None for "name"
+        :param memory_budget_mb: if set, the node groups of a level held in memory are limited to about this many
+        megabytes, the rest is spilled to sorted runs on disk; collected sampled moments cannot be spilled, a census
+        whose moments pass the budget stops with a MemoryError
+        :param spill_dir: the directory for spilled node groups, None for the system temp directory
+        :param reservoir_size: the number of random example node groups kept per graphlet class, 0 to keep none
+        :param hub_degree_threshold: if set, the groups with non hub nodes hanging off nodes with at least this
+        undirected degree (the hubs) are counted analytically per core instead of enumerated (see HubStarCounter);
+        not used when examples are kept, every group is then enumerated
+        :param deadline: if set, the seconds a count may take; the roots are then processed one at a time in random
+        order and unfinished counts are extrapolated, counting again with the same sizes continues the same run
+        :param root_order_seed: the random seed of the root order of deadline runs, None for a random seed
+        :param collect_sampled_moments: collect the moments of the groups of every class giving the expectation and
+        variance of the counts of uniform node samples, the groups around hubs are then enumerated; not collected by
+        deadline runs
+        :param collect_participation: collect the number of groups of every class every node is in as a sparse
+        matrix, the groups around hubs are then enumerated; not collected by deadline runs
+        :param heavy_hitters: if set, only about this many of the most frequent classes of every size are counted, in
+        fixed memory with SpaceSaving, and extras.count_bounds holds the error bounds; not used by deadline runs
+        :param shard: if set, (shard index, number of shards), only the node groups whose lowest ranked node is in
+        the shard (see util.shard.get_shard) are counted, the groups around hubs are then enumerated; not used by
+        deadline runs
         """
         super().__init__(graph, mode_color_map)
         self._graphlet_count_map = {}
+        self._mode_constraint = mode_constraint
+        self._batch_size = batch_size
+        self._batch_classifier = BatchClassifier(graph) if batch_size else None
+        # map of key: batch class id, value: graphlet of the first group of the class
+        self._class_graphlets = {}
+        self._node_order = node_order
+        # node names by rank and the sorted neighbor ranks of every rank, set up when counting starts
+        self._ordered_names = []
+        self._ordered_adjacency = []
+        self._memory_budget_mb = memory_budget_mb
+        self._spill_dir = spill_dir
+        self._reservoir_size = reservoir_size
+        self._hub_degree_threshold = hub_degree_threshold
+        self._hub_star_counter = None
+        self._deadline = deadline
+        self._random = random.Random(root_order_seed)
+        # state of the deadline run: [graphlet sizes, shuffled roots, estimator, map of key: hash, value: graphlet,
+        # seconds spent on roots]
+        self._anytime_state = None
+        self._collect_sampled_moments = collect_sampled_moments and deadline is None
+        self._collect_participation = collect_participation and deadline is None
+        self._heavy_hitters = heavy_hitters if deadline is None else None
+        if heavy_hitters and deadline is not None:
+            logger.warning("Heavy hitters are not used by deadline runs, every class is counted")
+        # sketch of the level being classified when only the most frequent classes are counted, and the map of key:
+        # graphlet hash, value: set of batch class ids of the hash, to forget the classes the sketch evicts
+        self._sketch = None
+        self._sketch_class_ids = {}
+        self._shard = shard
 
     def count_graphlets(self, graphlet_size=3):
         """
         Count the graphlets of a given size
         :param graphlet_size: the size of the graphlet
-        :return: the map of key: graphlet hash, value: list of graphlets
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        return self.count_graphlets_of_sizes([graphlet_size])[graphlet_size]
+
+    def count_graphlets_of_sizes(self, graphlet_sizes):
+        """
+        Count the graphlets of several sizes in one pass, every level built on the way to the largest size
+        is classified if its size is requested
+        :param graphlet_sizes: list of graphlet sizes
+        :return: the map of key: graphlet size, value: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        graphlet_sizes = sorted(set(graphlet_sizes))
+        if self._deadline is not None:
+            return self._count_until_deadline(graphlet_sizes)
+        max_size = graphlet_sizes[-1]
+        graphlet_count_maps = {}
+        self.extras = CensusExtras()
+        self._relabel_nodes()
+        # mode constraints need every group checked and the reservoirs, sampled moments and participation every group
+        # seen, and the groups around a hub may belong to other shards
+        use_hub_stars = self._hub_degree_threshold is not None and self._mode_constraint is None \
+            and not self._reservoir_size and not self._collect_sampled_moments and not self._collect_participation \
+            and self._shard is None
+        self._hub_star_counter = None
+        adjacency = self._ordered_adjacency
+        if use_hub_stars:
+            self._hub_star_counter = HubStarCounter(self.graph, self._ordered_names, self._ordered_adjacency,
+                                                    self._hub_degree_threshold, max_size, self._batch_classifier)
+            logger.info("Counting the groups around %d hubs analytically", len(self._hub_star_counter.hubs))
+            closed_groups = self._hub_star_counter.get_closed_groups()
+            # the groups without hubs are enumerated in the graph without the hubs
+            adjacency = self._hub_star_counter.non_hub_adjacency
+        # level 1: node groups of size 1, groups are sorted tuples of node ranks; a group keeps its first node as
+        # it grows, so starting from the roots of a shard counts exactly the groups of the shard
+        nodes_group = set((rank,) for rank in range(len(self._ordered_names)) if self._is_feasible((rank,), max_size)
+                          and (self._shard is None or get_shard(self._ordered_names[rank], self._shard[1]) ==
+                               self._shard[0]) and (not use_hub_stars or rank not in self._hub_star_counter.hubs))
+        for size in range(1, max_size + 1):
+            if size > 1:
+                logger.info("Creating node groups of size %d", size)
+                next_nodes_group = self.get_node_groups_of_size_n(nodes_group, max_size, adjacency)
+                if isinstance(nodes_group, SpillableGroupSet):
+                    nodes_group.close()
+                nodes_group = next_nodes_group
+            if size in graphlet_sizes:
+                logger.info("Creating graphlets of size %d", size)
+                if use_hub_stars:
+                    # the cores holding a hub are groups without free leaves, the groups with free leaves are counted
+                    # per core
+                    self._classify_level(itertools.chain(nodes_group, closed_groups[size]))
+                    self._add_hub_groups(closed_groups, size)
+                else:
+                    self._classify_level(nodes_group)
+                if self._sketch is not None:
+                    self._finish_sketch(size)
+                graphlet_count_maps[size] = self._graphlet_count_map
+        if isinstance(nodes_group, SpillableGroupSet):
+            nodes_group.close()
+        return graphlet_count_maps
+
+    def _classify_level(self, nodes_group, show_progress=True):
+        """
+        Classify the node groups of a level meeting the mode constraint into a new graphlet count map
+        :param nodes_group: the node groups, tuples of node ranks
+        :param show_progress: show a progress bar
+        """
+        self._graphlet_count_map = {}
+        self._sketch = SpaceSaving(self._heavy_hitters) if self._heavy_hitters else None
+        self._sketch_class_ids = {}
+        # smaller levels keep the unsatisfied groups, they can still grow into satisfied ones
+        satisfied_nodes_group = nodes_group
+        if self._mode_constraint is not None:
+            satisfied_nodes_group = (node_group for node_group in nodes_group
+                                     if self._mode_constraint.is_satisfied(self.graph, self._get_names(node_group)))
+        if self._batch_classifier is not None:
+            self._classify_in_batches(satisfied_nodes_group, show_progress)
+        else:
+            for node_group in tqdm(satisfied_nodes_group, disable=not show_progress):
+                self._create_and_save_graphlet(self._get_names(node_group))
+
+    def _count_until_deadline(self, graphlet_sizes):
+        """
+        Count the graphlets root by root in random order until the deadline passes
+        The groups of a root are the connected groups whose lowest ranked node is the root, so every group
+        belongs to exactly one root. After a short pilot that times the roots, one round sized to the time left
+        is processed and extrapolated; it has at least one root and is always finished, so it may end a little before
+        or after the deadline.
+        The run continues where it stopped when it is counted again with the same sizes, and refines to the
+        exact counts once every root is processed.
+        :param graphlet_sizes: sorted list of graphlet sizes
+        :return: the map of key: graphlet size, value: the map of key: graphlet hash, value: (graphlet, count)
         """
-        # get the list of nodes sorted by name
-        nodes_list = sorted(list(self.graph.get_nodes()))
-        # level 1: list of node groups of size 1
-        nodes_group = set((node,) for node in nodes_list)
-        # map of key: number of nodes, value: list of node groups
+        if self._anytime_state is None or self._anytime_state[0] != graphlet_sizes:
+            self._relabel_nodes()
+            self.extras = CensusExtras()
+            roots = list(range(len(self._ordered_names)))
+            self._random.shuffle(roots)
+            self._anytime_state = [graphlet_sizes, roots, RootSampleEstimator(len(roots)), {}, 0.0]
+        _, roots, estimator, graphlets, seconds_spent = self._anytime_state
+        end_time = time.monotonic() + self._deadline
+        with tqdm(total=len(roots), initial=estimator.num_done) as progress:
+            if estimator.num_done == 0:
+                # pilot round to time the roots, its roots end up counted exactly
+                estimator.start_round()
+                start_time = time.monotonic()
+                while not estimator.is_complete and (estimator.num_done == 0 or time.monotonic() < start_time +
+                                                     PILOT_SHARE * self._deadline):
+                    estimator.add_root(self.count_root_graphlets(roots[estimator.num_done], graphlet_sizes,
+                                                                 graphlets))
+                    progress.update(1)
+                seconds_spent += time.monotonic() - start_time
+            # one round sized to the time left before it starts, of at least one root and always finished, so it
+            # is a random sample of fixed size of the roots left whatever the earlier roots cost
+            round_size = max(int((end_time - time.monotonic()) * estimator.num_done / seconds_spent), 1) \
+                if seconds_spent > 0 else len(roots)
+            if not estimator.is_complete:
+                estimator.start_round()
+                start_time = time.monotonic()
+                for root in roots[estimator.num_done:estimator.num_done + round_size]:
+                    estimator.add_root(self.count_root_graphlets(root, graphlet_sizes, graphlets))
+                    progress.update(1)
+                seconds_spent += time.monotonic() - start_time
+        self._anytime_state[4] = seconds_spent
+        self.extras.completed_fraction = estimator.completed_fraction
+        logger.info("Processed %d of %d roots before the deadline", estimator.num_done, len(roots))
+        graphlet_count_maps = {}
+        self.extras.count_errors = {}
+        for graphlet_size in graphlet_sizes:
+            counts, errors = estimator.estimate(graphlet_size)
+            graphlet_count_maps[graphlet_size] = {hash_key: (graphlets[hash_key], count)
+                                                  for hash_key, count in counts.items()}
+            self.extras.count_errors[graphlet_size] = errors
+        self._graphlet_count_map = graphlet_count_maps[graphlet_sizes[-1]]
+        return graphlet_count_maps
+
+    def count_root_graphlets(self, root, graphlet_sizes, graphlets=None, levels=None):
+        """
+        Count the graphlets of the node groups whose lowest ranked node is a root
+        :param root: the rank of the root
+        :param graphlet_sizes: sorted list of graphlet sizes
+        :param graphlets: if set, map of key: graphlet hash, value: graphlet the first graphlet of new classes is
+        added to
+        :param levels: the node groups of the root from get_rooted_node_groups if already built, None to build them
+        :return: the map of key: graphlet size, value: the map of key: graphlet hash, value: count
+        """
+        if levels is None:
+            levels = self.get_rooted_node_groups(root, graphlet_sizes[-1])
+        root_count_maps = {}
+        for graphlet_size in graphlet_sizes:
+            self._classify_level(levels[graphlet_size], show_progress=False)
+            root_count_maps[graphlet_size] = {}
+            for hash_key, (g, count) in self._graphlet_count_map.items():
+                root_count_maps[graphlet_size][hash_key] = count
+                if graphlets is not None:
+                    graphlets.setdefault(hash_key, g)
+        return root_count_maps
+
+    def get_rooted_node_groups(self, root, graphlet_size):
+        """
+        Get the connected node groups whose lowest ranked node is a root, by extending the root with
+        neighbors ranked after it, the nodes are ranked on first use
+        :param root: the rank of the root
+        :param graphlet_size: the size of the largest groups
+        :return: the map of key: group size, value: set of sorted tuples of node ranks
+        """
+        if not self._ordered_names:
+            self._relabel_nodes()
+        nodes_group = {(root,)} if self._is_feasible((root,), graphlet_size) else set()
+        levels = {1: nodes_group}
         for size in range(2, graphlet_size + 1):
-            logger.info("Creating node groups of size %d", size)
-            nodes_group = self.get_node_groups_of_size_n(nodes_group)
-        logger.info("Creating graphlets of size %d", graphlet_size)
-        for node_group in tqdm(nodes_group):
-            self._create_and_save_graphlet(node_group)
-        return self._graphlet_count_map
+            next_nodes_group = set()
+            for node_group in nodes_group:
+                for rank in node_group:
+                    for neighbor in self._ordered_adjacency[rank]:
+                        if neighbor > root and neighbor not in node_group:
+                            next_node_group = tuple(sorted(node_group + (neighbor,)))
+                            if next_node_group not in next_nodes_group and \
+                                    self._is_feasible(next_node_group, graphlet_size):
+                                next_nodes_group.add(next_node_group)
+            levels[size] = nodes_group = next_nodes_group
+        return levels
+
+    def _relabel_nodes(self):
+        """
+        Rank the nodes by the node ordering and build the adjacency of the ranks
+        """
+        self._ordered_names = get_node_order(self.graph, self._node_order)
+        rank_map = {node_name: rank for rank, node_name in enumerate(self._ordered_names)}
+        self._ordered_adjacency = [sorted(rank_map[neighbor_name]
+                                          for neighbor_name in self.graph.get_node(node_name).undirected_edges
+                                          if neighbor_name != node_name)
+                                   for node_name in self._ordered_names]
+
+    def _get_names(self, node_group):
+        """
+        Map a node group of ranks back to node names
+        :param node_group: tuple of node ranks
+        :return: tuple of node names
+        """
+        return tuple(self._ordered_names[rank] for rank in node_group)
 
-    def get_node_groups_of_size_n(self, nodes_group):
+    def get_node_groups_of_size_n(self, nodes_group, graphlet_size=None, adjacency=None):
         """
         Get the node groups of size n
-        :param nodes_group: the node groups of size n - 1
+        A group is only extended with neighbors ranked after its first (lowest ranked) node: every connected
+        group keeps its lowest ranked node when a leaf of a spanning tree is removed, so each group is still
+        built from at least one smaller group, while hubs ranked late are rarely extended from
+        :param nodes_group: the node groups of size n - 1, sorted tuples of node ranks
+        :param graphlet_size: the size of the graphlet the groups are extended to, used to prune groups that
+        can no longer meet the mode constraint
+        :param adjacency: the sorted neighbor ranks of every rank the groups are extended with, None for the whole
+        graph
         :return: the node groups of size n
         """
+        adjacency = self._ordered_adjacency if adjacency is None else adjacency
         next_nodes_group = set()
+        if self._memory_budget_mb:
+            next_nodes_group = SpillableGroupSet(len(next(iter(nodes_group), ())) + 1, self._memory_budget_mb,
+                                                 self._spill_dir)
         for node_group in tqdm(nodes_group):
-            node_set = set(node_group)
-            for node_name in node_group:
-                node = self.graph.get_node(node_name)
-                neighbors = node.get_undirected_neighbors()
-                for neighbor in neighbors:
-                    if neighbor.name not in node_set:
-                        next_node_group = tuple(sorted(node_group + (neighbor.name,)))
-                        if next_node_group not in next_nodes_group:
+            root = node_group[0]
+            for rank in node_group:
+                for neighbor in adjacency[rank]:
+                    if neighbor > root and neighbor not in node_group:
+                        next_node_group = tuple(sorted(node_group + (neighbor,)))
+                        if next_node_group not in next_nodes_group and \
+                                self._is_feasible(next_node_group, graphlet_size or len(next_node_group)):
                             next_nodes_group.add(next_node_group)
+        if isinstance(next_nodes_group, SpillableGroupSet) and next_nodes_group.is_spilled:
+            logger.info("Merging spilled node groups")
+            next_nodes_group.compact()
         return next_nodes_group
 
+    def _add_hub_groups(self, closed_groups, graphlet_size):
+        """
+        Add the analytic counts of the groups with free leaves on hubs to the graphlet counts
+        :param closed_groups: the cores holding a hub, from HubStarCounter.get_closed_groups
+        :param graphlet_size: the size of the graphlet
+        """
+        num_groups = 0
+        for hash_key, (g, count) in self._hub_star_counter.count_free_leaf_groups(closed_groups,
+                                                                                  graphlet_size).items():
+            self._add_count(hash_key, g, count)
+            num_groups += count
+        logger.info("Counted %d groups of size %d with free hub leaves analytically", num_groups, graphlet_size)
+
+    def _is_feasible(self, node_group, graphlet_size):
+        """
+        Check if a node group can still grow into a graphlet meeting the mode constraint
+        Every connected group has a connected subgroup with one node less, and the induced edges of the
+        subgroup are a subset of the induced edges of the group, so pruning infeasible groups loses nothing
+        :param node_group: the node group, a tuple of node ranks
+        :param graphlet_size: the size of the graphlet
+        :return: True if the group must be kept
+        """
+        return self._mode_constraint is None or self._is_feasible_names(self._get_names(node_group), graphlet_size)
+
+    def _is_feasible_names(self, node_group, graphlet_size):
+        """
+        Check if a node group of node names can still grow into a graphlet meeting the mode constraint
+        :param node_group: the node group, a tuple of node names
+        :param graphlet_size: the size of the graphlet
+        :return: True if the group must be kept
+        """
+        return self._mode_constraint is None or self._mode_constraint.is_feasible(self.graph, node_group,
+                                                                                  graphlet_size)
+
+    def _classify_in_batches(self, nodes_group, show_progress=True):
+        """
+        Classify node groups in batches and save the graphlet counts
+        A graphlet is only created for the first group of every class, to get its hash. When only the most frequent
+        classes are counted, a class evicted from the sketch is forgotten by the classifier and the graphlet cache,
+        so both stay at the size of the sketch.
+        :param nodes_group: iterable of node groups, tuples of node ranks, streamed a batch at a time
+        :param show_progress: show a progress bar
+        """
+        nodes_group = iter(nodes_group)
+        # node index of every rank in the classifier
+        classifier_indexes = self._batch_classifier.get_node_indexes([self._ordered_names])[0]
+        progress = tqdm(disable=not show_progress)
+        while True:
+            batch = np.array(list(itertools.islice(nodes_group, self._batch_size)), dtype=np.int64)
+            if len(batch) == 0:
+                break
+            progress.update(len(batch))
+            class_ids = self._batch_classifier.classify(classifier_indexes[batch])
+            unique_class_ids, counts = np.unique(class_ids, return_counts=True)
+            if self._reservoir_size or self._collect_sampled_moments or self._collect_participation:
+                # node groups of the batch split by class, in the order of unique_class_ids
+                class_members = np.split(batch[np.argsort(class_ids, kind="stable")], np.cumsum(counts)[:-1])
+            # the graphlets of the batch are looked up before counting, evictions may forget classes of the batch
+            graphlets = [self._get_class_graphlet(class_id) for class_id in unique_class_ids.tolist()]
+            for index, (class_id, g, count) in enumerate(zip(unique_class_ids.tolist(), graphlets, counts.tolist())):
+                hash_key = hash(g)
+                if self._sketch is not None:
+                    self._sketch_class_ids.setdefault(hash_key, set()).add(class_id)
+                self._add_count(hash_key, g, count)
+                if self._reservoir_size:
+                    self._get_reservoir(batch.shape[1], hash_key).add_many(class_members[index],
+                                                                           convert=self._get_names)
+                if self._collect_sampled_moments:
+                    self._get_sampled_moments(batch.shape[1], self._ordered_names,
+                                              self._memory_budget_mb).add_groups(hash_key, class_members[index])
+                if self._collect_participation:
+                    # the rows of the matrix are the node ranks
+                    self._get_participation(batch.shape[1], self._ordered_names).add_groups(hash_key,
+                                                                                            class_members[index])
+        progress.close()
+
+    def _get_class_graphlet(self, class_id):
+        """
+        Get the graphlet of a batch class, created from the first group of the class
+        :param class_id: the batch class id
+        :return: the graphlet
+        """
+        if class_id not in self._class_graphlets:
+            node_set = [self.graph.get_node(node_name)
+                        for node_name in self._batch_classifier.get_class_example(class_id)]
+            self._class_graphlets[class_id] = Graphlet(node_set, self.graph)
+        return self._class_graphlets[class_id]
+
     def _create_and_save_graphlet(self, node_group):
         """
         Create and save the graphlet
@@ -67,11 +425,46 @@ class DPGraphletCounter(BaseAlgorithm):
             node_set.append(node)
         g = Graphlet(node_set, self.graph)
         hash_key = hash(g)
-        if hash_key not in self._graphlet_count_map:
-            self._graphlet_count_map[hash_key] = (g, 1)
+        self._add_count(hash_key, g, 1)
+        if self._reservoir_size:
+            self._get_reservoir(len(node_group), hash_key).add(tuple(node_group))
+        if self._collect_sampled_moments:
+            self._get_sampled_moments(len(node_group), self._ordered_names,
+                                      self._memory_budget_mb).add_group(hash_key, tuple(node_group))
+        if self._collect_participation:
+            self._get_participation(len(node_group), self._ordered_names).add_group(hash_key, tuple(node_group))
+
+    def _add_count(self, hash_key, g, count):
+        """
+        Add to the count of a graphlet class, in the sketch if only the most frequent classes are counted
+        The batch classes of a class the sketch evicts are forgotten.
+        :param hash_key: the graphlet hash
+        :param g: a graphlet of the class
+        :param count: the number of groups of the class
+        """
+        if self._sketch is not None:
+            for class_id in self._sketch_class_ids.pop(self._sketch.add(hash_key, count, g), ()):
+                del self._class_graphlets[class_id]
+                self._batch_classifier.forget(class_id)
+        elif hash_key not in self._graphlet_count_map:
+            self._graphlet_count_map[hash_key] = (g, count)
         else:
             self._graphlet_count_map[hash_key] = (self._graphlet_count_map[hash_key][0],
-                                                  self._graphlet_count_map[hash_key][1] + 1)
+                                                  self._graphlet_count_map[hash_key][1] + count)
+
+    def _finish_sketch(self, graphlet_size):
+        """
+        Turn the sketch of a level into its graphlet count map and error bounds
+        :param graphlet_size: the size of the graphlet
+        """
+        top = self._sketch.get_top()
+        self._graphlet_count_map = {hash_key: (g, count) for hash_key, g, count, _ in top}
+        self.extras.count_bounds[graphlet_size] = {hash_key: error for hash_key, _, _, error in top}
+        self.extras.missing_bounds[graphlet_size] = self._sketch.min_count
+        logger.info("Tracked %d of the most frequent graphlets of size %d, the top %d are guaranteed, missing "
+                    "graphlets have counts of at most %d", len(top), graphlet_size, self._sketch.num_guaranteed(),
+                    self._sketch.min_count)
+        self._sketch = None
 
     def display_frequent_graphlet_stats(self, count=5, name='dp_algo'):
         """
@@ -0,0 +1,130 @@
+from algorithm.dp_graphlet_counter import DPGraphletCounter
+from graph import Graphlet
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("ego_graphlet_counter")
+
+
+class EgoGraphletCounter(DPGraphletCounter):
+    """
+    Counts only the graphlets that contain at least one of a set of seed nodes
+    The node groups and graphlet hashes of every seed are cached, so repeated queries on the same
+    counter only pay for seeds that have not been seen before
+    """
+
+    def __init__(self, graph, mode_color_map, seeds=None, mode_constraint=None):
+        """
+        Initialize the graphlet counter
+        :param graph: the graph
+        :param mode_color_map: the map of key: node name, value: node color
+        :param seeds: the seed node names, None to count the graphlets of the whole graph
+        :param mode_constraint: the mode constraint graphlets must meet, None to count all graphlets
+        """
+        super().__init__(graph, mode_color_map, mode_constraint)
+        self._seeds = seeds
+        # map of key: (seed, graphlet size), value: set of node groups containing the seed
+        self._seed_group_cache = {}
+        # map of key: (seed, graphlet size), value: map of key: graphlet hash, value: count
+        self._seed_count_cache = {}
+        # map of key: node group, value: graphlet hash
+        self._group_hash_cache = {}
+        # map of key: graphlet hash, value: first graphlet seen with the hash
+        self._graphlets = {}
+
+    def count_graphlets(self, graphlet_size=3, seeds=None):
+        """
+        Count the graphlets of a given size containing at least one seed node
+        :param graphlet_size: the size of the graphlet
+        :param seeds: the seed node names, defaults to the seeds given to the constructor
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        seeds = seeds if seeds is not None else self._seeds
+        if seeds is None:
+            seeds = self.graph.get_nodes()
+        seeds = list(dict.fromkeys(seeds))
+        if len(seeds) == 1:
+            count_map = self.count_seed_graphlets(seeds[0], graphlet_size)
+        else:
+            # a group containing several seeds must only be counted once
+            node_groups = set()
+            for seed in seeds:
+                node_groups.update(self.get_seed_node_groups(seed, graphlet_size))
+            count_map = {}
+            for node_group in node_groups:
+                hash_key = self._get_group_hash(node_group)
+                count_map[hash_key] = count_map.get(hash_key, 0) + 1
+        self._graphlet_count_map = {hash_key: (self._graphlets[hash_key], count)
+                                    for hash_key, count in count_map.items()}
+        return self._graphlet_count_map
+
+    def count_graphlets_of_sizes(self, graphlet_sizes, seeds=None):
+        """
+        Count the graphlets of several sizes containing at least one seed node, one size at a time through the
+        seed caches
+        :param graphlet_sizes: list of graphlet sizes
+        :param seeds: the seed node names, defaults to the seeds given to the constructor
+        :return: the map of key: graphlet size, value: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        return {graphlet_size: self.count_graphlets(graphlet_size, seeds)
+                for graphlet_size in sorted(set(graphlet_sizes))}
+
+    def count_seed_graphlets(self, seed, graphlet_size=3):
+        """
+        Count the graphlets of a given size containing a seed node
+        :param seed: the seed node name
+        :param graphlet_size: the size of the graphlet
+        :return: the map of key: graphlet hash, value: count
+        """
+        key = (seed, graphlet_size)
+        if key not in self._seed_count_cache:
+            count_map = {}
+            for node_group in self.get_seed_node_groups(seed, graphlet_size):
+                hash_key = self._get_group_hash(node_group)
+                count_map[hash_key] = count_map.get(hash_key, 0) + 1
+            self._seed_count_cache[key] = count_map
+        return self._seed_count_cache[key]
+
+    def get_seed_node_groups(self, seed, graphlet_size=3):
+        """
+        Get all connected node groups of a given size containing a seed node
+        Every connected group containing the seed can be built from the seed by adding one undirected
+        neighbor of the group at a time
+        :param seed: the seed node name
+        :param graphlet_size: the size of the graphlet
+        :return: the set of sorted node name tuples
+        """
+        key = (seed, graphlet_size)
+        if key not in self._seed_group_cache:
+            if seed not in self.graph.get_nodes():
+                raise ValueError("Unknown seed node: {}".format(seed))
+            nodes_group = {(seed,)} if self._is_feasible_names((seed,), graphlet_size) else set()
+            for size in range(2, graphlet_size + 1):
+                next_nodes_group = set()
+                for node_group in nodes_group:
+                    for node_name in node_group:
+                        for neighbor_name in self.graph.get_node(node_name).undirected_edges:
+                            if neighbor_name not in node_group:
+                                next_node_group = tuple(sorted(node_group + (neighbor_name,)))
+                                if next_node_group not in next_nodes_group and \
+                                        self._is_feasible_names(next_node_group, graphlet_size):
+                                    next_nodes_group.add(next_node_group)
+                nodes_group = next_nodes_group
+            if self._mode_constraint is not None:
+                nodes_group = {node_group for node_group in nodes_group
+                               if self._mode_constraint.is_satisfied(self.graph, node_group)}
+            logger.debug("Found %d node groups of size %d around %s", len(nodes_group), graphlet_size, seed)
+            self._seed_group_cache[key] = nodes_group
+        return self._seed_group_cache[key]
+
+    def _get_group_hash(self, node_group):
+        """
+        Get the graphlet hash of a node group
+        :param node_group: the sorted node name tuple
+        :return: the graphlet hash
+        """
+        if node_group not in self._group_hash_cache:
+            g = Graphlet([self.graph.get_node(node_name) for node_name in node_group], self.graph)
+            hash_key = hash(g)
+            self._graphlets.setdefault(hash_key, g)
+            self._group_hash_cache[node_group] = hash_key
+        return self._group_hash_cache[node_group]
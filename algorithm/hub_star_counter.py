@@ -0,0 +1,437 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from graph import BatchClassifier, Graphlet
+
+# number of (core, leaf picks) rows classified at once
+CLASSIFY_BATCH = 10000
+
+
+class HubStarCounter:
+    """
+    Counts the node groups around hubs analytically instead of enumerating the picks of hub neighbors
+    A non hub node of a group is a free leaf if its only neighbor in the group is a hub. Removing the free leaves
+    of a group leaves its core, a connected group without free leaves, and every group is its core plus pairwise
+    non adjacent free leaves, each adjacent to exactly one hub of the core and to no other core node.
+    The class of a group only depends on its core and on the multiset of (hub, leaf code) of its free leaves, where
+    the leaf code holds the edges between the hub and the leaf and the self loops of the leaf. So the groups with
+    free leaves are counted per core: the ways to pick the leaves of every (hub, code) are prod C(n, m), and the
+    picks with an edge between two leaves are taken out by inclusion exclusion over the sets of candidate leaves
+    covered by leaf-leaf edges.
+    The cores holding a hub are built from the hubs by adding hubs, whole non hub components and nodes adjacent to
+    two hubs, and the groups without hubs are enumerated in the graph without the hubs, so no group of a hub and
+    several of its neighbors is ever built. The work around a hub grows with its neighbors times their own
+    neighborhoods and with the leaf-leaf edges, not with C(degree, k - 1); only the cores with two or more multi
+    node arms on the hubs and the leaf sets with two or more leaf-leaf edges (5 nodes or more) are still
+    combinations of arms or edges.
+    """
+
+    def __init__(self, graph, ordered_names, ordered_adjacency, hub_degree_threshold, max_size,
+                 batch_classifier=None):
+        """
+        Initialize the counter
+        :param graph: the graph
+        :param ordered_names: the node names by rank
+        :param ordered_adjacency: the sorted neighbor ranks of every rank, without self loops
+        :param hub_degree_threshold: the minimum undirected degree of a hub
+        :param max_size: the size of the largest groups
+        :param batch_classifier: the classifier the groups with free leaves are classified with, None for a new one
+        """
+        self._graph = graph
+        self._ordered_names = ordered_names
+        self._max_size = max_size
+        self._neighbor_sets = [set(neighbors) for neighbors in ordered_adjacency]
+        self.hubs = {rank for rank, neighbors in enumerate(ordered_adjacency) if len(neighbors) >= hub_degree_threshold}
+        # the neighbors of every rank without the hubs, the graph the groups without hubs are enumerated in
+        self.non_hub_adjacency = [[neighbor for neighbor in neighbors if neighbor not in self.hubs]
+                                  for neighbors in ordered_adjacency]
+        self._hub_neighbors = [[neighbor for neighbor in neighbors if neighbor in self.hubs]
+                               for neighbors in ordered_adjacency]
+        # map of key: hub rank, value: map of key: non hub neighbor rank, value: leaf code
+        self._leaf_codes = {hub: {leaf: self._get_leaf_code(hub, leaf) for leaf in self.non_hub_adjacency[hub]}
+                            for hub in self.hubs}
+        self._code_counts = {hub: Counter(leaf_codes.values()) for hub, leaf_codes in self._leaf_codes.items()}
+        # map of key: hub rank, value: list of (non hub neighbor, another hub next to it)
+        self._bridges = {hub: [(leaf, other) for leaf in self.non_hub_adjacency[hub]
+                               for other in self._hub_neighbors[leaf] if other != hub] for hub in self.hubs}
+        # map of key: hub rank, value: list of edges from a non hub neighbor to a non hub node next to a hub
+        self._leaf_edges = {hub: [(leaf, other) for leaf in self.non_hub_adjacency[hub]
+                                  for other in self.non_hub_adjacency[leaf] if self._hub_neighbors[other]]
+                            for hub in self.hubs}
+        # map of key: hub rank, value: map of key: size, value: connected non hub groups with a neighbor of the hub
+        self._components = {}
+        # map of key: sorted pair of hub ranks, value: set of their common non hub neighbors
+        self._common_leaves = {}
+        self._classifier = batch_classifier or BatchClassifier(graph)
+        self._classifier_indexes = self._classifier.get_node_indexes([ordered_names])[0]
+        # map of key: invariant bytes, value: (graphlet hash, graphlet)
+        self._classes = {}
+
+    def _get_leaf_code(self, hub, leaf):
+        """
+        Encode the edges between a hub and a leaf and the self loops of the leaf
+        :param hub: the rank of the hub
+        :param leaf: the rank of the leaf
+        :return: the leaf code
+        """
+        mode_map = self._graph.mode_map
+        num_modes = len(mode_map)
+        hub_name, leaf_name = self._ordered_names[hub], self._ordered_names[leaf]
+        hub_edges, leaf_edges = self._graph.get_node(hub_name).edges, self._graph.get_node(leaf_name).edges
+        code = 0
+        for mode, mode_index in mode_map.items():
+            if leaf_name in hub_edges.get(mode, {}):
+                code |= 1 << mode_index
+            if hub_name in leaf_edges.get(mode, {}):
+                code |= 1 << (num_modes + mode_index)
+            if leaf_name in leaf_edges.get(mode, {}):
+                code |= 1 << (2 * num_modes + mode_index)
+        return code
+
+    def get_closed_groups(self):
+        """
+        Enumerate the cores holding a hub, every core is built from its lowest ranked hub
+        A core grows by a hub next to it, a non hub component next to one of its hubs, a node adjacent to two of its
+        hubs, or such a node and the second hub at once, without touching its non hub nodes. Every step keeps it a
+        core, and every core is reached by adding its hubs in a connected order and then the rest of its parts.
+        :return: the map of key: group size, value: set of sorted tuples of node ranks
+        """
+        closed_groups = {size: set() for size in range(1, self._max_size + 1)}
+        for hub in sorted(self.hubs):
+            closed_groups[1].add((hub,))
+            frontier = [(hub,)]
+            while frontier:
+                next_frontier = []
+                for node_group in frontier:
+                    for next_node_group in self._extend_closed_group(node_group, hub):
+                        if next_node_group not in closed_groups[len(next_node_group)]:
+                            closed_groups[len(next_node_group)].add(next_node_group)
+                            next_frontier.append(next_node_group)
+                frontier = next_frontier
+        return closed_groups
+
+    def _extend_closed_group(self, node_group, lowest_hub):
+        """
+        Generate the cores one step larger than a core
+        :param node_group: sorted tuple of node ranks of the core
+        :param lowest_hub: the lowest ranked hub of the core, hubs ranked before it are not added
+        :return: generator of sorted tuples of node ranks
+        """
+        budget = self._max_size - len(node_group)
+        if budget <= 0:
+            return
+        members = set(node_group)
+        non_hub_members = {rank for rank in node_group if rank not in self.hubs}
+
+        def is_apart(nodes):
+            return all(neighbor not in non_hub_members for rank in nodes for neighbor in self.non_hub_adjacency[rank])
+
+        for rank in node_group:
+            for other in self._hub_neighbors[rank]:
+                if other > lowest_hub and other not in members:
+                    yield tuple(sorted(node_group + (other,)))
+        for hub in node_group:
+            if hub not in self.hubs:
+                continue
+            for leaf, other in self._bridges[hub]:
+                if leaf in members or not is_apart((leaf,)):
+                    continue
+                if other in members:
+                    yield tuple(sorted(node_group + (leaf,)))
+                elif other > lowest_hub and budget >= 2:
+                    yield tuple(sorted(node_group + (leaf, other)))
+            components = self._get_components(hub)
+            for size in range(2, budget + 1):
+                for component in components[size]:
+                    if members.isdisjoint(component) and is_apart(component):
+                        yield tuple(sorted(node_group + component))
+
+    def _get_components(self, hub):
+        """
+        Get the connected non hub groups holding a neighbor of a hub, built on first use
+        :param hub: the rank of the hub
+        :return: the map of key: size from 2 to the largest size - 1, value: list of sorted tuples of node ranks
+        """
+        if hub not in self._components:
+            components = {}
+            nodes_group = {(leaf,) for leaf in self.non_hub_adjacency[hub]}
+            for size in range(2, self._max_size):
+                nodes_group = {tuple(sorted(node_group + (neighbor,))) for node_group in nodes_group
+                               for rank in node_group for neighbor in self.non_hub_adjacency[rank]
+                               if neighbor not in node_group}
+                components[size] = sorted(nodes_group)
+            self._components[hub] = components
+        return self._components[hub]
+
+    def count_free_leaf_groups(self, closed_groups, graphlet_size):
+        """
+        Count the groups of a size with at least one free leaf
+        :param closed_groups: the cores holding a hub, from get_closed_groups
+        :param graphlet_size: the number of nodes of the groups
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        graphlet_count_map = {}
+        rows = []
+        for core_size in range(1, graphlet_size):
+            for core in closed_groups.get(core_size, ()):
+                for leaf_slots, count in self._count_leaf_picks(core, graphlet_size - core_size):
+                    rows.append((core, leaf_slots, count))
+                if len(rows) >= CLASSIFY_BATCH:
+                    self._classify_rows(rows, graphlet_count_map)
+                    rows = []
+        self._classify_rows(rows, graphlet_count_map)
+        return graphlet_count_map
+
+    def _get_leaf_hub(self, rank, core):
+        """
+        Get the hub a node can hang off as a free leaf of a core
+        :param rank: the rank of the node
+        :param core: sorted tuple of node ranks of the core
+        :return: the rank of the hub, None if the node is a hub, in the core or not adjacent to exactly one core
+        node which is a hub
+        """
+        if rank in self.hubs or rank in core:
+            return None
+        neighbors = self._neighbor_sets[rank]
+        touched = [member for member in core if member in neighbors]
+        if len(touched) != 1 or touched[0] not in self.hubs:
+            return None
+        return touched[0]
+
+    def _get_blocked_leaves(self, hub, core):
+        """
+        Get the non hub neighbors of a hub that cannot hang off it as free leaves of a core
+        :param hub: the rank of the hub
+        :param core: sorted tuple of node ranks of the core
+        :return: set of node ranks in the core or adjacent to another core node
+        """
+        blocked = set()
+        hub_neighbors = self._neighbor_sets[hub]
+        for rank in core:
+            if rank == hub:
+                continue
+            if rank in self.hubs:
+                blocked.update(self._get_common_leaves(hub, rank))
+                continue
+            if rank in hub_neighbors:
+                blocked.add(rank)
+            blocked.update(neighbor for neighbor in self.non_hub_adjacency[rank] if neighbor in hub_neighbors)
+        return blocked
+
+    def _get_common_leaves(self, hub, other):
+        """
+        Get the common non hub neighbors of two hubs
+        :param hub: the rank of a hub
+        :param other: the rank of the other hub
+        :return: set of node ranks
+        """
+        key = (min(hub, other), max(hub, other))
+        if key not in self._common_leaves:
+            smaller, larger = sorted(key, key=lambda rank: len(self.non_hub_adjacency[rank]))
+            self._common_leaves[key] = {leaf for leaf in self.non_hub_adjacency[smaller]
+                                        if leaf in self._neighbor_sets[larger]}
+        return self._common_leaves[key]
+
+    def _count_leaf_picks(self, core, num_leaves):
+        """
+        Count the ways to add free leaves to a core, by the (hub, leaf code) of the leaves
+        :param core: sorted tuple of node ranks of the core
+        :param num_leaves: the number of free leaves
+        :return: list of (tuple of (hub rank, leaf code) per leaf, number of groups)
+        """
+        available = {}
+        for hub in core:
+            if hub not in self.hubs:
+                continue
+            leaf_codes = self._leaf_codes[hub]
+            for code, count in self._code_counts[hub].items():
+                available[(hub, code)] = count
+            for leaf in self._get_blocked_leaves(hub, core):
+                available[(hub, leaf_codes[leaf])] -= 1
+        slots = sorted(slot for slot, count in available.items() if count > 0)
+        slot_positions = {slot: position for position, slot in enumerate(slots)}
+        sizes = [available[slot] for slot in slots]
+        # map of key: number of leaves of every slot, value: signed number of leaf sets covered by leaf-leaf edges
+        corrections = {}
+        if num_leaves >= 2:
+            for leaves in self._get_covered_leaf_sets(core, num_leaves):
+                used = [0] * len(slots)
+                for leaf in leaves:
+                    hub = self._get_leaf_hub(leaf, core)
+                    used[slot_positions[(hub, self._leaf_codes[hub][leaf])]] += 1
+                used = tuple(used)
+                corrections[used] = corrections.get(used, 0) + self._get_cover_sign(leaves)
+        results = []
+        for picks in self._get_code_picks(slots, sizes, num_leaves):
+            count = math.prod(math.comb(size, num_picked) for size, num_picked in zip(sizes, picks))
+            for used, sign in corrections.items():
+                if sign and all(num_used <= num_picked for num_used, num_picked in zip(used, picks)):
+                    count += sign * math.prod(math.comb(size - num_used, num_picked - num_used)
+                                              for size, num_picked, num_used in zip(sizes, picks, used))
+            if count > 0:
+                results.append((tuple(slot for slot, num_picked in zip(slots, picks) for _ in range(num_picked)),
+                                count))
+        return results
+
+    def _get_covered_leaf_sets(self, core, max_leaves):
+        """
+        Get the sets of candidate free leaves of a core in which every leaf is adjacent to another leaf of the set
+        By inclusion exclusion, the independent picks of leaves are all picks plus, for every such set U, the picks
+        holding U times the sum of (-1)^|T| over the subsets T of U whose removal leaves U independent.
+        :param core: sorted tuple of node ranks of the core
+        :param max_leaves: the largest number of leaves of a set
+        :return: list of tuples of node ranks
+        """
+        is_leaf = {}
+
+        def check_leaf(rank):
+            if rank not in is_leaf:
+                is_leaf[rank] = self._get_leaf_hub(rank, core) is not None
+            return is_leaf[rank]
+
+        nodes_group = set()
+        for hub in core:
+            if hub in self.hubs:
+                for leaf, other in self._leaf_edges[hub]:
+                    if check_leaf(leaf) and check_leaf(other):
+                        nodes_group.add((leaf, other) if leaf < other else (other, leaf))
+        # the connected leaf sets, every covered set is a union of non adjacent ones
+        components = sorted(nodes_group)
+        for size in range(3, max_leaves + 1):
+            nodes_group = {tuple(sorted(node_group + (neighbor,))) for node_group in nodes_group
+                           for rank in node_group for neighbor in self.non_hub_adjacency[rank]
+                           if neighbor not in node_group and check_leaf(neighbor)}
+            components.extend(sorted(nodes_group))
+        if max_leaves < 4:
+            return components
+        leaf_sets = []
+
+        def add_unions(start, chosen):
+            for position in range(start, len(components)):
+                component = components[position]
+                if len(chosen) + len(component) <= max_leaves and chosen.isdisjoint(component) and \
+                        all(neighbor not in chosen for rank in component for neighbor in self.non_hub_adjacency[rank]):
+                    union = chosen | set(component)
+                    leaf_sets.append(tuple(sorted(union)))
+                    add_unions(position + 1, union)
+
+        add_unions(0, set())
+        return leaf_sets
+
+    def _get_cover_sign(self, leaves):
+        """
+        Get the inclusion exclusion weight of a covered leaf set
+        :param leaves: tuple of node ranks
+        :return: the sum of (-1)^|T| over the subsets T whose removal leaves the other leaves non adjacent
+        """
+        sign = 0
+        for mask in range(1 << len(leaves)):
+            rest = [leaf for position, leaf in enumerate(leaves) if not mask >> position & 1]
+            if all(rest[j] not in self._neighbor_sets[rest[i]]
+                   for i in range(len(rest)) for j in range(i + 1, len(rest))):
+                sign += -1 if bin(mask).count("1") % 2 else 1
+        return sign
+
+    def _classify_rows(self, rows, graphlet_count_map):
+        """
+        Classify (core, leaf picks) rows and add their counts, the adjacency of a row is its core with the picked
+        free leaves attached to their hubs
+        :param rows: list of (core, tuple of (hub rank, leaf code) per leaf, number of groups)
+        :param graphlet_count_map: the map of key: graphlet hash, value: (graphlet, count) added to
+        :return: None
+        """
+        if not rows:
+            return
+        num_modes = len(self._graph.mode_map)
+        graphlet_size = len(rows[0][0]) + len(rows[0][1])
+        tensor = np.zeros((len(rows), graphlet_size, graphlet_size, num_modes), dtype=bool)
+        by_core_size = {}
+        for index, (core, _, _) in enumerate(rows):
+            by_core_size.setdefault(len(core), []).append(index)
+        for core_size, indexes in by_core_size.items():
+            cores = np.array([rows[index][0] for index in indexes], dtype=np.int64)
+            tensor[indexes, :core_size, :core_size] = \
+                self._classifier.get_adjacency_tensor(self._classifier_indexes[cores])
+        for index, (core, leaf_slots, _) in enumerate(rows):
+            for position, (hub, code) in enumerate(leaf_slots, len(core)):
+                hub_position = core.index(hub)
+                for mode_index in range(num_modes):
+                    tensor[index, hub_position, position, mode_index] = code >> mode_index & 1
+                    tensor[index, position, hub_position, mode_index] = code >> (num_modes + mode_index) & 1
+                    tensor[index, position, position, mode_index] = code >> (2 * num_modes + mode_index) & 1
+        unique_descriptions, group_codes = self._classifier.get_invariants(tensor)
+        unique_codes, first_indexes, code_ids = np.unique(group_codes, axis=0, return_index=True, return_inverse=True)
+        counts = [0] * len(unique_codes)
+        for code_id, (_, _, count) in zip(code_ids.reshape(-1).tolist(), rows):
+            counts[code_id] += count
+        for code_id, code in enumerate(unique_codes):
+            key = unique_descriptions[code].tobytes()
+            if key not in self._classes:
+                core, leaf_slots, _ = rows[first_indexes[code_id]]
+                node_names = self._find_example(core, leaf_slots)
+                g = Graphlet([self._graph.get_node(node_name) for node_name in node_names], self._graph)
+                self._classes[key] = (hash(g), g)
+            hash_key, g = self._classes[key]
+            if hash_key in graphlet_count_map:
+                graphlet_count_map[hash_key] = (graphlet_count_map[hash_key][0],
+                                                graphlet_count_map[hash_key][1] + counts[code_id])
+            else:
+                graphlet_count_map[hash_key] = (g, counts[code_id])
+
+    def _find_example(self, core, leaf_slots):
+        """
+        Find the free leaves of one group of a core and leaf picks
+        :param core: sorted tuple of node ranks of the core
+        :param leaf_slots: tuple of (hub rank, leaf code) per leaf
+        :return: sorted tuple of the node names of the group
+        """
+        slots = sorted(set(leaf_slots))
+        leaves_by_slot = [[leaf for leaf, leaf_code in self._leaf_codes[hub].items()
+                           if leaf_code == code and self._get_leaf_hub(leaf, core) == hub] for hub, code in slots]
+        leaves = self._find_independent_leaves(leaves_by_slot, [leaf_slots.count(slot) for slot in slots])
+        return tuple(self._ordered_names[rank] for rank in sorted(core + tuple(leaves)))
+
+    @staticmethod
+    def _get_code_picks(codes, available, num_leaves):
+        """
+        Generate every way to pick a number of leaves by leaf code
+        :param codes: the leaf codes
+        :param available: the number of leaves of every code
+        :param num_leaves: the number of leaves to pick
+        :return: generator of tuples with the number of picked leaves of every code
+        """
+        if not codes:
+            if num_leaves == 0:
+                yield ()
+            return
+        for num_picked in range(min(available[0], num_leaves), -1, -1):
+            for rest in HubStarCounter._get_code_picks(codes[1:], available[1:], num_leaves - num_picked):
+                yield (num_picked,) + rest
+
+    def _find_independent_leaves(self, leaves_by_code, picks, chosen=None, start=0):
+        """
+        Find pairwise non adjacent leaves with the picked number of leaves of every code, by backtracking
+        :param leaves_by_code: list of leaf ranks of every code
+        :param picks: the number of leaves still to pick of every code
+        :param chosen: the leaves chosen so far
+        :param start: the position in the leaves of the first code still to pick from
+        :return: list of leaf ranks, None if there is none
+        """
+        chosen = chosen or []
+        code_index = next((i for i, num_picked in enumerate(picks) if num_picked > 0), None)
+        if code_index is None:
+            return chosen
+        leaves = leaves_by_code[code_index]
+        for position in range(start, len(leaves)):
+            leaf = leaves[position]
+            if all(other not in self._neighbor_sets[leaf] for other in chosen):
+                picks[code_index] -= 1
+                # the next leaf of the same code comes later in its list, a new code starts at its first leaf
+                found = self._find_independent_leaves(leaves_by_code, picks, chosen + [leaf],
+                                                      position + 1 if picks[code_index] > 0 else 0)
+                picks[code_index] += 1
+                if found is not None:
+                    return found
+        return None
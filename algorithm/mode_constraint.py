@@ -0,0 +1,114 @@
+class ModeConstraint:
+    """
+    Constraints on the edge modes of the graphlets to count
+    - allowed_modes: only graphlets whose edges all have one of these modes are counted
+    - min_counts / max_counts: bounds on the number of edges of a mode in the graphlet
+    - require_cycle: only graphlets containing a directed cycle of at least two nodes are counted,
+      using only the edges of cycle_modes (all modes if not given)
+
+    The induced edges of a node group are kept when the group is extended, so a partial group with a
+    disallowed mode or too many edges of a mode can never become a valid graphlet and is pruned.
+    A partial group is also pruned when the edges it can still gain cannot reach a minimum count.
+    """
+
+    def __init__(self, allowed_modes=None, min_counts=None, max_counts=None, require_cycle=False, cycle_modes=None):
+        """
+        Initialize the constraint
+        :param allowed_modes: list of allowed modes, None to allow all modes
+        :param min_counts: map of key: mode, value: minimum number of edges of the mode
+        :param max_counts: map of key: mode, value: maximum number of edges of the mode
+        :param require_cycle: if True, the graphlet must contain a directed cycle
+        :param cycle_modes: list of modes the cycle may use, None to use all modes
+        """
+        self.allowed_modes = set(allowed_modes) if allowed_modes is not None else None
+        self.min_counts = min_counts or {}
+        self.max_counts = max_counts or {}
+        self.require_cycle = require_cycle
+        self.cycle_modes = set(cycle_modes) if cycle_modes is not None else None
+
+    @staticmethod
+    def from_config(config):
+        """
+        Create the constraint from the mode_constraints section of the config
+        :param config: the map of constraint settings, None for no constraint
+        :return: the constraint or None
+        """
+        if not config:
+            return None
+        return ModeConstraint(config.get("allowed_modes"), config.get("min_counts"), config.get("max_counts"),
+                              config.get("require_cycle", False), config.get("cycle_modes"))
+
+    def get_mode_counts(self, graph, node_group):
+        """
+        Count the induced edges of a node group per mode
+        :param graph: the graph
+        :param node_group: the node names
+        :return: the map of key: mode, value: number of edges, None if an edge has a disallowed mode
+        """
+        mode_counts = {}
+        for node_name in node_group:
+            for mode, neighbors in graph.get_node(node_name).edges.items():
+                for other_name in node_group:
+                    if other_name in neighbors:
+                        if self.allowed_modes is not None and mode not in self.allowed_modes:
+                            return None
+                        mode_counts[mode] = mode_counts.get(mode, 0) + 1
+        return mode_counts
+
+    def is_feasible(self, graph, node_group, target_size):
+        """
+        Check if a partial node group can still be extended to a graphlet meeting the constraint
+        :param graph: the graph
+        :param node_group: the node names of the partial group
+        :param target_size: the size of the graphlet
+        :return: True if the group must be kept, False if it can be pruned
+        """
+        mode_counts = self.get_mode_counts(graph, node_group)
+        if mode_counts is None:
+            return False
+        for mode, max_count in self.max_counts.items():
+            if mode_counts.get(mode, 0) > max_count:
+                return False
+        # every ordered node pair (including self loops) the group gains can add one edge of each mode
+        remaining_pairs = target_size * target_size - len(node_group) * len(node_group)
+        for mode, min_count in self.min_counts.items():
+            if mode_counts.get(mode, 0) + remaining_pairs < min_count:
+                return False
+        return True
+
+    def is_satisfied(self, graph, node_group):
+        """
+        Check if a complete node group meets the constraint
+        :param graph: the graph
+        :param node_group: the node names
+        :return: True if the group meets the constraint
+        """
+        if not self.is_feasible(graph, node_group, len(node_group)):
+            return False
+        return not self.require_cycle or self._has_directed_cycle(graph, node_group)
+
+    def _has_directed_cycle(self, graph, node_group):
+        """
+        Check if the induced edges of a node group contain a directed cycle through at least two nodes
+        :param graph: the graph
+        :param node_group: the node names
+        :return: True if there is a cycle
+        """
+        successors = {node_name: set() for node_name in node_group}
+        for node_name in node_group:
+            for mode, neighbors in graph.get_node(node_name).edges.items():
+                if self.cycle_modes is not None and mode not in self.cycle_modes:
+                    continue
+                for other_name in node_group:
+                    if other_name != node_name and other_name in neighbors:
+                        successors[node_name].add(other_name)
+        # repeatedly remove nodes without successors, whatever remains lies on or leads into a cycle
+        remaining = set(node_group)
+        removed = True
+        while removed:
+            removed = False
+            for node_name in list(remaining):
+                if not successors[node_name] & remaining:
+                    remaining.remove(node_name)
+                    removed = True
+        return len(remaining) > 0
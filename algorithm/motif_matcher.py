@@ -0,0 +1,247 @@
+from graph import Graph, Graphlet
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("motif_matcher")
+
+
+class MotifMatcher:
+    """
+    Counts or lists the induced occurrences of one query graphlet without a full census
+    Query nodes are matched one at a time in an order where every node after the first has a matched
+    neighbor, so the candidates of a node are the graph neighbors of the node its matched neighbor was mapped
+    to. A candidate must have at least the per mode in and out degrees and exactly the self loops of the query
+    node, and the same edges to every matched node in every mode and direction, so each match is induced.
+    Automorphisms of the query would find every node set once per automorphism; symmetry breaking adds
+    conditions map(v) < map(u) on the node indexes for the nodes of the largest orbit, then repeats on the
+    stabilizer of v until no automorphism is left, so every node set is found exactly once.
+    """
+
+    def __init__(self, graph, query):
+        """
+        Initialize the matcher
+        :param graph: the graph to search
+        :param query: the query graphlet, a Graphlet or a list of (source name, target name, mode) edges
+        """
+        self._graph = graph
+        self._modes = sorted(graph.mode_map, key=graph.mode_map.get)
+        if not isinstance(query, Graphlet):
+            query = self._create_query_graphlet(query)
+        self.query = query
+        self._query_names = [node.name for node in query.nodes]
+        query_name_set = set(self._query_names)
+        self._query_codes = [[self._get_pair_code(node, other.name, other) for other in query.nodes]
+                             for node in query.nodes]
+        self._query_out_degrees = [self._get_query_out_degree(node, query_name_set) for node in query.nodes]
+        self._node_names = sorted(graph.get_nodes())
+        self._node_indexes = {node_name: i for i, node_name in enumerate(self._node_names)}
+        self._out_degrees, self._in_degrees = self._get_degrees()
+        self._order, self._anchors = self._get_match_order()
+        self._constraints = self._get_symmetry_constraints()
+
+    def _create_query_graphlet(self, edges):
+        """
+        Create the query graphlet of an edge list on a graph of its own, with the mode indexes of the graph
+        :param edges: list of (source name, target name, mode) edges
+        :return: the graphlet
+        """
+        query_graph = Graph()
+        for mode in self._modes:
+            query_graph.register_mode(mode)
+        for source_name, target_name, mode in edges:
+            if mode not in self._graph.mode_map:
+                raise ValueError("Unknown edge mode in the query: {}".format(mode))
+            query_graph.add_edge(source_name, target_name, mode)
+        return Graphlet([query_graph.get_node(node_name) for node_name in sorted(query_graph.get_nodes())],
+                        query_graph)
+
+    def _get_pair_code(self, node, other_name, other):
+        """
+        Encode the edges between two nodes, or the self loops of a node if both are the same
+        :param node: the first node
+        :param other_name: the name of the second node
+        :param other: the second node
+        :return: bit i is an edge of mode i from node to other, bit modes + i an edge of mode i back
+        """
+        code = 0
+        for mode_index, mode in enumerate(self._modes):
+            if other_name in node.edges.get(mode, {}):
+                code |= 1 << mode_index
+            if node.name in other.edges.get(mode, {}):
+                code |= 1 << (len(self._modes) + mode_index)
+        return code
+
+    def _get_query_out_degree(self, node, node_name_set):
+        """
+        Get the per mode out degree of a query node within the query, self loops left out
+        :param node: the query node
+        :param node_name_set: the names of the query nodes
+        :return: tuple of out degrees by mode index
+        """
+        return tuple(sum(1 for target_name in node.edges.get(mode, {})
+                         if target_name != node.name and target_name in node_name_set)
+                     for mode in self._modes)
+
+    def _get_degrees(self):
+        """
+        Get the per mode out and in degrees of every graph node, self loops left out
+        :return: (out degrees, in degrees), maps of key: node name, value: tuple of degrees by mode index
+        """
+        mode_indexes = {mode: mode_index for mode_index, mode in enumerate(self._modes)}
+        out_degrees = {node_name: [0] * len(self._modes) for node_name in self._node_names}
+        in_degrees = {node_name: [0] * len(self._modes) for node_name in self._node_names}
+        for source_name, target_name, mode in self._graph.get_edges():
+            if source_name != target_name:
+                out_degrees[source_name][mode_indexes[mode]] += 1
+                in_degrees[target_name][mode_indexes[mode]] += 1
+        return ({node_name: tuple(degrees) for node_name, degrees in out_degrees.items()},
+                {node_name: tuple(degrees) for node_name, degrees in in_degrees.items()})
+
+    def _get_query_in_degree(self, position):
+        """
+        Get the per mode in degree of a query node within the query, self loops left out
+        :param position: the position of the query node
+        :return: tuple of in degrees by mode index
+        """
+        num_modes = len(self._modes)
+        return tuple(sum(1 for other in range(len(self._query_names))
+                         if other != position and self._query_codes[other][position] >> mode_index & 1)
+                     for mode_index in range(num_modes))
+
+    def _is_candidate(self, position, node_name):
+        """
+        Check the degrees and self loops of a graph node against a query node
+        :param position: the position of the query node
+        :param node_name: the name of the graph node
+        :return: True if the graph node can be mapped to the query node
+        """
+        node = self._graph.get_node(node_name)
+        if self._get_pair_code(node, node_name, node) != self._query_codes[position][position]:
+            return False
+        return all(degree >= query_degree for degree, query_degree in zip(self._out_degrees[node_name],
+                                                                          self._query_out_degrees[position])) \
+            and all(degree >= query_degree for degree, query_degree in zip(self._in_degrees[node_name],
+                                                                           self._query_in_degrees[position]))
+
+    def _get_match_order(self):
+        """
+        Order the query nodes: first the node with the fewest graph candidates, then repeatedly the unmatched
+        node with the most edges to the matched nodes, ties broken by fewer candidates
+        :return: (list of query positions, map of key: position, value: its matched neighbor, None for the first)
+        """
+        num_query_nodes = len(self._query_names)
+        self._query_in_degrees = [self._get_query_in_degree(position) for position in range(num_query_nodes)]
+        self._candidates = [[node_name for node_name in self._node_names if self._is_candidate(position, node_name)]
+                            for position in range(num_query_nodes)]
+        self._candidate_sets = [set(candidates) for candidates in self._candidates]
+        order = [min(range(num_query_nodes), key=lambda position: len(self._candidates[position]))]
+        anchors = {order[0]: None}
+        while len(order) < num_query_nodes:
+            remaining = [position for position in range(num_query_nodes) if position not in anchors]
+            connected = [position for position in remaining
+                         if any(self._query_codes[position][matched] for matched in order)]
+            if not connected:
+                raise ValueError("The query graphlet must be connected")
+            position = max(connected, key=lambda p: (sum(1 for matched in order if self._query_codes[p][matched]),
+                                                     -len(self._candidates[p])))
+            anchors[position] = next(matched for matched in order if self._query_codes[position][matched])
+            order.append(position)
+        return order, anchors
+
+    def _get_automorphisms(self, mapping=None):
+        """
+        Find the automorphisms of the query by backtracking
+        :param mapping: the partial permutation of the query positions
+        :return: list of permutations, tuples of positions
+        """
+        mapping = mapping or []
+        position = len(mapping)
+        if position == len(self._query_names):
+            return [tuple(mapping)]
+        automorphisms = []
+        for image in range(len(self._query_names)):
+            if image in mapping or self._query_codes[image][image] != self._query_codes[position][position]:
+                continue
+            if all(self._query_codes[image][mapping[other]] == self._query_codes[position][other]
+                   for other in range(position)):
+                automorphisms.extend(self._get_automorphisms(mapping + [image]))
+        return automorphisms
+
+    def _get_symmetry_constraints(self):
+        """
+        Get the conditions that keep one match per node set
+        :return: list of (position a, position b) meaning the node of a must have a lower index than the node of b
+        """
+        automorphisms = self._get_automorphisms()
+        constraints = []
+        while len(automorphisms) > 1:
+            orbits = {position: {automorphism[position] for automorphism in automorphisms}
+                      for position in range(len(self._query_names))}
+            position = max(orbits, key=lambda p: (len(orbits[p]), -p))
+            constraints.extend((position, other) for other in sorted(orbits[position]) if other != position)
+            automorphisms = [automorphism for automorphism in automorphisms if automorphism[position] == position]
+        return constraints
+
+    def occurrences(self):
+        """
+        Stream the induced occurrences of the query
+        :return: generator of tuples of node names, the node mapped to every query node in query node order
+        """
+        mapping = [None] * len(self._query_names)
+        yield from self._extend(mapping, 0, set())
+
+    def _extend(self, mapping, depth, used):
+        """
+        Match the query node at a depth of the match order and the ones after it
+        :param mapping: the graph node name of every query position, None if unmatched
+        :param depth: the depth in the match order
+        :param used: the graph node names mapped so far
+        :return: generator of complete mappings as tuples
+        """
+        if depth == len(self._order):
+            yield tuple(mapping)
+            return
+        position = self._order[depth]
+        anchor = self._anchors[position]
+        if anchor is None:
+            candidates = self._candidates[position]
+        else:
+            anchor_node = self._graph.get_node(mapping[anchor])
+            candidates = [node_name for node_name in anchor_node.undirected_edges if node_name != mapping[anchor]]
+        candidate_set = self._candidate_sets[position]
+        for node_name in candidates:
+            if node_name in used or node_name not in candidate_set or \
+                    not self._meets_constraints(mapping, position, node_name):
+                continue
+            node = self._graph.get_node(node_name)
+            if all(self._get_pair_code(node, mapping[other], self._graph.get_node(mapping[other])) ==
+                   self._query_codes[position][other] for other in self._order[:depth]):
+                mapping[position] = node_name
+                used.add(node_name)
+                yield from self._extend(mapping, depth + 1, used)
+                used.remove(node_name)
+                mapping[position] = None
+
+    def _meets_constraints(self, mapping, position, node_name):
+        """
+        Check the symmetry breaking conditions between a query node and the matched query nodes
+        :param mapping: the graph node name of every query position, None if unmatched
+        :param position: the query position being matched
+        :param node_name: the graph node name it is mapped to
+        :return: True if no condition is broken
+        """
+        index = self._node_indexes[node_name]
+        for first, second in self._constraints:
+            if first == position and mapping[second] is not None and index > self._node_indexes[mapping[second]]:
+                return False
+            if second == position and mapping[first] is not None and index < self._node_indexes[mapping[first]]:
+                return False
+        return True
+
+    def count(self):
+        """
+        Count the induced occurrences of the query
+        :return: the number of node sets inducing the query graphlet
+        """
+        num_occurrences = sum(1 for _ in self.occurrences())
+        logger.info("Found %d occurrences of the query graphlet", num_occurrences)
+        return num_occurrences
@@ -0,0 +1,183 @@
+import math
+import random
+import sys
+import time
+
+from algorithm.brute_force_graphlet_counter import BruteForceGraphletCounter
+from algorithm.dp_graphlet_counter import DPGraphletCounter
+from graph.ordering import get_undirected_degrees
+from util.logger_util import LoggerUtil
+from util.sampled_moments import SampledCountMoments
+from util.spill import SET_ENTRY_OVERHEAD
+
+logger = LoggerUtil.get_logger("planner")
+
+# approximate bytes kept per graphlet class by a counter: the graphlet, its count and the map entry
+BYTES_PER_CLASS = 1024
+# census options only DPGraphletCounter supports, the planner picks it whenever one of them is set
+DP_ONLY_OPTIONS = ("mode_constraints", "participation_matrix", "analytic_sampling", "heavy_hitters", "memory_budget_mb",
+                   "deadline_seconds", "shard")
+# number of random node combinations timed to estimate the cost of a brute force connectivity check
+NUM_TIMED_COMBINATIONS = 2000
+
+
+class Planner:
+    """
+    Pre-flight cost estimates of the graphlet counters and a choice of the counter and sampling settings
+    Every connected group is counted by exactly one root in DPGraphletCounter (its lowest ranked node), so
+    enumerating the groups of a uniform random sample of roots gives unbiased estimates of the number of
+    groups of every size and of the DP runtime. BruteForceGraphletCounter is estimated from the same group
+    counts: it checks all C(n, k) node combinations and hashes every connected one. BFSGraphletCounter is
+    deprecated and not timed, so it is never planned. Peak memory of the DP is its two largest levels of groups.
+    When no counter fits the budgets, the DP is run on uniform node samples small enough to fit, using the
+    expected number of sampled groups count * C(n - k, s - k) / C(n, s).
+    """
+
+    def __init__(self, graph, num_roots=100, seed=None, dp_options=None, num_nodes=None):
+        """
+        Initialize the planner
+        :param graph: the graph
+        :param num_roots: the number of random roots enumerated for the estimates
+        :param seed: the random seed of the roots, None for a random seed
+        :param dp_options: the options DPGraphletCounter will run with, for example batch_size and node_order
+        :param num_nodes: the number of nodes the graph stands for, for example the size of a sample whose isolated
+        nodes were dropped, None for the nodes of the graph
+        """
+        self._graph = graph
+        self._num_nodes = num_nodes or graph.get_num_nodes()
+        self._num_roots = num_roots
+        self._random = random.Random(seed)
+        self._dp_options = dp_options or {}
+
+    def inspect(self):
+        """
+        Describe the graph
+        :return: the map of the number of nodes, edges and modes and of the degree distribution
+        """
+        degrees = sorted(get_undirected_degrees(self._graph).values())
+        num_nodes = len(degrees)
+        return {
+            "num_nodes": num_nodes,
+            "num_edges": self._graph.get_num_edges(),
+            "num_modes": len(self._graph.mode_map),
+            "mean_degree": sum(degrees) / num_nodes if num_nodes else 0,
+            "median_degree": degrees[num_nodes // 2] if num_nodes else 0,
+            "p99_degree": degrees[min(int(0.99 * num_nodes), num_nodes - 1)] if num_nodes else 0,
+            "max_degree": degrees[-1] if num_nodes else 0,
+        }
+
+    def estimate(self, graphlet_sizes):
+        """
+        Estimate the number of connected groups and the runtime and peak memory of every counter
+        :param graphlet_sizes: list of graphlet sizes
+        :return: the map with "num_groups" (map of key: group size, value: estimated number of groups),
+        "num_classes" (classes seen in the sampled roots, a lower bound) and "engines" (map of key: counter name,
+        value: (seconds, megabytes))
+        """
+        graphlet_sizes = sorted(set(graphlet_sizes))
+        max_size = graphlet_sizes[-1]
+        num_nodes = self._graph.get_num_nodes()
+        counter = DPGraphletCounter(self._graph, {}, **self._dp_options)
+        roots = self._random.sample(range(num_nodes), min(self._num_roots, num_nodes))
+        group_sums = {size: 0 for size in range(1, max_size + 1)}
+        classes = {size: set() for size in graphlet_sizes}
+        seconds = 0.0
+        for root in roots:
+            start_time = time.perf_counter()
+            levels = counter.get_rooted_node_groups(root, max_size)
+            root_count_maps = counter.count_root_graphlets(root, graphlet_sizes, levels=levels)
+            seconds += time.perf_counter() - start_time
+            for size, nodes_group in levels.items():
+                group_sums[size] += len(nodes_group)
+            for size, count_map in root_count_maps.items():
+                classes[size].update(count_map)
+        scale = num_nodes / len(roots) if roots else 0
+        num_groups = {size: group_sum * scale for size, group_sum in group_sums.items()}
+        num_classes = sum(len(size_classes) for size_classes in classes.values())
+        # the DP holds a level and the level built from it at the same time
+        level_bytes = [num_groups[size] * (sys.getsizeof(tuple(range(size))) + SET_ENTRY_OVERHEAD)
+                       for size in range(1, max_size + 1)]
+        dp_bytes = max(level_bytes[i] + level_bytes[i + 1] for i in range(max_size - 1)) if max_size > 1 \
+            else level_bytes[0]
+        engines = {"DPGraphletCounter": (seconds * scale, (dp_bytes + num_classes * BYTES_PER_CLASS) / (1 << 20))}
+        seconds_per_group = seconds / max(sum(group_sums[size] for size in graphlet_sizes), 1)
+        brute_force = BruteForceGraphletCounter(self._graph, {})
+        check_seconds = sum(math.comb(self._num_nodes, size) for size in graphlet_sizes) * \
+            self._time_connectivity_check(brute_force, max_size)
+        engines["BruteForceGraphletCounter"] = (
+            check_seconds + seconds_per_group * sum(num_groups[size] for size in graphlet_sizes),
+            num_classes * BYTES_PER_CLASS / (1 << 20))
+        return {"num_groups": num_groups, "num_classes": num_classes, "engines": engines}
+
+    def _time_connectivity_check(self, brute_force, graphlet_size):
+        """
+        Time the connectivity check of random node combinations
+        :param brute_force: the brute force counter
+        :param graphlet_size: the size of the combinations
+        :return: the seconds per combination
+        """
+        num_nodes = self._graph.get_num_nodes()
+        if num_nodes < graphlet_size:
+            return 0.0
+        combinations = [tuple(sorted(self._random.sample(range(num_nodes), graphlet_size)))
+                        for _ in range(NUM_TIMED_COMBINATIONS)]
+        start_time = time.perf_counter()
+        for combination in combinations:
+            brute_force._check_valid_combination(combination)
+        return (time.perf_counter() - start_time) / NUM_TIMED_COMBINATIONS
+
+    def plan(self, graphlet_sizes, time_budget_seconds, memory_budget_mb, num_of_runs=1, num_of_samples=1,
+             options=None):
+        """
+        Pick the counter and sampling settings
+        The fastest counter fitting both budgets over all runs is picked, only DPGraphletCounter if a DP only option
+        is set. Otherwise the DP counts uniform samples of the largest size that fits.
+        :param graphlet_sizes: list of graphlet sizes
+        :param time_budget_seconds: the seconds all runs may take
+        :param memory_budget_mb: the megabytes a run may use
+        :param num_of_runs: the number of censuses of the planned graph, for example one per markov graph
+        :param num_of_samples: the number of samples counted per census if sampling is needed
+        :param options: the map of key: census option, value: its setting; the options of DP_ONLY_OPTIONS that are
+        set restrict the counters to DPGraphletCounter
+        :return: the map with "algorithm_to_use", "use_sampling", "sample_size" and the "estimate" it is based on
+        """
+        estimate = self.estimate(graphlet_sizes)
+        for engine, (seconds, megabytes) in estimate["engines"].items():
+            logger.info("Estimated %s: %.1f seconds, %.1f MB", engine, seconds, megabytes)
+        dp_only_options = [option for option in DP_ONLY_OPTIONS if (options or {}).get(option)]
+        if dp_only_options:
+            logger.info("Only DPGraphletCounter supports %s", ", ".join(dp_only_options))
+        fitting = [(seconds, engine) for engine, (seconds, megabytes) in estimate["engines"].items()
+                   if (not dp_only_options or engine == "DPGraphletCounter") and
+                   seconds * num_of_runs <= time_budget_seconds and megabytes <= memory_budget_mb]
+        plan = {"algorithm_to_use": "DPGraphletCounter", "use_sampling": False, "sample_size": None,
+                "estimate": estimate}
+        if fitting:
+            plan["algorithm_to_use"] = min(fitting)[1]
+        else:
+            # the cost of the DP grows with the number of groups, which a sample scales by p_k
+            seconds, megabytes = estimate["engines"]["DPGraphletCounter"]
+            share = min(time_budget_seconds / max(seconds * num_of_runs * num_of_samples, 1e-9),
+                        memory_budget_mb / max(megabytes, 1e-9))
+            plan["use_sampling"] = True
+            plan["sample_size"] = self._get_sample_size(max(graphlet_sizes), share)
+        logger.info("Planned %s%s", plan["algorithm_to_use"],
+                    " on samples of {} nodes".format(plan["sample_size"]) if plan["use_sampling"] else "")
+        return plan
+
+    def _get_sample_size(self, graphlet_size, share):
+        """
+        Find the largest sample size keeping the expected share of the groups within a bound, by bisection
+        :param graphlet_size: the size of the largest groups
+        :param share: the largest share of the groups a sample may keep
+        :return: the sample size, at least the graphlet size
+        """
+        num_nodes = self._num_nodes
+        low, high = graphlet_size, num_nodes
+        while low < high:
+            middle = (low + high + 1) // 2
+            if SampledCountMoments.inclusion_probability(num_nodes, middle, graphlet_size) <= share:
+                low = middle
+            else:
+                high = middle - 1
+        return low
@@ -1,3 +1,15 @@
 # export Graph, Node, Graphlet
+# export SharedGraph
+# export BatchClassifier
+# export ContainmentMatrix
+# export ConfigurationModel
+# export get_node_order, NODE_ORDERINGS
+# export Sampler, UniformSampler, SnowballSampler, ForestFireSampler, RandomWalkSampler
 
 from graph.graph import Graph, Node, Graphlet
+from graph.shared_graph import SharedGraph
+from graph.sampler import Sampler, UniformSampler, SnowballSampler, ForestFireSampler, RandomWalkSampler
+from graph.batch_classifier import BatchClassifier
+from graph.containment import ContainmentMatrix
+from graph.null_model import ConfigurationModel
+from graph.ordering import get_node_order, NODE_ORDERINGS
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class BatchClassifier:
+    """
+    Classifies many node groups of the same size at once with numpy
+    The induced edges of a batch are gathered into an (N x k x k x modes) tensor and every group gets the
+    same invariant as Graphlet.node_edge_degree_hash: each node is described by the sorted multiset of its
+    per-mode in and out edges to every node of the group (self loops included), and the group by the sorted
+    multiset of its node descriptions.
+    Class ids are stable until the class is forgotten, so batches can be classified independently; a forgotten
+    class gets a new id when it is seen again.
+    """
+
+    def __init__(self, graph):
+        """
+        Initialize the classifier
+        :param graph: the graph
+        """
+        self._graph = graph
+        self._node_names = sorted(graph.get_nodes())
+        self._node_index_map = {node_name: i for i, node_name in enumerate(self._node_names)}
+        self._num_modes = len(graph.mode_map)
+        num_nodes = len(self._node_names)
+        # per mode sorted keys (source index * number of nodes + target index) of the directed edges
+        mode_keys = [[] for _ in range(self._num_modes)]
+        for source, target, mode in graph.get_edges():
+            mode_keys[graph.mode_map[mode]].append(self._node_index_map[source] * num_nodes +
+                                                   self._node_index_map[target])
+        self._mode_keys = [np.unique(np.array(keys, dtype=np.int64)) for keys in mode_keys]
+        # map of key: invariant bytes, value: class id
+        self._class_ids = {}
+        # maps of key: class id, value: invariant bytes and node indexes of the first group seen of the class
+        self._class_keys = {}
+        self._class_examples = {}
+        self._next_class_id = 0
+
+    @property
+    def num_classes(self):
+        return len(self._class_examples)
+
+    def forget(self, class_id):
+        """
+        Drop the invariant and example of a class, so the classifier only keeps the classes still in use
+        :param class_id: the class id
+        :return: None
+        """
+        del self._class_ids[self._class_keys.pop(class_id)], self._class_examples[class_id]
+
+    def get_node_indexes(self, node_groups):
+        """
+        Convert node groups of node names to an array of node indexes
+        :param node_groups: list of node name tuples of the same size
+        :return: (N x k) int64 array
+        """
+        return np.array([[self._node_index_map[node_name] for node_name in node_group] for node_group in node_groups],
+                        dtype=np.int64)
+
+    def get_class_example(self, class_id):
+        """
+        Get the node names of the first group classified with a class id
+        :param class_id: the class id
+        :return: list of node names
+        """
+        return [self._node_names[i] for i in self._class_examples[class_id]]
+
+    def get_adjacency_tensor(self, groups):
+        """
+        Gather the induced directed edges of every group
+        :param groups: (N x k) array of node indexes
+        :return: (N x k x k x modes) bool array, [n, i, j, m] is True if node i has an edge of mode m to node j
+        """
+        keys = groups[:, :, None] * len(self._node_names) + groups[:, None, :]
+        tensor = np.zeros(keys.shape + (self._num_modes,), dtype=bool)
+        for mode_index, mode_keys in enumerate(self._mode_keys):
+            if len(mode_keys) == 0:
+                continue
+            positions = np.minimum(np.searchsorted(mode_keys, keys), len(mode_keys) - 1)
+            tensor[..., mode_index] = mode_keys[positions] == keys
+        return tensor
+
+    def get_invariants(self, tensor):
+        """
+        Compute the class invariant of every group
+        :param tensor: (N x k x k x modes) adjacency tensor
+        :return: (unique node descriptions, (N x k) sorted node description ids per group)
+        """
+        num_groups, k = tensor.shape[:2]
+        weights = 1 << np.arange(self._num_modes, dtype=np.int64)
+        out_codes = (tensor * weights).sum(axis=3)
+        # code of the pair (i, j) seen from node i: out edges in the low bits, in edges in the next bits
+        pair_codes = out_codes + (out_codes.transpose(0, 2, 1) << self._num_modes)
+        # the pair of a node with itself holds its self loops and is flagged so it is never mixed up with a pair
+        # of two nodes with edges both ways
+        pair_codes[:, np.arange(k), np.arange(k)] += 1 << (2 * self._num_modes)
+        node_descriptions = np.sort(pair_codes, axis=2).reshape(num_groups * k, k)
+        # np.unique orders the descriptions, so sorting their ids sorts the descriptions of every group
+        unique_descriptions, description_ids = np.unique(node_descriptions, axis=0, return_inverse=True)
+        return unique_descriptions, np.sort(description_ids.reshape(num_groups, k), axis=1)
+
+    def classify(self, groups):
+        """
+        Classify a batch of node groups
+        :param groups: (N x k) array of node indexes, or a list of node name tuples
+        :return: (N,) int64 array of class ids
+        """
+        if not isinstance(groups, np.ndarray):
+            groups = self.get_node_indexes(groups)
+        if len(groups) == 0:
+            return np.zeros(0, dtype=np.int64)
+        unique_descriptions, group_codes = self.get_invariants(self.get_adjacency_tensor(groups))
+        unique_codes, first_indexes, code_ids = np.unique(group_codes, axis=0, return_index=True,
+                                                          return_inverse=True)
+        class_ids = np.empty(len(unique_codes), dtype=np.int64)
+        for code_id, code in enumerate(unique_codes):
+            key = unique_descriptions[code].tobytes()
+            if key not in self._class_ids:
+                self._class_ids[key] = self._next_class_id
+                self._class_keys[self._next_class_id] = key
+                self._class_examples[self._next_class_id] = groups[first_indexes[code_id]].tolist()
+                self._next_class_id += 1
+            class_ids[code_id] = self._class_ids[key]
+        return class_ids[code_ids.reshape(-1)]
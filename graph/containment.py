@@ -0,0 +1,230 @@
+import itertools
+
+import numpy as np
+
+from graph.batch_classifier import BatchClassifier
+from graph.graph import Graph, Graphlet
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("containment")
+
+# connecting edge subsets of an induced class classified at most, the batch tensor of the subsets takes one byte
+# per subset, ordered node pair and mode
+MAX_EDGE_SUBSETS = 1 << 20
+
+
+class ContainmentMatrix:
+    """
+    Turns induced graphlet counts into non-induced (subgraph occurrence) counts
+    A non-induced occurrence of a graphlet H is a group of k nodes with a subset of its edges that connects
+    the group and forms H. Every occurrence lies in exactly one induced group, so the non-induced count of H is
+    sum over induced classes G of count(G) * M[G, H], where M[G, H] is the number of connecting edge subsets
+    of G that form H. The rows of M are computed once per induced class and cached, with the subsets of a class
+    classified together by the batch invariant, so the transform of a census is one sparse matrix product.
+    """
+
+    def __init__(self, mode_map):
+        """
+        Initialize the matrix
+        :param mode_map: the map of key: edge mode, value: mode index of the counted graph, to hash the edge
+        subsets like the induced graphlets
+        """
+        self._modes = sorted(mode_map, key=mode_map.get)
+        self._mode_map = mode_map
+        # edge subsets are classified in one batch per induced class, on a graph without edges with the same modes
+        mode_graph = Graph()
+        for mode in self._modes:
+            mode_graph.register_mode(mode)
+        self._batch_classifier = BatchClassifier(mode_graph)
+        # map of key: induced graphlet hash, value: map of key: contained graphlet hash, value: number of subsets
+        self._rows = {}
+        # map of key: batch invariant bytes, value: graphlet hash, the graphlet is only hashed once per invariant
+        self._invariant_hashes = {}
+        # map of key: contained graphlet hash, value: graphlet with the edges of the first subset of the class
+        self._graphlets = {}
+
+    def get_row(self, graphlet, hash_key=None):
+        """
+        Get the contained graphlets of an induced graphlet, computed on first use
+        :param graphlet: the induced graphlet
+        :param hash_key: the hash of the graphlet if known, computed otherwise
+        :return: the map of key: contained graphlet hash, value: number of connecting edge subsets forming it
+        """
+        hash_key = hash(graphlet) if hash_key is None else hash_key
+        if hash_key in self._rows:
+            return self._rows[hash_key]
+        node_names = [node.name for node in graphlet.nodes]
+        positions = {node_name: i for i, node_name in enumerate(node_names)}
+        edges = [(node.name, target_name, mode) for node in graphlet.nodes for mode, targets in node.edges.items()
+                 for target_name in targets if target_name in positions]
+        subsets = list(self._get_connecting_edge_subsets(node_names, edges))
+        # (S x k x k x modes) adjacency tensor of the subsets
+        edge_array = np.array([(positions[source_name], positions[target_name], self._mode_map[mode])
+                               for source_name, target_name, mode in edges], dtype=np.int64).reshape(-1, 3)
+        subset_ids = np.repeat(np.arange(len(subsets)), [len(subset) for subset in subsets])
+        edge_ids = np.fromiter(itertools.chain.from_iterable(subsets), dtype=np.int64, count=len(subset_ids))
+        tensor = np.zeros((len(subsets), len(node_names), len(node_names), len(self._modes)), dtype=bool)
+        tensor[subset_ids, edge_array[edge_ids, 0], edge_array[edge_ids, 1], edge_array[edge_ids, 2]] = True
+        unique_descriptions, subset_codes = self._batch_classifier.get_invariants(tensor)
+        unique_codes, first_indexes, counts = np.unique(subset_codes, axis=0, return_index=True, return_counts=True)
+        row = {}
+        for code, first_index, count in zip(unique_codes, first_indexes.tolist(), counts.tolist()):
+            key = unique_descriptions[code].tobytes()
+            if key not in self._invariant_hashes:
+                sub_graphlet = self._create_graphlet([edges[i] for i in subsets[first_index]])
+                self._invariant_hashes[key] = hash(sub_graphlet)
+                self._graphlets.setdefault(self._invariant_hashes[key], sub_graphlet)
+            sub_hash_key = self._invariant_hashes[key]
+            row[sub_hash_key] = row.get(sub_hash_key, 0) + count
+        self._rows[hash_key] = row
+        return row
+
+    def _get_connecting_edge_subsets(self, node_names, edges):
+        """
+        Generate the edge subsets of a graphlet that connect all of its nodes
+        Edges are grouped by node pair: a connecting subset of pairs is combined with every non empty subset of
+        the edges of each chosen pair and every subset of the self loops. The pair subsets are built by deciding
+        the pairs in order and only leaving out a pair if the chosen and undecided pairs still connect the nodes,
+        so every branch ends in a connecting subset and disconnected subsets are never tried.
+        :param node_names: the node names of the graphlet
+        :param edges: list of (source name, target name, mode) edges of the graphlet
+        :return: generator of lists of edge indexes
+        """
+        pair_edges, loops = {}, []
+        for i, (source_name, target_name, _) in enumerate(edges):
+            if source_name == target_name:
+                loops.append(i)
+            else:
+                pair_edges.setdefault(tuple(sorted((source_name, target_name))), []).append(i)
+        pairs = sorted(pair_edges)
+        num_subsets = self._count_connecting_edge_subsets(node_names, pair_edges) << len(loops)
+        if num_subsets > MAX_EDGE_SUBSETS:
+            raise ValueError("The graphlet {} has {} connecting edge subsets, more than {}, non-induced counts are "
+                             "limited to smaller or sparser graphlets".format(node_names, num_subsets,
+                                                                              MAX_EDGE_SUBSETS))
+        if num_subsets == 0:
+            return
+        loop_subsets = [list(subset) for size in range(len(loops) + 1)
+                        for subset in itertools.combinations(loops, size)]
+        for chosen_pairs in self._get_connecting_pair_subsets(node_names, pairs, [], 0):
+            edge_choices = [[list(subset) for size in range(1, len(pair_edges[pair]) + 1)
+                             for subset in itertools.combinations(pair_edges[pair], size)]
+                            for pair in chosen_pairs]
+            for chosen_edges in itertools.product(*edge_choices):
+                edge_ids = [i for pair_subset in chosen_edges for i in pair_subset]
+                for loop_subset in loop_subsets:
+                    yield edge_ids + loop_subset
+
+    @staticmethod
+    def _count_connecting_edge_subsets(node_names, pair_edges):
+        """
+        Count the edge subsets without self loops that connect all nodes, without generating them
+        Over the node sets S, all(S) = prod over the pairs in S of 2^(edges of the pair) counts every edge subset
+        of S, and the connecting ones are all(S) minus the subsets whose component of the first node of S is a
+        smaller set T: conn(S) = all(S) - sum over T of conn(T) * all(S - T), which takes 3^k steps
+        :param node_names: the node names
+        :param pair_edges: the map of key: node pair, value: list of the edge indexes between the pair
+        :return: the number of connecting edge subsets
+        """
+        positions = {node_name: i for i, node_name in enumerate(node_names)}
+        pair_masks = [((1 << positions[first]) | (1 << positions[second]), len(edge_ids))
+                      for (first, second), edge_ids in pair_edges.items()]
+        num_sets = 1 << len(node_names)
+        all_subsets = [1 << sum(num_edges for pair_mask, num_edges in pair_masks if pair_mask & node_set == pair_mask)
+                       for node_set in range(num_sets)]
+        connecting_subsets = [0] * num_sets
+        for node_set in range(1, num_sets):
+            first_node = node_set & -node_set
+            num_subsets = all_subsets[node_set]
+            # every proper subset of the set holding its first node is the component of the first node
+            rest = node_set ^ first_node
+            part = rest
+            while part:
+                part = (part - 1) & rest
+                component = part | first_node
+                num_subsets -= connecting_subsets[component] * all_subsets[node_set ^ component]
+            connecting_subsets[node_set] = num_subsets
+        return connecting_subsets[num_sets - 1]
+
+    def _get_connecting_pair_subsets(self, node_names, pairs, chosen_pairs, index):
+        """
+        Generate the subsets of node pairs that connect all nodes, given the pairs chosen before an index
+        :param node_names: the node names
+        :param pairs: sorted list of all node pairs, connecting the nodes
+        :param chosen_pairs: the pairs chosen of the pairs before the index
+        :param index: the index of the next pair to decide
+        :return: generator of lists of node pairs
+        """
+        if index == len(pairs):
+            yield list(chosen_pairs)
+            return
+        chosen_pairs.append(pairs[index])
+        yield from self._get_connecting_pair_subsets(node_names, pairs, chosen_pairs, index + 1)
+        chosen_pairs.pop()
+        if self._connects(node_names, chosen_pairs + pairs[index + 1:]):
+            yield from self._get_connecting_pair_subsets(node_names, pairs, chosen_pairs, index + 1)
+
+    @staticmethod
+    def _connects(node_names, pairs):
+        """
+        Check if node pairs connect all nodes
+        :param node_names: the node names
+        :param pairs: list of node name pairs
+        :return: True if the nodes form one component
+        """
+        neighbors = {node_name: [] for node_name in node_names}
+        for first, second in pairs:
+            neighbors[first].append(second)
+            neighbors[second].append(first)
+        seen = {node_names[0]}
+        stack = [node_names[0]]
+        while stack:
+            for neighbor in neighbors[stack.pop()]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return len(seen) == len(node_names)
+
+    def _create_graphlet(self, edges):
+        """
+        Create the graphlet of an edge subset on a graph of its own, with the mode indexes of the counted graph
+        :param edges: list of (source name, target name, mode) edges connecting the nodes
+        :return: the graphlet
+        """
+        graph = Graph()
+        for mode in self._modes:
+            graph.register_mode(mode)
+        for source_name, target_name, mode in edges:
+            graph.add_edge(source_name, target_name, mode)
+        return Graphlet([graph.get_node(node_name) for node_name in sorted(graph.get_nodes())], graph)
+
+    def transform(self, graphlet_map, skipped_keys=None):
+        """
+        Turn induced counts into non-induced counts
+        An induced class with too many connecting edge subsets is left out with a warning, so the non-induced
+        counts miss the occurrences inside its groups
+        :param graphlet_map: the map of key: graphlet hash, value: (graphlet, induced count)
+        :param skipped_keys: if set, the list the hashes of the left out induced classes are appended to
+        :return: the map of key: graphlet hash, value: (graphlet, non-induced count), sorted by count descending
+        """
+        induced_keys, rows = [], []
+        for hash_key, (graphlet, _) in graphlet_map.items():
+            try:
+                rows.append(self.get_row(graphlet, hash_key))
+            except ValueError as error:
+                logger.warning("Leaving graphlet %s out of the non-induced counts: %s", hash_key, error)
+                if skipped_keys is not None:
+                    skipped_keys.append(hash_key)
+                continue
+            induced_keys.append(hash_key)
+        column_keys = sorted({sub_hash_key for row in rows for sub_hash_key in row})
+        column_indexes = {sub_hash_key: i for i, sub_hash_key in enumerate(column_keys)}
+        # the matrix is sparse, so it is kept as (row, column, value) arrays and the product is a weighted bincount
+        row_indexes = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+        column_ids = np.array([column_indexes[sub_hash_key] for row in rows for sub_hash_key in row], dtype=np.int64)
+        values = np.array([num_subsets for row in rows for num_subsets in row.values()], dtype=float)
+        induced_counts = np.array([graphlet_map[hash_key][1] for hash_key in induced_keys], dtype=float)
+        counts = np.bincount(column_ids, weights=values * induced_counts[row_indexes], minlength=len(column_keys))
+        non_induced_map = {sub_hash_key: (self._graphlets[sub_hash_key], count.item())
+                           for sub_hash_key, count in zip(column_keys, counts)}
+        return {k: v for k, v in sorted(non_induced_map.items(), key=lambda item: item[1][1], reverse=True)}
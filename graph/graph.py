@@ -8,6 +8,8 @@ from functools import cmp_to_key
 import hashlib
 import matplotlib.pyplot as plt
 
+from graph.sampler import UniformSampler
+
 
 def custom_sort(a, b):
     """
@@ -424,6 +426,7 @@ class Graph:
         """
         self.__graph_dict = {}
         self.__visual_graph = None
+        self.__adjacency_arrays = None
         self._mode_map = {}
         self._current_mode_count = 0
 
@@ -450,6 +453,15 @@ class Graph:
         node1.add_edge(node2, node2_name, mode)
         node1.add_undirected_edge(node2, node2_name)
         node2.add_undirected_edge(node1, node1_name)
+        self.register_mode(mode)
+        self.__adjacency_arrays = None
+
+    def register_mode(self, mode):
+        """
+        Register an edge mode in the graph, modes are indexed in the order they are registered
+        :param mode: mode of the edge
+        :return: None
+        """
         if mode not in self._mode_map:
             self._mode_map[mode] = self._current_mode_count
             self._current_mode_count += 1
@@ -518,6 +530,9 @@ class Graph:
 
     def get_new_graph(self, mode_color_map, edges):
         new_graph = Graph()
+        # keep the mode indexes of this graph so graphlet hashes stay comparable between the graphs
+        for mode in sorted(self._mode_map, key=self._mode_map.get):
+            new_graph.register_mode(mode)
         for edge in edges:
             new_graph.add_edge(edge[0], edge[1], edge[2])
         new_graph.init_visualization(mode_color_map)
@@ -552,14 +567,31 @@ class Graph:
             steps -= 1
         return self.get_new_graph(self._mode_map, edges)
 
-    def sample(self, num_nodes):
+    def get_adjacency_arrays(self):
+        """
+        Get the undirected adjacency as index arrays for fast traversal, built on first use
+        :return: (list of node names, list of neighbor index lists without self loops)
+        """
+        if self.__adjacency_arrays is None:
+            names = list(self.__graph_dict.keys())
+            index_map = {name: i for i, name in enumerate(names)}
+            adjacency = [[index_map[neighbor_name] for neighbor_name in self.__graph_dict[name].undirected_edges
+                          if neighbor_name != name] for name in names]
+            self.__adjacency_arrays = (names, adjacency)
+        return self.__adjacency_arrays
+
+    def sample(self, num_nodes, sampler=None):
         """
         Sample the graph
         :param num_nodes: number of nodes to sample
-        :return: new graph
-        """
-        nodes = self.get_nodes()
-        sampled_nodes = set(random.sample(nodes, num_nodes))
+        :param sampler: the sampler picking the nodes, None for uniform sampling
+        :return: new graph induced by the sampled nodes
+        """
+        if num_nodes > self.get_num_nodes():
+            raise ValueError("Cannot sample {} nodes from a graph of {} nodes".format(num_nodes,
+                                                                                      self.get_num_nodes()))
+        sampler = sampler or UniformSampler()
+        sampled_nodes = sampler.sample_nodes(self, num_nodes)
         edges = self.get_edges()
         sampled_edges = []
         for edge in edges:
@@ -567,6 +599,30 @@ class Graph:
                 sampled_edges.append(edge)
         return self.get_new_graph(self._mode_map, sampled_edges)
 
+    def get_ego_network(self, node_name, radius=1):
+        """
+        Get the induced subgraph of all nodes within a radius of a node
+        :param node_name: name of the center node
+        :param radius: maximum number of undirected hops from the center node
+        :return: new graph
+        """
+        ego_nodes = {node_name}
+        frontier = [self.get_node(node_name)]
+        for _ in range(radius):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in node.get_undirected_neighbors():
+                    if neighbor.name not in ego_nodes:
+                        ego_nodes.add(neighbor.name)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        ego_edges = []
+        for name in ego_nodes:
+            for edge in self.get_node(name).get_edges():
+                if edge[1] in ego_nodes:
+                    ego_edges.append(edge)
+        return self.get_new_graph(self._mode_map, ego_edges)
+
     @property
     def mode_map(self):
         """
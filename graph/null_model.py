@@ -0,0 +1,97 @@
+import numpy as np
+
+# rounds of re-matching rejected edges before a mode is given up as unsatisfiable
+MAX_REPAIR_ROUNDS = 1000
+
+
+class ConfigurationModel:
+    """
+    Directed random graphs with the in and out degrees of every node in every mode of a graph
+    Every mode is sampled on its own like a configuration model: the targets of its edges (the in stubs) are
+    randomly permuted against the sources (the out stubs), one numpy permutation per mode, which keeps every
+    degree. Matches forming a self loop or repeating an edge of the mode are repaired instead of redrawing the
+    whole matching, which is almost never simple with hubs: the targets of the rejected edges are permuted again
+    together with as many random edges until none is left. The repair keeps the degrees, but it is not uniform
+    over the simple graphs: the edges at hubs are rejected and redrawn most often, so the matchings around hubs
+    are not drawn with equal probability.
+    Self loops of the graph are kept as they are, like Graph.mutate_graph does. Every graph is drawn from the
+    original graph, so unlike markov chains the null models are independent.
+    """
+
+    def __init__(self, graph, seed=None):
+        """
+        Initialize the model
+        :param graph: the graph whose degrees are kept
+        :param seed: the random seed, None for a random seed
+        """
+        self._graph = graph
+        self._random = np.random.default_rng(seed)
+        self._node_names = list(graph.get_nodes())
+        node_indexes = {node_name: i for i, node_name in enumerate(self._node_names)}
+        self._self_loops = []
+        # map of key: mode, value: (source indexes, target indexes) of the edges that are not self loops
+        self._mode_edges = {}
+        mode_sources, mode_targets = {}, {}
+        for source_name, target_name, mode in graph.get_edges():
+            if source_name == target_name:
+                self._self_loops.append((source_name, target_name, mode))
+                continue
+            mode_sources.setdefault(mode, []).append(node_indexes[source_name])
+            mode_targets.setdefault(mode, []).append(node_indexes[target_name])
+        for mode in mode_sources:
+            self._mode_edges[mode] = (np.array(mode_sources[mode], dtype=np.int64),
+                                      np.array(mode_targets[mode], dtype=np.int64))
+
+    def sample(self):
+        """
+        Draw a random graph
+        :return: the new graph, with the mode indexes of the graph
+        """
+        edges = list(self._self_loops)
+        for mode, (sources, targets) in self._mode_edges.items():
+            targets = self._match_targets(sources, targets, mode)
+            edges.extend(zip([self._node_names[i] for i in sources], [self._node_names[i] for i in targets],
+                             [mode] * len(sources)))
+        return self._graph.get_new_graph(self._graph.mode_map, edges)
+
+    def generate(self, num_graphs):
+        """
+        Draw independent random graphs
+        :param num_graphs: the number of graphs
+        :return: generator of new graphs
+        """
+        for _ in range(num_graphs):
+            yield self.sample()
+
+    def _match_targets(self, sources, targets, mode):
+        """
+        Randomly match the targets of the edges of a mode to their sources, repairing the rejected matches
+        :param sources: the source indexes of the edges
+        :param targets: the target indexes of the edges
+        :param mode: the mode, for the error message
+        :return: the permuted target indexes, no edge is a self loop or repeated
+        """
+        targets = self._random.permutation(targets)
+        for _ in range(MAX_REPAIR_ROUNDS):
+            rejected = self._get_rejected_edges(sources, targets)
+            if len(rejected) == 0:
+                return targets
+            # permuting the targets of a set of edges keeps the in degrees
+            partners = self._random.choice(len(targets), size=min(len(rejected), len(targets)), replace=False)
+            indexes = np.union1d(rejected, partners)
+            targets[indexes] = targets[self._random.permutation(indexes)]
+        raise ValueError("Could not sample edges of mode {} without self loops or repeated edges".format(mode))
+
+    def _get_rejected_edges(self, sources, targets):
+        """
+        Find the edges that are self loops or repeat an earlier edge
+        :param sources: the source indexes of the edges
+        :param targets: the target indexes of the edges
+        :return: the array of rejected edge indexes
+        """
+        keys = sources * len(self._node_names) + targets
+        _, first_indexes = np.unique(keys, return_index=True)
+        kept = np.zeros(len(keys), dtype=bool)
+        kept[first_indexes] = True
+        kept &= sources != targets
+        return np.flatnonzero(~kept)
@@ -0,0 +1,110 @@
+from collections import deque
+
+# names of the node orderings accepted by get_node_order
+NODE_ORDERINGS = ("name", "degree", "degeneracy", "rcm")
+
+
+def get_undirected_degrees(graph):
+    """
+    Get the undirected degree of every node, self loops are not counted
+    :param graph: the graph
+    :return: the map of key: node name, value: degree
+    """
+    degrees = {}
+    for node_name in graph.get_nodes():
+        undirected_edges = graph.get_node(node_name).undirected_edges
+        degrees[node_name] = len(undirected_edges) - (1 if node_name in undirected_edges else 0)
+    return degrees
+
+
+def get_node_order(graph, ordering="name"):
+    """
+    Order the nodes of a graph
+    :param graph: the graph
+    :param ordering: "name", "degree", "degeneracy" or "rcm" (reverse Cuthill-McKee), None for "name"
+    :return: list of node names, the position of a node is its rank
+    """
+    ordering = ordering or "name"
+    if ordering == "name":
+        return sorted(graph.get_nodes())
+    if ordering == "degree":
+        return degree_order(graph)
+    if ordering == "degeneracy":
+        return degeneracy_order(graph)
+    if ordering == "rcm":
+        return reverse_cuthill_mckee_order(graph)
+    raise ValueError("Unknown node ordering: {}, use one of {}".format(ordering, ", ".join(NODE_ORDERINGS)))
+
+
+def degree_order(graph):
+    """
+    Order the nodes by increasing undirected degree, ties broken by name, so hubs come last
+    :param graph: the graph
+    :return: list of node names
+    """
+    degrees = get_undirected_degrees(graph)
+    return sorted(degrees, key=lambda node_name: (degrees[node_name], node_name))
+
+
+def degeneracy_order(graph):
+    """
+    Order the nodes by repeatedly removing a node of minimum remaining degree, so the nodes of the densest
+    cores come last and every node has at most degeneracy neighbors after it
+    :param graph: the graph
+    :return: list of node names
+    """
+    degrees = get_undirected_degrees(graph)
+    max_degree = max(degrees.values(), default=0)
+    # bucket queue (Matula-Beck): a node whose degree drops is pushed onto its new bucket and its old entry left
+    # behind, stale entries are skipped when popped, so every pop and move is O(1) amortized
+    buckets = [[] for _ in range(max_degree + 1)]
+    for node_name in sorted(degrees, reverse=True):
+        buckets[degrees[node_name]].append(node_name)
+    order = []
+    removed = set()
+    degree = 0
+    while len(order) < len(degrees):
+        # removing a node lowers the degree of its neighbors by one at most, so the minimum drops by one at most
+        degree = max(degree - 1, 0)
+        node_name = None
+        while node_name is None:
+            while not buckets[degree]:
+                degree += 1
+            node_name = buckets[degree].pop()
+            if node_name in removed or degrees[node_name] != degree:
+                node_name = None
+        removed.add(node_name)
+        order.append(node_name)
+        for neighbor_name in graph.get_node(node_name).undirected_edges:
+            if neighbor_name not in removed:
+                degrees[neighbor_name] -= 1
+                buckets[degrees[neighbor_name]].append(neighbor_name)
+    return order
+
+
+def reverse_cuthill_mckee_order(graph):
+    """
+    Order the nodes by the reverse Cuthill-McKee algorithm: breadth first search from a node of minimum degree
+    of every component, visiting neighbors by increasing degree, reversed
+    Neighbors get close ranks, which keeps the node groups of a region of the graph close together
+    :param graph: the graph
+    :return: list of node names
+    """
+    degrees = get_undirected_degrees(graph)
+    order = []
+    visited = set()
+    for start in sorted(degrees, key=lambda node_name: (degrees[node_name], node_name)):
+        if start in visited:
+            continue
+        visited.add(start)
+        queue = deque([start])
+        while queue:
+            node_name = queue.popleft()
+            order.append(node_name)
+            neighbors = [neighbor_name for neighbor_name in graph.get_node(node_name).undirected_edges
+                         if neighbor_name not in visited]
+            for neighbor_name in sorted(neighbors, key=lambda name: (degrees[name], name)):
+                visited.add(neighbor_name)
+                queue.append(neighbor_name)
+    order.reverse()
+    return order
@@ -0,0 +1,188 @@
+import random
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class Sampler(ABC):
+    """
+    Base class for node samplers used by Graph.sample
+    A sampler picks the node names of a sample, the sample graph is the subgraph induced by them
+    """
+
+    def __init__(self, seed=None, num_estimation_runs=100):
+        """
+        Initialize the sampler
+        :param seed: the random seed, None for a random seed
+        :param num_estimation_runs: the number of samples drawn to estimate inclusion probabilities
+        """
+        self._random = random.Random(seed)
+        self._num_estimation_runs = num_estimation_runs
+        # map of key: (graph id, sample size), value: inclusion probabilities
+        self._inclusion_probability_cache = {}
+
+    @abstractmethod
+    def sample_nodes(self, graph, num_nodes):
+        """
+        Sample nodes of the graph
+        :param graph: the graph
+        :param num_nodes: number of nodes to sample
+        :return: set of node names
+        """
+
+    def inclusion_probabilities(self, graph, num_nodes):
+        """
+        Get the probability of every node to be in a sample, needed to correct estimates made on samples
+        Estimated from repeated samples unless the sampler knows them exactly
+        :param graph: the graph
+        :param num_nodes: number of nodes to sample
+        :return: the map of key: node name, value: inclusion probability
+        """
+        key = (id(graph), num_nodes)
+        if key not in self._inclusion_probability_cache:
+            counts = {node_name: 0 for node_name in graph.get_nodes()}
+            for _ in range(self._num_estimation_runs):
+                for node_name in self.sample_nodes(graph, num_nodes):
+                    counts[node_name] += 1
+            self._inclusion_probability_cache[key] = {node_name: count / self._num_estimation_runs
+                                                      for node_name, count in counts.items()}
+        return self._inclusion_probability_cache[key]
+
+    def _random_unvisited(self, num_total, visited):
+        """
+        Pick a random node index not visited yet
+        :param num_total: the number of nodes
+        :param visited: the set of visited node indexes
+        :return: a node index
+        """
+        while True:
+            index = self._random.randrange(num_total)
+            if index not in visited:
+                return index
+
+    @staticmethod
+    def from_config(config):
+        """
+        Create a sampler from the sampler section of the config
+        :param config: map with the sampler type and its parameters, None for uniform sampling
+        :return: the sampler
+        """
+        config = dict(config or {})
+        sampler_type = config.pop("type", "uniform")
+        samplers = {"uniform": UniformSampler, "snowball": SnowballSampler, "forest_fire": ForestFireSampler,
+                    "random_walk": RandomWalkSampler}
+        if sampler_type not in samplers:
+            raise ValueError("Unknown sampler type: {}".format(sampler_type))
+        return samplers[sampler_type](**config)
+
+
+class UniformSampler(Sampler):
+    """
+    Samples nodes uniformly at random
+    """
+
+    def sample_nodes(self, graph, num_nodes):
+        return set(self._random.sample(list(graph.get_nodes()), num_nodes))
+
+    def inclusion_probabilities(self, graph, num_nodes):
+        probability = num_nodes / graph.get_num_nodes()
+        return {node_name: probability for node_name in graph.get_nodes()}
+
+
+class SnowballSampler(Sampler):
+    """
+    Breadth first search from a random node, restarted from another random node when its component runs out
+    """
+
+    def sample_nodes(self, graph, num_nodes):
+        names, adjacency = graph.get_adjacency_arrays()
+        visited = set()
+        while len(visited) < num_nodes:
+            start = self._random_unvisited(len(names), visited)
+            visited.add(start)
+            queue = deque([start])
+            while queue and len(visited) < num_nodes:
+                for neighbor in adjacency[queue.popleft()]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+                        if len(visited) == num_nodes:
+                            break
+        return {names[index] for index in visited}
+
+
+class ForestFireSampler(Sampler):
+    """
+    Forest fire sampling: every burning node sets fire to a geometrically distributed number of its
+    unburnt neighbors, a new fire starts at a random node when the current one dies out
+    """
+
+    def __init__(self, forward_probability=0.7, seed=None, num_estimation_runs=100):
+        """
+        Initialize the sampler
+        :param forward_probability: the burning probability, each node burns on average p / (1 - p) neighbors
+        :param seed: the random seed, None for a random seed
+        :param num_estimation_runs: the number of samples drawn to estimate inclusion probabilities
+        """
+        super().__init__(seed, num_estimation_runs)
+        self._forward_probability = forward_probability
+
+    def sample_nodes(self, graph, num_nodes):
+        names, adjacency = graph.get_adjacency_arrays()
+        burnt = set()
+        while len(burnt) < num_nodes:
+            start = self._random_unvisited(len(names), burnt)
+            burnt.add(start)
+            queue = deque([start])
+            while queue and len(burnt) < num_nodes:
+                unburnt = [neighbor for neighbor in adjacency[queue.popleft()] if neighbor not in burnt]
+                num_to_burn = 0
+                while self._random.random() < self._forward_probability:
+                    num_to_burn += 1
+                for neighbor in self._random.sample(unburnt, min(num_to_burn, len(unburnt),
+                                                                 num_nodes - len(burnt))):
+                    burnt.add(neighbor)
+                    queue.append(neighbor)
+        return {names[index] for index in burnt}
+
+
+class RandomWalkSampler(Sampler):
+    """
+    Random walk with restarts to its start node, the walk jumps to a new random start node when it
+    finds no new nodes for a while
+    """
+
+    def __init__(self, restart_probability=0.15, max_stall_steps=100, seed=None, num_estimation_runs=100):
+        """
+        Initialize the sampler
+        :param restart_probability: the probability to return to the start node at every step
+        :param max_stall_steps: the number of steps without a new node before jumping to a new start node
+        :param seed: the random seed, None for a random seed
+        :param num_estimation_runs: the number of samples drawn to estimate inclusion probabilities
+        """
+        super().__init__(seed, num_estimation_runs)
+        self._restart_probability = restart_probability
+        self._max_stall_steps = max_stall_steps
+
+    def sample_nodes(self, graph, num_nodes):
+        names, adjacency = graph.get_adjacency_arrays()
+        start = self._random.randrange(len(names))
+        visited = {start}
+        current = start
+        stall_steps = 0
+        while len(visited) < num_nodes:
+            if stall_steps > self._max_stall_steps:
+                start = current = self._random_unvisited(len(names), visited)
+                visited.add(start)
+                stall_steps = 0
+                continue
+            neighbors = adjacency[current]
+            if not neighbors or self._random.random() < self._restart_probability:
+                current = start
+            else:
+                current = neighbors[self._random.randrange(len(neighbors))]
+            if current in visited:
+                stall_steps += 1
+            else:
+                visited.add(current)
+                stall_steps = 0
+        return {names[index] for index in visited}
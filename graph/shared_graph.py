@@ -0,0 +1,373 @@
+import mmap
+from array import array
+from multiprocessing import shared_memory
+
+from graph.graph import Graph
+
+# first header value of every shared graph block
+MAGIC = 0x4E435347
+HEADER_SIZE = 8
+INT_SIZE = 8
+
+
+class SharedNode:
+    """
+    Read only node of a shared graph with the same interface as Node
+    The edge maps are built from the flat arrays the first time they are used
+    """
+
+    def __init__(self, shared_graph, index):
+        """
+        Constructor for SharedNode
+        :param shared_graph: the shared graph
+        :param index: the index of the node in the shared graph
+        """
+        self._shared_graph = shared_graph
+        self.index = index
+        self.name = shared_graph.get_node_name(index)
+        self._edges = None
+        self._undirected_edges = None
+
+    @property
+    def edges(self):
+        """
+        Directed edges, keys are the modes of edges, values are maps of neighbor name to neighbor node
+        """
+        if self._edges is None:
+            self._edges = {}
+            for neighbor_index, mode in self._shared_graph.get_directed_neighbors(self.index):
+                neighbor = self._shared_graph.get_node_by_index(neighbor_index)
+                self._edges.setdefault(mode, {})[neighbor.name] = neighbor
+        return self._edges
+
+    @property
+    def undirected_edges(self):
+        """
+        Undirected edges, map of neighbor name to neighbor node
+        """
+        if self._undirected_edges is None:
+            self._undirected_edges = {}
+            for neighbor_index in self._shared_graph.get_undirected_neighbor_indexes(self.index):
+                neighbor = self._shared_graph.get_node_by_index(neighbor_index)
+                self._undirected_edges[neighbor.name] = neighbor
+        return self._undirected_edges
+
+    def get_edges(self):
+        return [(self.name, node_name, mode) for mode, nodes in self.edges.items() for node_name in nodes]
+
+    def get_undirected_edges(self):
+        return [(self.name, node_name) for node_name in self.undirected_edges]
+
+    def get_undirected_neighbors(self):
+        return list(self.undirected_edges.values())
+
+    def get_neighbors(self):
+        return [node for nodes in self.edges.values() for node in nodes.values()]
+
+    def __repr__(self):
+        return "N: " + self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __eq__(self, other):
+        return self.name == other.name
+
+
+class SharedGraph:
+    """
+    Flat, read only copy of a graph in a shared memory block or a memory mapped file
+    Worker processes attach to the block by name (or open the file) without copying or unpickling it,
+    and can run any counter against it since it has the read interface of Graph
+
+    Layout, all integers are int64:
+    header: magic, number of nodes, number of modes, number of undirected entries, number of directed entries,
+            bytes of node names, bytes of mode names, unused
+    node name offsets (nodes + 1), mode name offsets (modes + 1),
+    undirected index pointers (nodes + 1), undirected neighbor indexes,
+    directed index pointers (nodes + 1), directed neighbor indexes, directed edge mode indexes,
+    utf-8 node names, utf-8 mode names
+    Nodes are sorted by name and modes are ordered by their index in the mode map of the graph
+    """
+
+    def __init__(self, buffer, shm=None, file=None, path=None):
+        """
+        Constructor for SharedGraph, use export / attach / open instead
+        :param buffer: the buffer holding the graph
+        :param shm: the shared memory block backing the buffer
+        :param file: the open file backing the buffer
+        :param path: the path of the file backing the buffer
+        """
+        self._shm = shm
+        self._file = file
+        self._path = path
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        header = self._view[:HEADER_SIZE * INT_SIZE].cast('q')
+        if header[0] != MAGIC:
+            raise ValueError("Not a shared graph")
+        num_nodes, num_modes, num_undirected, num_directed, names_size, mode_names_size = header[1:7]
+        header.release()
+        self._arrays = []
+        offset = HEADER_SIZE * INT_SIZE
+        sizes = [num_nodes + 1, num_modes + 1, num_nodes + 1, num_undirected, num_nodes + 1, num_directed,
+                 num_directed]
+        for size in sizes:
+            self._arrays.append(self._view[offset:offset + size * INT_SIZE].cast('q'))
+            offset += size * INT_SIZE
+        (self._name_offsets, mode_name_offsets, self._undirected_indptr, self._undirected_indices,
+         self._directed_indptr, self._directed_indices, self._directed_modes) = self._arrays
+        self._names = self._view[offset:offset + names_size]
+        offset += names_size
+        mode_names = bytes(self._view[offset:offset + mode_names_size])
+        self._modes = [mode_names[mode_name_offsets[i]:mode_name_offsets[i + 1]].decode("utf-8")
+                       for i in range(num_modes)]
+        self._mode_map = {mode: i for i, mode in enumerate(self._modes)}
+        self._num_nodes = num_nodes
+        self._node_index_map = None
+        self._nodes = {}
+
+    @staticmethod
+    def _to_bytes(graph):
+        """
+        Flatten a graph into the shared graph layout
+        :param graph: the graph
+        :return: the bytes of the shared graph
+        """
+        node_names = sorted(graph.get_nodes())
+        node_index_map = {node_name: i for i, node_name in enumerate(node_names)}
+        modes = sorted(graph.mode_map, key=graph.mode_map.get)
+        names, name_offsets = SharedGraph._encode_names(node_names)
+        mode_names, mode_name_offsets = SharedGraph._encode_names(modes)
+        undirected_indptr, undirected_indices = array('q', [0]), array('q')
+        directed_indptr, directed_indices, directed_modes = array('q', [0]), array('q'), array('q')
+        for node_name in node_names:
+            node = graph.get_node(node_name)
+            undirected_indices.extend(sorted(node_index_map[name] for name in node.undirected_edges))
+            undirected_indptr.append(len(undirected_indices))
+            for mode, neighbors in node.edges.items():
+                for neighbor_name in neighbors:
+                    directed_indices.append(node_index_map[neighbor_name])
+                    directed_modes.append(graph.mode_map[mode])
+            directed_indptr.append(len(directed_indices))
+        header = array('q', [MAGIC, len(node_names), len(modes), len(undirected_indices), len(directed_indices),
+                             len(names), len(mode_names), 0])
+        arrays = [header, name_offsets, mode_name_offsets, undirected_indptr, undirected_indices, directed_indptr,
+                  directed_indices, directed_modes]
+        return b"".join(a.tobytes() for a in arrays) + names + mode_names
+
+    @staticmethod
+    def _encode_names(names):
+        """
+        Encode a list of names as utf-8 bytes with the byte offset of every name
+        :param names: list of names
+        :return: (encoded bytes, offsets)
+        """
+        encoded = [name.encode("utf-8") for name in names]
+        offsets = array('q', [0])
+        for name in encoded:
+            offsets.append(offsets[-1] + len(name))
+        return b"".join(encoded), offsets
+
+    @staticmethod
+    def export(graph, name=None):
+        """
+        Export a graph into a new shared memory block
+        The caller owns the block and must call unlink once no process uses it anymore
+        :param graph: the graph
+        :param name: the name of the shared memory block, None for a random name
+        :return: the shared graph
+        """
+        data = SharedGraph._to_bytes(graph)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return SharedGraph(shm.buf, shm=shm)
+
+    @staticmethod
+    def export_to_file(graph, path):
+        """
+        Export a graph into a file that can be memory mapped
+        :param graph: the graph
+        :param path: the path of the file
+        :return: the shared graph mapped from the file
+        """
+        with open(path, "wb") as file:
+            file.write(SharedGraph._to_bytes(graph))
+        return SharedGraph.attach_file(path)
+
+    @staticmethod
+    def attach(name):
+        """
+        Attach to a shared graph exported by another process
+        :param name: the name of the shared memory block
+        :return: the shared graph
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before python 3.13 attaching always registers the block with the resource tracker,
+            # which is shared with the exporting process for its pool workers
+            shm = shared_memory.SharedMemory(name=name)
+        return SharedGraph(shm.buf, shm=shm)
+
+    @staticmethod
+    def attach_file(path):
+        """
+        Memory map a shared graph file
+        :param path: the path of the file
+        :return: the shared graph
+        """
+        file = open(path, "rb")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return SharedGraph(buffer, file=file, path=path)
+
+    @staticmethod
+    def open(descriptor):
+        """
+        Open a shared graph from its descriptor
+        :param descriptor: the descriptor of the shared graph
+        :return: the shared graph
+        """
+        kind, location = descriptor
+        if kind == "shm":
+            return SharedGraph.attach(location)
+        return SharedGraph.attach_file(location)
+
+    @property
+    def descriptor(self):
+        """
+        Picklable description of where the graph lives, pass it to worker processes and open it there
+        :return: ("shm", block name) or ("file", path)
+        """
+        if self._shm is not None:
+            return "shm", self._shm.name
+        return "file", self._path
+
+    def get_node_name(self, index):
+        """
+        Get the name of a node
+        :param index: the index of the node
+        :return: name of the node
+        """
+        return bytes(self._names[self._name_offsets[index]:self._name_offsets[index + 1]]).decode("utf-8")
+
+    def get_node_index(self, node_name):
+        """
+        Get the index of a node
+        :param node_name: name of the node
+        :return: the index of the node
+        """
+        return self._get_node_index_map()[node_name]
+
+    def get_undirected_neighbor_indexes(self, index):
+        """
+        Get the undirected neighbors of a node
+        :param index: the index of the node
+        :return: memoryview of the neighbor indexes
+        """
+        return self._undirected_indices[self._undirected_indptr[index]:self._undirected_indptr[index + 1]]
+
+    def get_directed_neighbors(self, index):
+        """
+        Get the directed out neighbors of a node
+        :param index: the index of the node
+        :return: list of (neighbor index, mode)
+        """
+        start, end = self._directed_indptr[index], self._directed_indptr[index + 1]
+        return [(self._directed_indices[i], self._modes[self._directed_modes[i]]) for i in range(start, end)]
+
+    def get_node_by_index(self, index):
+        """
+        Get a node from the graph
+        :param index: the index of the node
+        :return: the node
+        """
+        if index not in self._nodes:
+            self._nodes[index] = SharedNode(self, index)
+        return self._nodes[index]
+
+    def get_node(self, node_name):
+        """
+        Get a node from the graph
+        :param node_name: name of node
+        :return: the node
+        """
+        return self.get_node_by_index(self.get_node_index(node_name))
+
+    def get_nodes(self):
+        """
+        Get all nodes in the graph
+        :return: list of node names
+        """
+        return self._get_node_index_map().keys()
+
+    def _get_node_index_map(self):
+        """
+        Get the map of node name to node index, built on first use
+        :return: the map of key: node name, value: node index
+        """
+        if self._node_index_map is None:
+            self._node_index_map = {self.get_node_name(i): i for i in range(self._num_nodes)}
+        return self._node_index_map
+
+    def get_edges(self):
+        """
+        Get all edges in the graph
+        :return: list of edges
+        """
+        edges = []
+        for index in range(self._num_nodes):
+            node_name = self.get_node_name(index)
+            for neighbor_index, mode in self.get_directed_neighbors(index):
+                edges.append((node_name, self.get_node_name(neighbor_index), mode))
+        return edges
+
+    @property
+    def mode_map(self):
+        """
+        Get the mode map
+        :return: mode map
+        """
+        return self._mode_map
+
+    def get_num_edges(self):
+        return len(self._directed_indices)
+
+    def get_num_nodes(self):
+        return self._num_nodes
+
+    def to_graph(self):
+        """
+        Copy the shared graph into a regular graph, for example to sample or mutate it
+        :return: the graph
+        """
+        graph = Graph()
+        for mode in self._modes:
+            graph.register_mode(mode)
+        for edge in self.get_edges():
+            graph.add_edge(edge[0], edge[1], edge[2])
+        return graph
+
+    def close(self):
+        """
+        Detach from the shared graph, nodes of the graph must not be used afterwards
+        :return: None
+        """
+        self._nodes = {}
+        for a in self._arrays:
+            a.release()
+        self._names.release()
+        self._view.release()
+        if self._shm is not None:
+            self._shm.close()
+        if self._file is not None:
+            self._buffer.close()
+            self._file.close()
+
+    def unlink(self):
+        """
+        Remove the shared memory block, only the exporting process should call this
+        :return: None
+        """
+        if self._shm is not None:
+            self._shm.unlink()
@@ -2,15 +2,25 @@ import csv
 import argparse
 import json
 import logging
+import math
 import os.path
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from tqdm import tqdm
 
+from algorithm import BruteForceGraphletCounter, DPGraphletCounter
 from algorithm.base import BaseAlgorithm
-from graph import Graph, Graphlet
+from algorithm.mode_constraint import ModeConstraint
+from algorithm.planner import Planner
+from graph import ConfigurationModel, ContainmentMatrix, Graph, Graphlet, Sampler, UniformSampler
+from server import CensusServer, CensusService
+from util.adaptive_stopping import AdaptiveStopping
+from util.census_extras import CensusExtras
 from util.logger_util import LoggerUtil
+from util.sampled_moments import SampledCountMoments
+from util.shard import get_file_checksum, get_shard, merge_partials, write_partial
 
 logger = LoggerUtil.get_logger("main")
 
@@ -25,9 +35,11 @@ def load_data(file_name):
     return data
 
 
-def create_graph(data):
-    # Create the graph
+def create_graph(data, modes=None):
+    # Create the graph, registering the given modes first so their indexes do not depend on the data
     graph = Graph()
+    for mode in modes or []:
+        graph.register_mode(mode)
     for row in data:
         if row[2] != 'unknown':
             graph.add_edge(row[0], row[1], row[2])
@@ -56,24 +68,37 @@ def check_hash_function_collision(graphlet_map):
 
 
 def write_to_file(graphlet_map, file_name, header="Graphlet Key,Frequency"):
+    write_class_table(file_name, ((graphlet_key, graphlet_info[1])
+                                  for graphlet_key, graphlet_info in graphlet_map.items()), header.split(","))
+
+
+def write_class_table(file_name, rows, columns):
+    """
+    Write a csv table, one row per graphlet class or node
+    :param file_name: the name of the file
+    :param rows: iterable of rows, every value is written with str
+    :param columns: the column names
+    :return: None
+    """
     with open(file_name, 'w') as file:
-        file.write(header + "\n")
-        for graphlet_key, graphlet_info in graphlet_map.items():
-            file.write(str(graphlet_key) + "," + str(graphlet_info[1]) + "\n")
+        file.write(",".join(columns) + "\n")
+        for row in rows:
+            file.write(",".join(str(value) for value in row) + "\n")
 
 
-def solve(algorithm, graphlet_size, execution_name):
+def solve(algorithm, graphlet_sizes, execution_name):
     # Solve the problem
     logger.info("Counting graphlets using %s", algorithm.__class__.__name__)
     start_time = time.time()
-    graphlet_map = algorithm.count_graphlets(graphlet_size)
+    graphlet_maps = algorithm.count_graphlets_of_sizes(graphlet_sizes)
     # check_hash_function_collision(graphlet_map)
     logger.info("Time taken: %s seconds", time.time() - start_time)
     algorithm.display_frequent_graphlet_stats(count=10, name=execution_name)
-    logger.info("Number of unique graphlets: %s", len(graphlet_map))
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        logger.info("Number of unique graphlets of size %s: %s", graphlet_size, len(graphlet_map))
     # sort the graphlets by frequency
-    graphlet_map = {k: v for k, v in sorted(graphlet_map.items(), key=lambda item: item[1][1], reverse=True)}
-    return graphlet_map
+    return {graphlet_size: {k: v for k, v in sorted(graphlet_map.items(), key=lambda item: item[1][1], reverse=True)}
+            for graphlet_size, graphlet_map in graphlet_maps.items()}
 
 
 def get_algorithm_class(algorithm_to_use):
@@ -82,45 +107,147 @@ def get_algorithm_class(algorithm_to_use):
     :param algorithm_to_use: the name of the algorithm
     :return: the algorithm class
     """
-    classes = {cls.__name__: cls for cls in BaseAlgorithm.__subclasses__()}
-    if algorithm_to_use in classes:
-        return classes[algorithm_to_use]
-    return None
+    return BaseAlgorithm.get_algorithm_by_name(algorithm_to_use)
 
 
-def run_graphlet_counting(graph, graphlet_size, sample_size, num_of_samples, markov_steps,
-                          num_of_markov_graphs, algorithm_class, mode_color_map):
+def run_graphlet_counting(graph, graphlet_sizes, sample_size, num_of_samples, markov_steps,
+                          num_of_markov_graphs, algorithm_class, mode_color_map, algorithm_options=None,
+                          sampler=None, adaptive_stopping=None, null_model=None, extras=None):
     # sample the graph
-    aggregate_graphlet_map = {}
+    algorithm_options = algorithm_options or {}
+    # if extras is set, the examples, errors, bounds, variances and participation of every run are merged into it
+    # and averaged over the runs like the counts
+    # with collect_sampled_moments, the expected counts of uniform samples are computed from one census per markov
+    # graph instead of counting samples
+    # if null_model is set, every markov graph is drawn from it independently instead of by a markov chain
+    analytic_sampling = algorithm_options.get("collect_sampled_moments", False)
+    aggregate_graphlet_maps = {graphlet_size: {} for graphlet_size in graphlet_sizes}
+    num_of_runs = 0
+    if adaptive_stopping is not None and not analytic_sampling:
+        num_of_markov_graphs = math.ceil(adaptive_stopping.max_runs / num_of_samples)
     for i in range(num_of_markov_graphs):
-        logger.info("Generating markov graph %s with %s steps", i + 1, markov_steps)
-        graph = graph.mutate_graph(markov_steps)
+        if null_model is not None:
+            logger.info("Generating null model graph %s", i + 1)
+            graph = null_model.sample()
+        else:
+            logger.info("Generating markov graph %s with %s steps", i + 1, markov_steps)
+            graph = graph.mutate_graph(markov_steps)
+        if analytic_sampling:
+            algorithm = algorithm_class(graph, mode_color_map, **algorithm_options)
+            graphlet_maps = solve(algorithm, graphlet_sizes, "markov_graph_" + str(i + 1))
+            run_extras = algorithm.extras
+            for graphlet_size, graphlet_map in graphlet_maps.items():
+                expectations, run_extras.sampled_variances[graphlet_size] = \
+                    run_extras.sampled_moments[graphlet_size].expected_counts(graph.get_num_nodes(), sample_size)
+                graphlet_maps[graphlet_size] = {graphlet_key: (graphlet_info[0], expectations[graphlet_key])
+                                                for graphlet_key, graphlet_info in graphlet_map.items()}
+                if graphlet_size in run_extras.participation:
+                    # a group of a node is in a sample with the node with the probability of the whole group
+                    run_extras.participation[graphlet_size].scale(SampledCountMoments.inclusion_probability(
+                        graph.get_num_nodes(), sample_size, graphlet_size))
+            add_to_aggregate(aggregate_graphlet_maps, graphlet_maps)
+            if extras is not None:
+                extras.merge_run(run_extras)
+            num_of_runs += 1
+            continue
         for j in range(num_of_samples):
-            graph_sample = graph.sample(sample_size)
+            graph_sample = graph.sample(sample_size, sampler)
             logger.info("Sampling graph %s of size %s", j + 1, sample_size)
-            algorithm = algorithm_class(graph_sample, mode_color_map)
-            graphlet_map = solve(algorithm, graphlet_size, "markov_graph_" + str(i + 1) + "_sample_" + str(j + 1))
-            for graphlet_key, graphlet_info in graphlet_map.items():
-                if graphlet_key in aggregate_graphlet_map:
-                    value = aggregate_graphlet_map[graphlet_key]
-                    aggregate_graphlet_map[graphlet_key] = (value[0], value[1] + graphlet_info[1])
-                else:
-                    aggregate_graphlet_map[graphlet_key] = graphlet_info
-    for graphlet_key, graphlet_info in aggregate_graphlet_map.items():
-        aggregate_graphlet_map[graphlet_key] = (graphlet_info[0], graphlet_info[1] / (num_of_markov_graphs * num_of_samples))
-    # sort the graphlets by frequency descending
-    aggregate_graphlet_map = {k: v for k, v in sorted(aggregate_graphlet_map.items(), key=lambda item: item[1][1], reverse=True)}
-    return aggregate_graphlet_map
+            algorithm = algorithm_class(graph_sample, mode_color_map, **algorithm_options)
+            graphlet_maps = solve(algorithm, graphlet_sizes, "markov_graph_" + str(i + 1) + "_sample_" + str(j + 1))
+            add_to_aggregate(aggregate_graphlet_maps, graphlet_maps)
+            if algorithm.extras.completed_fraction < 1:
+                logger.info("Counts estimated from %.1f%% of the roots", 100 * algorithm.extras.completed_fraction)
+            if extras is not None:
+                extras.merge_run(algorithm.extras)
+            num_of_runs += 1
+            if adaptive_stopping is not None:
+                # convergence is judged on the largest graphlets, which have the noisiest counts
+                adaptive_stopping.add_run(graphlet_maps[max(graphlet_sizes)])
+                if adaptive_stopping.should_stop():
+                    break
+        if adaptive_stopping is not None and adaptive_stopping.should_stop():
+            logger.info("Stopping after %s runs", num_of_runs)
+            break
+    for graphlet_size, aggregate_graphlet_map in aggregate_graphlet_maps.items():
+        for graphlet_key, graphlet_info in aggregate_graphlet_map.items():
+            aggregate_graphlet_map[graphlet_key] = (graphlet_info[0], graphlet_info[1] / num_of_runs)
+        # sort the graphlets by frequency descending
+        aggregate_graphlet_maps[graphlet_size] = {k: v for k, v in sorted(aggregate_graphlet_map.items(),
+                                                                          key=lambda item: item[1][1], reverse=True)}
+    if extras is not None:
+        extras.average(num_of_runs)
+    return aggregate_graphlet_maps
 
 
-def main():
-    # read config file
-    config_file = "config.json"
-    with open(config_file, 'r') as file:
-        config = json.load(file)
+def add_to_aggregate(aggregate_graphlet_maps, graphlet_maps):
+    """
+    Add the counts of a run to the summed counts of all runs
+    :param aggregate_graphlet_maps: the map of key: graphlet size, value: map of key: graphlet hash,
+    value: (graphlet, summed count)
+    :param graphlet_maps: the map of key: graphlet size, value: map of key: graphlet hash, value: (graphlet, count)
+    :return: None
+    """
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        aggregate_graphlet_map = aggregate_graphlet_maps[graphlet_size]
+        for graphlet_key, graphlet_info in graphlet_map.items():
+            if graphlet_key in aggregate_graphlet_map:
+                value = aggregate_graphlet_map[graphlet_key]
+                aggregate_graphlet_map[graphlet_key] = (value[0], value[1] + graphlet_info[1])
+            else:
+                aggregate_graphlet_map[graphlet_key] = graphlet_info
+
 
+def serve(config, mode_color_map):
+    """
+    Load the configured graphs once and answer census queries until interrupted
+    :param config: the config
+    :param mode_color_map: the map of key: edge mode, value: edge color
+    :return: None
+    """
+    server_config = config["server"]
+    graph_files = server_config["graphs"] or {Path(config["input_file"]).stem: config["input_file"]}
+    graphs = {}
+    for graph_name, input_file in graph_files.items():
+        graphs[graph_name] = create_graph(load_data(input_file))
+        logger.info("Graph %s loaded from file: %s", graph_name, input_file)
+    service = CensusService(graphs, mode_color_map, config["algorithm_to_use"], server_config["num_workers"],
+                            config["planner"])
+    server = CensusServer(service, server_config["host"], server_config["port"], server_config["unix_socket"])
+    server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Count graphlets of a multi-mode directed graph")
+    parser.add_argument("--config", default="config.json", help="path of the config file")
+    parser.add_argument("--serve", action="store_true", help="run the census server configured under 'server'")
+    parser.add_argument("--input-files", nargs="+", help="census several input files in one batch and compare them")
+    parser.add_argument("--shard", type=int, help="count only the groups rooted in this shard of the nodes and write a "
+                                                  "partial result, needs --num-shards")
+    parser.add_argument("--num-shards", type=int, help="the number of shards the nodes are split into")
+    parser.add_argument("--merge", nargs="+", metavar="PARTIAL_FILE",
+                        help="merge the partial results of all shards of a census into its csv file")
+    args = parser.parse_args()
+    if (args.shard is None) != (args.num_shards is None):
+        parser.error("--shard and --num-shards must be given together")
+    if args.num_shards is not None and not 0 <= args.shard < args.num_shards:
+        parser.error("--shard must be in [0, --num-shards)")
+    if args.num_shards is not None and args.input_files:
+        parser.error("--shard cannot be combined with --input-files")
+    return args
+
+
+def run_census(config, input_file, modes=None, shard=None):
+    """
+    Run the configured census of one input file and write its outputs
+    :param config: the config
+    :param input_file: the input file
+    :param modes: if set, the modes registered first in this order so graphlet hashes match across networks
+    :param shard: if set, (shard index, number of shards), only the groups rooted in the shard are counted and
+    written as a partial result to merge with merge_shards
+    :return: the map of key: graphlet size, value: map of key: graphlet hash, value: (graphlet, average count)
+    """
     # configurations
-    input_file = config["input_file"]
     algorithm_to_use = config["algorithm_to_use"]
     graphlet_size = config["graphlet_size"]
     sample_size = config["sample_size"]
@@ -129,19 +256,64 @@ def main():
     markov_steps = config["markov_steps"]
     use_markov_graph_generation = config["use_markov_graph_generation"]
     num_of_markov_graphs = config["num_of_markov_graphs"]
+    null_model_type = config["null_model"]
     output_config = config["output"]
     generate_csv_output = output_config["csv_output"]["generate"]
     csv_output_folder = output_config["csv_output"]["folder"]
     generate_graph_visualizations = output_config["visualizations"]["generate"]
     visualization_folder = output_config["visualizations"]["folder"]
     mode_color_map = output_config["visualizations"]["mode_colors"]
+    mode_constraint = ModeConstraint.from_config(config["mode_constraints"])
+    batch_size = config["batch_size"]
+    node_order = config["node_order"]
+    memory_budget_mb = config["memory_budget_mb"]
+    spill_dir = config["spill_dir"]
+    reservoir_size = config["reservoir_size"]
+    hub_degree_threshold = config["hub_degree_threshold"]
+    deadline_seconds = config["deadline_seconds"]
+    analytic_sampling = config["analytic_sampling"]
+    non_induced_counts = config["non_induced_counts"]
+    participation_matrix = config["participation_matrix"]
+    heavy_hitters = config["heavy_hitters"]
+    sampler = Sampler.from_config(config["sampler"]) if use_sampling else None
+    adaptive_stopping = AdaptiveStopping.from_config(config["adaptive_stopping"])
 
     # load data
     data = load_data(input_file)
-    graph = create_graph(data)
+    graph = create_graph(data, modes)
     logger.info("Graph created from file: %s", input_file)
     logger.info("Number of nodes: %s", graph.get_num_nodes())
     logger.info("Number of edges: %s", graph.get_num_edges())
+    graphlet_sizes = config["graphlet_sizes"] or [graphlet_size]
+
+    if algorithm_to_use == "auto":
+        # pick the counter and sampling settings from a pre-flight estimate of the census
+        planner_config = config["planner"]
+        # with sampling configured every run counts a sample, so the cost of a run is estimated on one sample
+        planned_graph = graph.sample(sample_size, sampler) if use_sampling else graph
+        planner = Planner(planned_graph, planner_config["num_roots"], planner_config["seed"],
+                          {"batch_size": batch_size, "node_order": node_order},
+                          sample_size if use_sampling else None)
+        logger.info("Graph statistics: %s", planner.inspect())
+        num_of_runs = (num_of_markov_graphs if use_markov_graph_generation else 1) * \
+            (num_of_samples if use_sampling else 1)
+        # options only the DP supports keep the planner from picking another counter
+        options = {"mode_constraints": config["mode_constraints"], "participation_matrix": participation_matrix,
+                   "analytic_sampling": analytic_sampling and use_sampling, "heavy_hitters": heavy_hitters,
+                   "memory_budget_mb": memory_budget_mb, "deadline_seconds": deadline_seconds, "shard": shard}
+        plan = planner.plan(graphlet_sizes, planner_config["time_budget_seconds"], planner_config["memory_budget_mb"],
+                            num_of_runs, num_of_samples if not use_sampling else 1, options)
+        algorithm_to_use = plan["algorithm_to_use"]
+        if plan["use_sampling"]:
+            # the planned sample size assumes uniform samples, a uniform sample of a uniform sample is uniform
+            if use_sampling and not isinstance(sampler, UniformSampler):
+                logger.info("The planned sample size assumes uniform sampling, lower sample_size to fit the budgets "
+                            "with the %s", type(sampler).__name__)
+                return None
+            if not use_sampling:
+                sampler = UniformSampler(config["sampler"].get("seed") if config["sampler"] else None)
+            use_sampling = True
+            sample_size = plan["sample_size"]
 
     # setup
     num_of_samples = num_of_samples if use_sampling else 1
@@ -150,6 +322,12 @@ def main():
     markov_steps = markov_steps if use_markov_graph_generation else 0
     logger.info("Using sampling and markov generation leads to an average approximation of the graphlet counts of all "
                 "iterations")
+    if null_model_type not in ("markov", "configuration"):
+        logger.info("No valid null model provided, use markov or configuration")
+        return None
+    # the configuration model draws every null model from the input graph, markov_steps is then not used
+    null_model = ConfigurationModel(graph) if use_markov_graph_generation and null_model_type == "configuration" \
+        else None
     # visualize the whole graph according to the config
     readable_file_name = Path(input_file).stem
 
@@ -157,34 +335,281 @@ def main():
     algorithm = get_algorithm_class(algorithm_to_use)
     if not algorithm:
         logger.info("No valid algorithm provided")
-        return
-    aggregate_graphlet_map = run_graphlet_counting(graph, graphlet_size, sample_size, num_of_samples, markov_steps,
-                                                   num_of_markov_graphs, algorithm, mode_color_map)
-    if generate_csv_output:
-        logger.info("Writing graphlet counts to csv file")
-        name = "Results_graphlet_size_{}_{}_{}_sampling_{}_{}_markov_{}_{}".format(readable_file_name, graphlet_size,
-                                                                                   algorithm.__name__,
-                                                                                   use_sampling,
-                                                                                   sample_size,
-                                                                                   use_markov_graph_generation,
-                                                                                   markov_steps,
-                                                                                   num_of_markov_graphs)
+        return None
+    algorithm_options = {}
+    if mode_constraint is not None:
+        if not issubclass(algorithm, DPGraphletCounter):
+            logger.info("Mode constraints are only supported by DPGraphletCounter")
+            return None
+        algorithm_options["mode_constraint"] = mode_constraint
+    if batch_size and issubclass(algorithm, DPGraphletCounter):
+        algorithm_options["batch_size"] = batch_size
+    if node_order and issubclass(algorithm, DPGraphletCounter):
+        algorithm_options["node_order"] = node_order
+    if memory_budget_mb and issubclass(algorithm, DPGraphletCounter):
+        algorithm_options["memory_budget_mb"] = memory_budget_mb
+        algorithm_options["spill_dir"] = spill_dir
+    if reservoir_size and issubclass(algorithm, (DPGraphletCounter, BruteForceGraphletCounter)):
+        algorithm_options["reservoir_size"] = reservoir_size
+    if hub_degree_threshold and issubclass(algorithm, DPGraphletCounter):
+        algorithm_options["hub_degree_threshold"] = hub_degree_threshold
+    if analytic_sampling and use_sampling:
+        if not issubclass(algorithm, DPGraphletCounter) or not isinstance(sampler, UniformSampler):
+            logger.info("Analytic sampling is only supported by DPGraphletCounter with the uniform sampler")
+            return None
+        if deadline_seconds:
+            logger.info("Analytic sampling needs full censuses, deadline_seconds is ignored")
+        if adaptive_stopping is not None:
+            # the expected counts replace the sampled runs, one census per markov graph is always made
+            logger.warning("Adaptive stopping conflicts with analytic sampling, counting every markov graph once")
+            adaptive_stopping = None
+        algorithm_options["collect_sampled_moments"] = True
+    elif deadline_seconds:
+        if issubclass(algorithm, DPGraphletCounter):
+            algorithm_options["deadline"] = deadline_seconds
+        else:
+            logger.warning("deadline_seconds is only supported by DPGraphletCounter, counting without a deadline")
+    if participation_matrix:
+        if not issubclass(algorithm, DPGraphletCounter) or "deadline" in algorithm_options:
+            logger.info("Participation matrices are only supported by DPGraphletCounter without a deadline")
+            return None
+        algorithm_options["collect_participation"] = True
+    if heavy_hitters and issubclass(algorithm, DPGraphletCounter):
+        if "deadline" in algorithm_options:
+            logger.info("Heavy hitters are not supported with a deadline, unset heavy_hitters or deadline_seconds")
+            return None
+        algorithm_options["heavy_hitters"] = heavy_hitters
+    if shard is not None:
+        # the partial counts of all shards only add up to the census if every shard counts the same graph exactly
+        if not issubclass(algorithm, DPGraphletCounter) or use_sampling or use_markov_graph_generation or \
+                "deadline" in algorithm_options or "heavy_hitters" in algorithm_options or participation_matrix:
+            logger.info("Sharded censuses are only supported by exact DPGraphletCounter runs without sampling, markov "
+                        "graphs, a deadline, heavy hitters or participation matrices")
+            return None
+        algorithm_options["shard"] = shard
+    if adaptive_stopping is not None and not use_sampling and not use_markov_graph_generation and \
+            "deadline" not in algorithm_options:
+        # every run would count the same graph exactly, the counts have no variance to wait for
+        logger.warning("Adaptive stopping needs sampling, markov graphs or a deadline, counting the graph once")
+        adaptive_stopping = None
+    extras = CensusExtras()
+    aggregate_graphlet_maps = run_graphlet_counting(graph, graphlet_sizes, sample_size, num_of_samples, markov_steps,
+                                                    num_of_markov_graphs, algorithm, mode_color_map,
+                                                    algorithm_options, sampler, adaptive_stopping, null_model, extras)
+    if shard is not None:
+        shard_index, num_shards = shard
+        metadata = {
+            "input_name": readable_file_name,
+            "input_checksum": get_file_checksum(input_file),
+            "modes": sorted(graph.mode_map, key=graph.mode_map.get),
+            "num_nodes": graph.get_num_nodes(),
+            "graphlet_sizes": sorted(set(graphlet_sizes)),
+            "algorithm": algorithm.__name__,
+            "node_order": node_order,
+            "mode_constraints": config["mode_constraints"],
+            "num_shards": num_shards,
+            "shard": shard_index,
+            "num_roots": sum(1 for node_name in graph.get_nodes() if get_shard(node_name, num_shards) == shard_index),
+        }
+        name = "Partial_graphlet_counts_{}_shard_{}_of_{}".format(readable_file_name, shard_index, num_shards)
+        logger.info("Writing partial graphlet counts of shard %s of %s", shard_index, num_shards)
+        write_partial(os.path.join(csv_output_folder, name + ".json"), metadata, aggregate_graphlet_maps)
+        return aggregate_graphlet_maps
+    # rows of the containment matrix are cached per induced class, so all sizes share one matrix
+    containment_matrix = ContainmentMatrix(graph.mode_map) if non_induced_counts else None
+    for graphlet_size, aggregate_graphlet_map in aggregate_graphlet_maps.items():
+        if generate_csv_output:
+            logger.info("Writing graphlet counts of size %s to csv file", graphlet_size)
+            name = "Results_graphlet_size_{}_{}_{}_sampling_{}_{}_markov_{}_{}".format(readable_file_name,
+                                                                                       graphlet_size,
+                                                                                       algorithm.__name__,
+                                                                                       use_sampling,
+                                                                                       sample_size,
+                                                                                       use_markov_graph_generation,
+                                                                                       markov_steps,
+                                                                                       num_of_markov_graphs)
+            path = os.path.join(csv_output_folder, name + ".csv")
+            write_to_file(aggregate_graphlet_map, path)
+            if containment_matrix is not None:
+                logger.info("Writing non-induced graphlet counts of size %s to csv file", graphlet_size)
+                skipped_keys = []
+                write_to_file(containment_matrix.transform(aggregate_graphlet_map, skipped_keys),
+                              os.path.join(csv_output_folder, name + "_non_induced.csv"))
+                if skipped_keys:
+                    # induced classes too dense to expand, the non-induced counts miss the occurrences in their groups
+                    write_class_table(os.path.join(csv_output_folder, name + "_non_induced_skipped.csv"),
+                                      ((graphlet_key, aggregate_graphlet_map[graphlet_key][1])
+                                       for graphlet_key in skipped_keys), ["Graphlet Key", "Frequency"])
+            if graphlet_size in extras.graphlet_examples:
+                # random example node groups of every class next to the counts
+                write_class_table(os.path.join(csv_output_folder, name + "_examples.csv"),
+                                  ((graphlet_key, index + 1, ";".join(node_group))
+                                   for graphlet_key, reservoir in extras.graphlet_examples[graphlet_size].items()
+                                   for index, node_group in enumerate(reservoir.items)),
+                                  ["Graphlet Key", "Example", "Nodes"])
+            if "deadline" in algorithm_options and graphlet_size in extras.count_errors:
+                # standard errors of the counts estimated before the deadline
+                write_class_table(os.path.join(csv_output_folder, name + "_errors.csv"),
+                                  extras.count_errors[graphlet_size].items(), ["Graphlet Key", "Standard Error"])
+            if graphlet_size in extras.count_bounds:
+                # the counts of the tracked classes are within these bounds of the true average counts
+                write_class_table(os.path.join(csv_output_folder, name + "_error_bounds.csv"),
+                                  extras.count_bounds[graphlet_size].items(), ["Graphlet Key", "Error Bound"])
+            if graphlet_size in extras.participation:
+                # sparse node x class participation counts, rows labelled by node_names and columns by class_keys
+                extras.participation[graphlet_size].save(os.path.join(csv_output_folder,
+                                                                      name + "_participation.npz"))
+            if graphlet_size in extras.sampled_variances:
+                # variances of the counts of a uniform sample, next to their expectations
+                write_class_table(os.path.join(csv_output_folder, name + "_variances.csv"),
+                                  extras.sampled_variances[graphlet_size].items(), ["Graphlet Key", "Variance"])
+        if generate_graph_visualizations:
+            logger.info("Generating graph visualizations of size %s", graphlet_size)
+            results = list(aggregate_graphlet_map.items())[:10]
+            for index, (graphlet_key, graphlet_info) in enumerate(results):
+                graphlet = graphlet_info[0]
+                name = "{}_graphlet_size_{}_{}_{}_sampling_{}_{}_markov_{}_{}".format(index + 1, graphlet_size,
+                                                                                      readable_file_name,
+                                                                                      algorithm.__name__,
+                                                                                      use_sampling,
+                                                                                      sample_size,
+                                                                                      use_markov_graph_generation,
+                                                                                      markov_steps)
+                path = os.path.join(visualization_folder, name + ".html")
+                graphlet.visualize(path, mode_color_map)
+    if generate_csv_output and use_sampling:
+        # per node inclusion probabilities of the sampler on the input graph, to correct the estimates
+        name = "Inclusion_probabilities_{}_sampling_{}".format(readable_file_name, sample_size)
         path = os.path.join(csv_output_folder, name + ".csv")
-        write_to_file(aggregate_graphlet_map, path)
-    if generate_graph_visualizations:
-        logger.info("Generating graph visualizations")
-        results = list(aggregate_graphlet_map.items())[:10]
-        for index, (graphlet_key, graphlet_info) in enumerate(results):
-            graphlet = graphlet_info[0]
-            name = "{}_graphlet_size_{}_{}_{}_sampling_{}_{}_markov_{}_{}".format(index + 1, graphlet_size,
-                                                                                  readable_file_name,
-                                                                                  algorithm.__name__,
-                                                                                  use_sampling,
-                                                                                  sample_size,
-                                                                                  use_markov_graph_generation,
-                                                                                  markov_steps)
-            path = os.path.join(visualization_folder, name + ".html")
-            graphlet.visualize(path, mode_color_map)
+        write_class_table(path, sampler.inclusion_probabilities(graph, sample_size).items(),
+                          ["Node", "Inclusion Probability"])
+    return aggregate_graphlet_maps
+
+
+def _run_census_worker(args):
+    """
+    Run the census of one input file in a batch worker process
+    :param args: (config, input file, modes)
+    :return: the map of key: graphlet size, value: map of key: graphlet hash, value: (example node names, count)
+    """
+    config, input_file, modes = args
+    aggregate_graphlet_maps = run_census(config, input_file, modes)
+    if aggregate_graphlet_maps is None:
+        # run_census logged why the config cannot be run, an empty column would look like a network without graphlets
+        raise ValueError("The census of {} failed, see the log above".format(input_file))
+    return {graphlet_size: {graphlet_key: (tuple(node.name for node in graphlet_info[0].nodes), graphlet_info[1])
+                            for graphlet_key, graphlet_info in aggregate_graphlet_map.items()}
+            for graphlet_size, aggregate_graphlet_map in aggregate_graphlet_maps.items()}
+
+
+def write_comparison(class_catalog, network_maps, file_name):
+    """
+    Write the normalized class frequencies of several networks side by side
+    :param class_catalog: the map of key: graphlet hash, value: (network name, example node names)
+    :param network_maps: the map of key: network name, value: map of key: graphlet hash, value: (example, count)
+    :param file_name: the name of the file
+    :return: None
+    """
+    network_names = list(network_maps)
+    frequencies = {}
+    for network_name, graphlet_map in network_maps.items():
+        total = sum(count for _, count in graphlet_map.values())
+        if total == 0:
+            # no group of the size in the network, its column stays at 0
+            continue
+        for graphlet_key, (_, count) in graphlet_map.items():
+            frequencies.setdefault(graphlet_key, {})[network_name] = count / total
+    # the classes most frequent on average come first
+    graphlet_keys = sorted(frequencies, key=lambda key: sum(frequencies[key].values()), reverse=True)
+    rows = []
+    for graphlet_key in graphlet_keys:
+        example_network, example_nodes = class_catalog[graphlet_key]
+        rows.append([graphlet_key, example_network, ";".join(example_nodes)] +
+                    [frequencies[graphlet_key].get(network_name, 0) for network_name in network_names])
+    write_class_table(file_name, rows, ["Graphlet Key", "Example Network", "Example Nodes"] + network_names)
+
+
+def run_batch(config, input_files):
+    """
+    Run the configured census of several input files on one process pool and compare the networks
+    The modes of all networks are registered in the same order so equal classes get equal hashes. The workers
+    classify their networks independently, the classes found in any network are merged afterwards into one catalog
+    with an example of every class, from the first network in input order
+    :param config: the config
+    :param input_files: list of input files
+    :return: the map of key: graphlet size, value: map of key: network name, value: map of key: graphlet hash,
+    value: (example node names, count)
+    """
+    mode_color_map = config["output"]["visualizations"]["mode_colors"]
+    modes = list(mode_color_map)
+    for input_file in input_files:
+        for row in load_data(input_file):
+            if row[2] != 'unknown' and row[2] not in modes:
+                modes.append(row[2])
+    network_names = [Path(input_file).stem for input_file in input_files]
+    # map of key: graphlet hash, value: (network name, example node names), shared by all networks
+    class_catalog = {}
+    comparison_maps = {}
+    with ProcessPoolExecutor(max_workers=config["batch_workers"]) as executor:
+        results = executor.map(_run_census_worker, [(config, input_file, modes) for input_file in input_files])
+        for network_name, graphlet_maps in zip(network_names, results):
+            logger.info("Census of %s finished", network_name)
+            for graphlet_size, graphlet_map in graphlet_maps.items():
+                comparison_maps.setdefault(graphlet_size, {})[network_name] = graphlet_map
+                for graphlet_key, (example_nodes, _) in graphlet_map.items():
+                    class_catalog.setdefault(graphlet_key, (network_name, example_nodes))
+    if config["output"]["csv_output"]["generate"]:
+        for graphlet_size, network_maps in comparison_maps.items():
+            name = "Comparison_graphlet_size_{}_{}_{}_networks".format(graphlet_size, config["algorithm_to_use"],
+                                                                       len(network_maps))
+            path = os.path.join(config["output"]["csv_output"]["folder"], name + ".csv")
+            logger.info("Writing comparison of graphlets of size %s to csv file", graphlet_size)
+            write_comparison(class_catalog, network_maps, path)
+    return comparison_maps
+
+
+def merge_shards(config, partial_files):
+    """
+    Merge the partial results of a sharded census and write its csv files like run_census does
+    :param config: the config
+    :param partial_files: list of partial result files, one per shard
+    :return: the map of key: graphlet size, value: map of key: graphlet hash, value: (example node names, count)
+    """
+    metadata, graphlet_maps = merge_partials(partial_files)
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        logger.info("Writing merged graphlet counts of size %s to csv file", graphlet_size)
+        name = "Results_graphlet_size_{}_{}_{}_sampling_{}_{}_markov_{}_{}".format(metadata["input_name"],
+                                                                                   graphlet_size,
+                                                                                   metadata["algorithm"],
+                                                                                   False,
+                                                                                   metadata["num_nodes"],
+                                                                                   False,
+                                                                                   0,
+                                                                                   1)
+        write_to_file(graphlet_map, os.path.join(config["output"]["csv_output"]["folder"], name + ".csv"))
+    return graphlet_maps
+
+
+def main():
+    args = parse_args()
+    # read config file
+    with open(args.config, 'r') as file:
+        config = json.load(file)
+
+    if args.serve:
+        serve(config, config["output"]["visualizations"]["mode_colors"])
+        return
+    if args.merge:
+        merge_shards(config, args.merge)
+        return
+    if args.num_shards is not None:
+        run_census(config, config["input_file"], shard=(args.shard, args.num_shards))
+        return
+    input_files = args.input_files or config["input_files"]
+    if input_files:
+        run_batch(config, input_files)
+    else:
+        run_census(config, config["input_file"])
 
 
 if __name__ == '__main__':
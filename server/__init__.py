@@ -0,0 +1,3 @@
+# export CensusServer, CensusService
+
+from server.census_server import CensusServer, CensusService
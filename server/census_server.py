@@ -0,0 +1,466 @@
+import json
+import os
+import socketserver
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from algorithm import BFSGraphletCounter, EgoGraphletCounter
+from algorithm.base import BaseAlgorithm
+from algorithm.planner import Planner
+from graph import Graphlet, SharedGraph
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("census_server")
+
+
+# state of a worker process: the map of key: graph name, value: shared graph attached by the worker, the map of
+# key: graph name, value: graph materialised from it, the mode colors and the map of key: graph name, value: seed
+# graphlet counter keeping its per-seed caches
+_worker_state = {}
+
+
+def _init_worker(descriptors, mode_color_map):
+    """
+    Attach a worker process to the shared copies of the graphs exported by the service, without copying them
+    :param descriptors: the map of key: graph name, value: descriptor of the shared graph
+    :param mode_color_map: the map of key: edge mode, value: edge color
+    :return: None
+    """
+    _worker_state["shared_graphs"] = {graph_name: SharedGraph.open(descriptor)
+                                      for graph_name, descriptor in descriptors.items()}
+    _worker_state["graphs"] = {}
+    _worker_state["mode_color_map"] = mode_color_map
+    _worker_state["seed_counters"] = {}
+
+
+def _get_worker_graph(graph_name):
+    """
+    Get the graph of a worker process materialised from its shared copy, once per worker and graph
+    Samples, ego networks and seed counters need the full Graph interface, censuses of the whole graph count from
+    the shared copy
+    :param graph_name: the name of the graph
+    :return: the graph
+    """
+    graphs = _worker_state["graphs"]
+    if graph_name not in graphs:
+        graphs[graph_name] = _worker_state["shared_graphs"][graph_name].to_graph()
+    return graphs[graph_name]
+
+
+def _to_named_map(graphlet_map):
+    """
+    Replace the graphlets of a result by their node names, graphlets reference the whole graph and are not sent
+    between processes
+    :param graphlet_map: the map of key: graphlet hash, value: (graphlet, count)
+    :return: the map of key: graphlet hash, value: (tuple of node names, count)
+    """
+    return {graphlet_key: (tuple(node.name for node in graphlet_info[0].nodes), graphlet_info[1])
+            for graphlet_key, graphlet_info in graphlet_map.items()}
+
+
+def _count_in_worker(graph_name, algorithm_class, graphlet_size, view=("graph",)):
+    """
+    Run one census in a worker process
+    :param graph_name: the name of the graph
+    :param algorithm_class: the algorithm class
+    :param graphlet_size: the size of the graphlet
+    :param view: ("graph",) for the whole graph, ("sample", sample size) for a uniform node sample or
+    ("ego", node name, radius) for the ego network of a node
+    :return: the map of key: graphlet hash, value: (tuple of node names, count)
+    """
+    graph = _worker_state["shared_graphs"][graph_name]
+    if view[0] == "sample":
+        graph = _get_worker_graph(graph_name).sample(view[1])
+    elif view[0] == "ego":
+        graph = _get_worker_graph(graph_name).get_ego_network(view[1], view[2])
+    algorithm = algorithm_class(graph, _worker_state["mode_color_map"])
+    return _to_named_map(algorithm.count_graphlets(graphlet_size))
+
+
+def _count_seeds_in_worker(graph_name, seeds, graphlet_size):
+    """
+    Count the graphlets containing a seed in a worker process, with the seed counter of the worker
+    :param graph_name: the name of the graph
+    :param seeds: the seed node names
+    :param graphlet_size: the size of the graphlet
+    :return: the map of key: graphlet hash, value: (tuple of node names, count)
+    """
+    seed_counters = _worker_state["seed_counters"]
+    if graph_name not in seed_counters:
+        seed_counters[graph_name] = EgoGraphletCounter(_get_worker_graph(graph_name), _worker_state["mode_color_map"])
+    return _to_named_map(seed_counters[graph_name].count_graphlets(graphlet_size, seeds))
+
+
+class CensusService:
+    """
+    Keeps graphs loaded and census results cached between queries
+    The counting is CPU bound, so it runs on a pool of worker processes attached to a shared memory copy of the
+    graphs. Censuses of a whole graph count from the shared copy; a worker materialises its own copy of a graph
+    once, the first time it draws a sample or an ego network of it or counts seeds, and keeps its own seed caches.
+    Results come back as node names and are turned into graphlets of the graphs of the service.
+    """
+
+    def __init__(self, graphs, mode_color_map, default_algorithm="DPGraphletCounter", num_workers=4,
+                 planner_config=None):
+        """
+        Initialize the census service
+        :param graphs: the map of key: graph name, value: graph
+        :param mode_color_map: the map of key: edge mode, value: edge color
+        :param default_algorithm: the algorithm used when a query does not name one, "auto" to let the planner pick
+        :param num_workers: the number of worker processes answering queries
+        :param planner_config: the planner section of the config used to resolve "auto", None for its defaults
+        """
+        self._graphs = dict(graphs)
+        self._mode_color_map = mode_color_map
+        self._default_algorithm = default_algorithm
+        self._planner_config = planner_config or {"time_budget_seconds": 3600, "memory_budget_mb": 4096,
+                                                  "num_roots": 100, "seed": None}
+        # map of key: (graph name, graphlet size), value: the algorithm class the planner picked and its sample size
+        self._planned_algorithms = {}
+        self._shared_graphs = {name: SharedGraph.export(graph) for name, graph in self._graphs.items()}
+        self._executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                             initargs=({name: shared_graph.descriptor for name, shared_graph
+                                                        in self._shared_graphs.items()}, mode_color_map))
+        # map of key: (graph name, algorithm name, graphlet size), value: future of the census result
+        self._census_cache = {}
+        self._cache_lock = threading.Lock()
+
+    def get_graph(self, graph_name):
+        """
+        Get a loaded graph
+        :param graph_name: the name of the graph
+        :return: the graph
+        """
+        if graph_name not in self._graphs:
+            raise ValueError("Unknown graph: {}".format(graph_name))
+        return self._graphs[graph_name]
+
+    def list_graphs(self):
+        """
+        Describe the loaded graphs
+        :return: list of graph descriptions
+        """
+        return [{"name": name, "nodes": graph.get_num_nodes(), "edges": graph.get_num_edges(),
+                 "modes": list(graph.mode_map.keys())} for name, graph in self._graphs.items()]
+
+    @staticmethod
+    def _check_graphlet_size(graphlet_size):
+        """
+        Check the graphlet size of a query
+        :param graphlet_size: the size of the graphlet
+        :return: None
+        """
+        if not isinstance(graphlet_size, int) or isinstance(graphlet_size, bool) or graphlet_size < 2:
+            raise ValueError("graphlet_size must be an integer of at least 2, got {!r}".format(graphlet_size))
+
+    def _get_algorithm_class(self, algorithm_name, graph_name, graphlet_size, whole_graph=False):
+        """
+        Get the algorithm class for a query
+        :param algorithm_name: the name of the algorithm, None for the default algorithm, "auto" to let the planner
+        pick the fastest counter within its budgets for the graph and graphlet size
+        :param graph_name: the name of the graph
+        :param graphlet_size: the size of the graphlet
+        :param whole_graph: the query counts the whole graph, a census the planner would only sample is refused
+        :return: the algorithm class
+        """
+        algorithm_name = algorithm_name or self._default_algorithm
+        if algorithm_name == "auto":
+            algorithm_class, sample_size = self._plan_algorithm(graph_name, graphlet_size)
+            if whole_graph and sample_size is not None:
+                raise ValueError("A census of size {} of {} does not fit the planner budgets, query /sample with at "
+                                 "most {} nodes instead".format(graphlet_size, graph_name, sample_size))
+            return algorithm_class
+        algorithm_class = BaseAlgorithm.get_algorithm_by_name(algorithm_name)
+        if algorithm_class is None:
+            raise ValueError("Unknown algorithm: {}".format(algorithm_name))
+        if algorithm_class is BFSGraphletCounter:
+            raise ValueError("BFSGraphletCounter is not served, it returns the graphlets of every class instead of "
+                             "counts")
+        return algorithm_class
+
+    def _plan_algorithm(self, graph_name, graphlet_size):
+        """
+        Pick the counter of a census with the planner, once per graph and graphlet size
+        :param graph_name: the name of the graph
+        :param graphlet_size: the size of the graphlet
+        :return: (the algorithm class, the planned sample size if the whole graph does not fit the budgets or None)
+        """
+        key = (graph_name, graphlet_size)
+        with self._cache_lock:
+            if key in self._planned_algorithms:
+                return self._planned_algorithms[key]
+        planner = Planner(self.get_graph(graph_name), self._planner_config["num_roots"], self._planner_config["seed"])
+        plan = planner.plan([graphlet_size], self._planner_config["time_budget_seconds"],
+                            self._planner_config["memory_budget_mb"])
+        planned = (BaseAlgorithm.get_algorithm_by_name(plan["algorithm_to_use"]),
+                   plan["sample_size"] if plan["use_sampling"] else None)
+        with self._cache_lock:
+            self._planned_algorithms[key] = planned
+        return planned
+
+    def _to_graphlet_map(self, graph, named_map):
+        """
+        Turn a result of a worker back into graphlets of a graph
+        Samples and ego networks are induced subgraphs, so their graphlets are the same in the whole graph
+        :param graph: the graph
+        :param named_map: the map of key: graphlet hash, value: (tuple of node names, count)
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        return {graphlet_key: (Graphlet([graph.get_node(node_name) for node_name in node_names], graph), count)
+                for graphlet_key, (node_names, count) in named_map.items()}
+
+    def census(self, graph_name, graphlet_size, algorithm_name=None):
+        """
+        Count the graphlets of a loaded graph, reusing an earlier result for the same query
+        :param graph_name: the name of the graph
+        :param graphlet_size: the size of the graphlet
+        :param algorithm_name: the name of the algorithm
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        graph = self.get_graph(graph_name)
+        self._check_graphlet_size(graphlet_size)
+        algorithm_class = self._get_algorithm_class(algorithm_name, graph_name, graphlet_size, whole_graph=True)
+        key = (graph_name, algorithm_class.__name__, graphlet_size)
+        with self._cache_lock:
+            # concurrent identical queries wait on the same census
+            if key not in self._census_cache:
+                self._census_cache[key] = self._executor.submit(_count_in_worker, graph_name, algorithm_class,
+                                                                graphlet_size)
+            future = self._census_cache[key]
+        try:
+            return self._to_graphlet_map(graph, future.result())
+        except Exception:
+            # do not keep failed censuses around
+            with self._cache_lock:
+                if self._census_cache.get(key) is future:
+                    del self._census_cache[key]
+            raise
+
+    def sample_census(self, graph_name, graphlet_size, sample_size, num_of_samples=1, algorithm_name=None):
+        """
+        Average the graphlet counts of uniform node samples of a loaded graph
+        :param graph_name: the name of the graph
+        :param graphlet_size: the size of the graphlet
+        :param sample_size: the number of nodes in each sample
+        :param num_of_samples: the number of samples
+        :param algorithm_name: the name of the algorithm
+        :return: the map of key: graphlet hash, value: (graphlet, average count)
+        """
+        graph = self.get_graph(graph_name)
+        self._check_graphlet_size(graphlet_size)
+        algorithm_class = self._get_algorithm_class(algorithm_name, graph_name, graphlet_size)
+        if sample_size > graph.get_num_nodes():
+            raise ValueError("Sample size {} is larger than the graph".format(sample_size))
+        if not isinstance(num_of_samples, int) or isinstance(num_of_samples, bool) or num_of_samples < 1:
+            raise ValueError("num_of_samples must be an integer of at least 1, got {!r}".format(num_of_samples))
+        futures = [self._executor.submit(_count_in_worker, graph_name, algorithm_class, graphlet_size,
+                                         ("sample", sample_size))
+                   for _ in range(num_of_samples)]
+        aggregate_graphlet_map = {}
+        for future in futures:
+            for graphlet_key, graphlet_info in future.result().items():
+                if graphlet_key in aggregate_graphlet_map:
+                    value = aggregate_graphlet_map[graphlet_key]
+                    aggregate_graphlet_map[graphlet_key] = (value[0], value[1] + graphlet_info[1])
+                else:
+                    aggregate_graphlet_map[graphlet_key] = graphlet_info
+        return self._to_graphlet_map(graph, {graphlet_key: (graphlet_info[0], graphlet_info[1] / num_of_samples)
+                                             for graphlet_key, graphlet_info in aggregate_graphlet_map.items()})
+
+    def ego_census(self, graph_name, node_name, graphlet_size, radius=1, algorithm_name=None):
+        """
+        Count the graphlets of the ego network of a node
+        :param graph_name: the name of the graph
+        :param node_name: the name of the center node
+        :param graphlet_size: the size of the graphlet
+        :param radius: the radius of the ego network
+        :param algorithm_name: the name of the algorithm
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        graph = self.get_graph(graph_name)
+        self._check_graphlet_size(graphlet_size)
+        algorithm_class = self._get_algorithm_class(algorithm_name, graph_name, graphlet_size)
+        if node_name not in graph.get_nodes():
+            raise ValueError("Unknown node: {}".format(node_name))
+        future = self._executor.submit(_count_in_worker, graph_name, algorithm_class, graphlet_size,
+                                       ("ego", node_name, radius))
+        return self._to_graphlet_map(graph, future.result())
+
+    def seed_census(self, graph_name, seeds, graphlet_size):
+        """
+        Count the graphlets of a loaded graph containing at least one seed node
+        :param graph_name: the name of the graph
+        :param seeds: the seed node names
+        :param graphlet_size: the size of the graphlet
+        :return: the map of key: graphlet hash, value: (graphlet, count)
+        """
+        graph = self.get_graph(graph_name)
+        self._check_graphlet_size(graphlet_size)
+        future = self._executor.submit(_count_seeds_in_worker, graph_name, seeds, graphlet_size)
+        return self._to_graphlet_map(graph, future.result())
+
+    def shutdown(self):
+        """
+        Stop the worker processes and release the shared graphs
+        :return: None
+        """
+        self._executor.shutdown(wait=True)
+        for shared_graph in self._shared_graphs.values():
+            shared_graph.close()
+            shared_graph.unlink()
+        self._shared_graphs = {}
+
+
+def graphlet_map_to_json(graphlet_map, top=None):
+    """
+    Convert a graphlet map to a json serializable list sorted by frequency
+    :param graphlet_map: the map of key: graphlet hash, value: (graphlet, count)
+    :param top: the number of most frequent graphlets to keep, None to keep all
+    :return: list of graphlet descriptions
+    """
+    items = sorted(graphlet_map.items(), key=lambda item: item[1][1], reverse=True)
+    if top is not None:
+        items = items[:top]
+    return [{"key": graphlet_key, "count": graphlet_info[1],
+             "nodes": [node.name for node in graphlet_info[0].nodes]} for graphlet_key, graphlet_info in items]
+
+
+class CensusRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP request handler for the census service
+    GET  /health, /graphs
+    POST /census, /sample, /ego, /seeds
+    """
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/graphs":
+            self._send_json(200, {"graphs": self.server.service.list_graphs()})
+        else:
+            self._send_json(404, {"error": "Unknown path: {}".format(self.path)})
+
+    def do_POST(self):
+        routes = {"/census": self._census, "/sample": self._sample, "/ego": self._ego, "/seeds": self._seeds}
+        if self.path not in routes:
+            self._send_json(404, {"error": "Unknown path: {}".format(self.path)})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            query = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, routes[self.path](query))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            logger.exception("Query on %s failed", self.path)
+            self._send_json(500, {"error": str(e)})
+
+    def _census(self, query):
+        graphlet_map = self.server.service.census(query["graph"], query["graphlet_size"], query.get("algorithm"))
+        return self._result(query, graphlet_map)
+
+    def _sample(self, query):
+        graphlet_map = self.server.service.sample_census(query["graph"], query["graphlet_size"],
+                                                         query["sample_size"], query.get("num_of_samples", 1),
+                                                         query.get("algorithm"))
+        return self._result(query, graphlet_map)
+
+    def _ego(self, query):
+        graphlet_map = self.server.service.ego_census(query["graph"], query["node"], query["graphlet_size"],
+                                                      query.get("radius", 1), query.get("algorithm"))
+        return self._result(query, graphlet_map)
+
+    def _seeds(self, query):
+        graphlet_map = self.server.service.seed_census(query["graph"], query["seeds"], query["graphlet_size"])
+        return self._result(query, graphlet_map)
+
+    @staticmethod
+    def _result(query, graphlet_map):
+        return {"graph": query["graph"], "graphlet_size": query["graphlet_size"],
+                "num_of_graphlets": len(graphlet_map),
+                "graphlets": graphlet_map_to_json(graphlet_map, query.get("top"))}
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CensusServer:
+    """
+    Serves a census service over local HTTP or a unix socket
+    """
+
+    def __init__(self, service, host="127.0.0.1", port=8765, unix_socket=None):
+        """
+        Initialize the server
+        :param service: the census service
+        :param host: the host to bind to
+        :param port: the port to bind to, 0 picks a free port
+        :param unix_socket: path of a unix socket to bind to instead of host and port
+        """
+        self.service = service
+        self.unix_socket = unix_socket
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            self._httpd = ThreadingUnixHTTPServer(unix_socket, CensusRequestHandler)
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), CensusRequestHandler)
+        self._httpd.service = service
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._httpd.server_address
+
+    def serve_forever(self):
+        """
+        Serve queries until interrupted
+        :return: None
+        """
+        logger.info("Census server listening on %s", self.address)
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def start(self):
+        """
+        Serve queries on a background thread
+        :return: None
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Census server listening on %s", self.address)
+
+    def shutdown(self):
+        """
+        Stop serving and release the socket and workers
+        :return: None
+        """
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+        self.service.shutdown()
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.remove(self.unix_socket)
@@ -0,0 +1,106 @@
+import copy
+import csv
+import functools
+import json
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from algorithm import BruteForceGraphletCounter  # noqa: E402
+from main import create_graph, load_data  # noqa: E402
+
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+
+# the small graphs the counters are checked on: the csv file and the number of its leading edges with a known mode,
+# None for all, the thrust networks are cut so brute force stays fast
+SMALL_GRAPHS = [("test1.csv", None), ("test2.csv", None), ("test3.csv", None), ("test4.csv", None),
+                ("thrust_human.csv", 80), ("thrust_mouse.csv", 80)]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_graph(file_name, num_edges=None):
+    rows = [row for row in load_data(os.path.join(TESTS_DIR, file_name)) if row[2] != 'unknown']
+    return create_graph(rows[:num_edges])
+
+
+@functools.lru_cache(maxsize=None)
+def _count_brute_force(file_name, num_edges, graphlet_size):
+    return get_counts(BruteForceGraphletCounter(_load_graph(file_name, num_edges), {}).count_graphlets(graphlet_size))
+
+
+def get_counts(graphlet_map):
+    """
+    Drop the graphlets of a graphlet map
+    :param graphlet_map: the map of key: graphlet hash, value: (graphlet, count)
+    :return: the map of key: graphlet hash, value: count
+    """
+    return {hash_key: count for hash_key, (_, count) in graphlet_map.items()}
+
+
+@pytest.fixture(scope="session")
+def load_graph():
+    """
+    Load a graph from a csv file of the tests folder, every file is read once per session
+    :return: the function of the file name and the number of leading edges to keep, None for all, returning the graph
+    """
+    return _load_graph
+
+
+@pytest.fixture(scope="session")
+def brute_force_counts():
+    """
+    Count the graphlets of a small graph with BruteForceGraphletCounter, once per session
+    :return: the function of the file name, the number of leading edges and the graphlet size returning the map of
+    key: graphlet hash, value: count
+    """
+    return _count_brute_force
+
+
+@pytest.fixture(params=SMALL_GRAPHS, ids=lambda small_graph: small_graph[0])
+def small_graph(request):
+    """
+    :return: (file name, number of leading edges) of every small graph
+    """
+    return request.param
+
+
+@pytest.fixture
+def census_config(tmp_path):
+    """
+    Build a config of an exact census from the config of the repository, writing its outputs to a temporary folder
+    :return: the function of the config overrides returning the config
+    """
+    with open(os.path.join(ROOT_DIR, "config.json"), 'r') as file:
+        base_config = json.load(file)
+
+    def make_config(**overrides):
+        config = copy.deepcopy(base_config)
+        config.update({"use_sampling": False, "use_markov_graph_generation": False, "node_order": None,
+                       "graphlet_sizes": [2, 3, 4]})
+        config["output"]["csv_output"]["folder"] = str(tmp_path)
+        config["output"]["visualizations"]["generate"] = False
+        config.update(overrides)
+        return config
+    return make_config
+
+
+@pytest.fixture
+def write_input_file(tmp_path):
+    """
+    Write the leading edges of a csv file of the tests folder to an input file of the temporary folder
+    :return: the function of the file name and the number of leading edges to keep, None for all, returning the
+    path of the input file
+    """
+    def write(file_name, num_edges=None):
+        rows = [row for row in load_data(os.path.join(TESTS_DIR, file_name)) if row[2] != 'unknown']
+        path = str(tmp_path / file_name)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["source", "target", "mode"])
+            writer.writerows(rows[:num_edges])
+        return path
+    return write
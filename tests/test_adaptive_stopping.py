@@ -0,0 +1,60 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+from main import run_graphlet_counting
+from util.adaptive_stopping import AdaptiveStopping
+
+
+def add_runs(stopping, counts):
+    """
+    Add census runs with the given counts of class a and a count of 1 of the rarer class b
+    :param stopping: the stopping rule
+    :param counts: the count of class a in every run
+    :return: list of (should_stop, relative error of class a) after every run
+    """
+    decisions = []
+    for count in counts:
+        stopping.add_run({"a": (None, count), "b": (None, 1)})
+        decisions.append((stopping.should_stop(), stopping.relative_error("a")))
+    return decisions
+
+
+def test_stops_at_min_runs_once_converged():
+    stopping = AdaptiveStopping(target_relative_error=0.05, top_n=2, min_runs=4)
+    assert [should_stop for should_stop, _ in add_runs(stopping, [10, 10, 10, 10])] == [False, False, False, True]
+
+
+def test_stops_once_relative_errors_fall_below_target():
+    stopping = AdaptiveStopping(target_relative_error=0.5, top_n=1, min_runs=2)
+    decisions = add_runs(stopping, [1, 100, 60, 50, 55, 45, 50, 52])
+    # past min_runs the rule fires exactly when the error of the tracked class is within the target
+    assert all(should_stop == (relative_error <= 0.5) for should_stop, relative_error in decisions[1:])
+    assert not decisions[2][0] and decisions[-1][0]
+
+
+def test_frequency_threshold_tracks_the_frequent_classes():
+    stopping = AdaptiveStopping(frequency_threshold=0.5, min_runs=2)
+    add_runs(stopping, [10, 10])
+    assert stopping.get_tracked_classes() == ["a"]
+    assert stopping.should_stop()
+
+
+def test_from_config():
+    assert AdaptiveStopping.from_config(None) is None
+    assert AdaptiveStopping.from_config({"enabled": False, "max_runs": 5}) is None
+    stopping = AdaptiveStopping.from_config({"enabled": True, "max_runs": 5, "min_runs": 1})
+    assert (stopping.max_runs, stopping.min_runs) == (5, 2)
+
+
+@pytest.mark.parametrize("target_relative_error, expected_runs", [
+    # an unreachable target runs until max_runs, a target every run meets stops at min_runs
+    (-1, 5),
+    (float("inf"), 3),
+])
+def test_census_runs_stop_at_the_rule(load_graph, target_relative_error, expected_runs):
+    graph = load_graph("thrust_mouse.csv", 80)
+    stopping = AdaptiveStopping(target_relative_error=target_relative_error, min_runs=3, max_runs=5)
+    graphlet_maps = run_graphlet_counting(graph, [2, 3], graph.get_num_nodes() // 2, 2, 10, 1,
+                                          DPGraphletCounter, {}, adaptive_stopping=stopping)
+    assert stopping.num_runs == expected_runs
+    assert sorted(graphlet_maps) == [2, 3] and graphlet_maps[3]
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from algorithm import DPGraphletCounter
+from conftest import get_counts
+from util.anytime import RootSampleEstimator
+
+
+def test_complete_estimate_is_exact():
+    estimator = RootSampleEstimator(3)
+    estimator.start_round()
+    estimator.add_root({3: {"a": 2}})
+    estimator.start_round()
+    for root_count_maps in [{3: {"a": 1, "b": 4}}, {3: {"b": 2}}]:
+        estimator.add_root(root_count_maps)
+    assert estimator.is_complete and estimator.completed_fraction == 1.0
+    assert estimator.estimate(3) == ({"a": 3, "b": 6}, {"a": 0.0, "b": 0.0})
+
+
+def test_partial_round_is_extrapolated():
+    estimator = RootSampleEstimator(10)
+    estimator.start_round()
+    for count in [5, 1]:
+        estimator.add_root({3: {"a": count}})
+    # the last round samples 3 of the 8 roots left
+    estimator.start_round()
+    round_counts = [2, 4, 0]
+    for count in round_counts:
+        estimator.add_root({3: {"a": count}})
+    counts, errors = estimator.estimate(3)
+    n, r = 8, len(round_counts)
+    mean = sum(round_counts) / r
+    variance = sum((count - mean) ** 2 for count in round_counts) / (r - 1)
+    assert not estimator.is_complete and estimator.completed_fraction == 0.5
+    assert counts["a"] == pytest.approx(6 + n * mean)
+    assert errors["a"] == pytest.approx(n * math.sqrt(variance * (1 - r / n) / r))
+
+
+def test_single_root_round_has_no_error_estimate():
+    estimator = RootSampleEstimator(4)
+    estimator.start_round()
+    estimator.add_root({3: {"a": 1}})
+    assert estimator.estimate(3) == ({"a": 4.0}, {"a": math.inf})
+
+
+def test_deadline_census_is_exact_when_complete(small_graph, load_graph, brute_force_counts):
+    counter = DPGraphletCounter(load_graph(*small_graph), {}, deadline=60, root_order_seed=1)
+    graphlet_maps = counter.count_graphlets_of_sizes([2, 3, 4])
+    assert counter.extras.completed_fraction == 1.0
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        assert get_counts(graphlet_map) == brute_force_counts(*small_graph, graphlet_size)
+        assert set(counter.extras.count_errors[graphlet_size].values()) <= {0.0}
+
+
+def test_resumed_deadline_census_refines_to_exact(load_graph, brute_force_counts):
+    # a deadline too short for more than a root or two per run
+    counter = DPGraphletCounter(load_graph("thrust_mouse.csv", 80), {}, deadline=1e-9, root_order_seed=1)
+    completed_fractions = []
+    while not completed_fractions or completed_fractions[-1] < 1.0:
+        graphlet_maps = counter.count_graphlets_of_sizes([2, 3, 4])
+        completed_fractions.append(counter.extras.completed_fraction)
+    assert len(completed_fractions) > 1 and completed_fractions == sorted(set(completed_fractions))
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        assert get_counts(graphlet_map) == brute_force_counts("thrust_mouse.csv", 80, graphlet_size)
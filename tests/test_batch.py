@@ -0,0 +1,68 @@
+import csv
+import os
+
+import pytest
+
+from conftest import TESTS_DIR, get_counts
+from main import run_batch, run_census
+
+# the last network has no group of size 4
+NETWORKS = ["test3", "test1", "test2"]
+
+
+@pytest.fixture
+def batch(census_config):
+    """
+    Run the batch census of the networks and their single censuses
+    :return: (the config, the comparison maps, map of key: network name, value: the single census)
+    """
+    config = census_config(batch_workers=2)
+    input_files = [os.path.join(TESTS_DIR, network_name + ".csv") for network_name in NETWORKS]
+    comparison_maps = run_batch(config, input_files)
+    modes = list(config["output"]["visualizations"]["mode_colors"])
+    censuses = {network_name: run_census(config, input_file, modes)
+                for network_name, input_file in zip(NETWORKS, input_files)}
+    return config, comparison_maps, censuses
+
+
+def read_comparison(config, graphlet_size):
+    """
+    Read a comparison file of the batch
+    :param config: the config
+    :param graphlet_size: the graphlet size
+    :return: list of rows as maps of key: column name, value: value
+    """
+    name = "Comparison_graphlet_size_{}_{}_{}_networks.csv".format(graphlet_size, config["algorithm_to_use"],
+                                                                   len(NETWORKS))
+    with open(os.path.join(config["output"]["csv_output"]["folder"], name), 'r') as file:
+        return list(csv.DictReader(file))
+
+
+def test_network_columns_match_single_censuses(batch):
+    _, comparison_maps, censuses = batch
+    assert sorted(comparison_maps) == [2, 3, 4]
+    for graphlet_size, network_maps in comparison_maps.items():
+        assert list(network_maps) == NETWORKS
+        for network_name, graphlet_map in network_maps.items():
+            assert get_counts(graphlet_map) == get_counts(censuses[network_name][graphlet_size])
+    assert not comparison_maps[4]["test2"]
+
+
+def test_comparison_files(batch):
+    config, comparison_maps, _ = batch
+    for graphlet_size, network_maps in comparison_maps.items():
+        rows = read_comparison(config, graphlet_size)
+        assert len(rows) == len(set().union(*network_maps.values()))
+        for row in rows:
+            graphlet_key = int(row["Graphlet Key"])
+            # the example comes from the first network with the class
+            example_network = next(network_name for network_name in NETWORKS
+                                   if graphlet_key in network_maps[network_name])
+            assert row["Example Network"] == example_network
+            assert tuple(row["Example Nodes"].split(";")) == network_maps[example_network][graphlet_key][0]
+            for network_name, graphlet_map in network_maps.items():
+                total = sum(count for _, count in graphlet_map.values())
+                count = graphlet_map[graphlet_key][1] if graphlet_key in graphlet_map else 0
+                assert float(row[network_name]) == pytest.approx(count / total if total else 0)
+    # the networks share classes, whose examples come from the first network
+    assert any(row["Example Network"] == "test3" and float(row["test1"]) for row in read_comparison(config, 3))
@@ -0,0 +1,21 @@
+import os
+
+from algorithm import BruteForceGraphletCounter
+from conftest import get_counts
+
+
+def test_worker_processes_match_one_process(load_graph, brute_force_counts):
+    graph = load_graph("thrust_human.csv", 80)
+    counter = BruteForceGraphletCounter(graph, {}, num_workers=2, reservoir_size=2)
+    counts = get_counts(counter.count_graphlets(3))
+    assert counts == brute_force_counts("thrust_human.csv", 80, 3)
+    examples = counter.extras.graphlet_examples[3]
+    assert {hash_key: examples[hash_key].num_seen for hash_key in examples} == counts
+
+
+def test_frequent_graphlet_stats_only_log(load_graph, tmp_path, monkeypatch):
+    counter = BruteForceGraphletCounter(load_graph("test1.csv"), {})
+    counter.count_graphlets(3)
+    monkeypatch.chdir(tmp_path)
+    counter.display_frequent_graphlet_stats(count=3, name="brute_force")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,84 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server.census_server import CensusServer, CensusService
+
+GRAPH = ("thrust_human.csv", 80)
+GRAPH_NAME = "graph"
+
+
+def query(base_url, path, body=None):
+    """
+    Send a query to the server
+    :param base_url: the url of the server
+    :param path: the path of the query
+    :param body: the json body of a POST query, None for a GET query
+    :return: (http status, json response)
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture(scope="module")
+def base_url(load_graph):
+    """
+    Serve the graph on a free localhost port for the tests of the module
+    :return: the url of the server
+    """
+    server = CensusServer(CensusService({GRAPH_NAME: load_graph(*GRAPH)}, {}, num_workers=2), port=0)
+    server.start()
+    yield "http://{}:{}".format(*server.address[:2])
+    server.shutdown()
+
+
+def get_body_counts(body):
+    return {graphlet["key"]: graphlet["count"] for graphlet in body["graphlets"]}
+
+
+def test_health_and_graphs(base_url, load_graph):
+    assert query(base_url, "/health") == (200, {"status": "ok"})
+    status, body = query(base_url, "/graphs")
+    assert status == 200 and body["graphs"][0]["nodes"] == load_graph(*GRAPH).get_num_nodes()
+
+
+@pytest.mark.parametrize("graphlet_size", [3, 4])
+def test_census_matches_brute_force(base_url, brute_force_counts, graphlet_size):
+    # the second query is answered from the cache
+    for _ in range(2):
+        status, body = query(base_url, "/census", {"graph": GRAPH_NAME, "graphlet_size": graphlet_size})
+        assert status == 200
+        assert get_body_counts(body) == brute_force_counts(*GRAPH, graphlet_size)
+
+
+def test_sample_ego_and_seeds(base_url, load_graph, brute_force_counts):
+    graph = load_graph(*GRAPH)
+    node_name = max(graph.get_nodes(), key=lambda name: len(graph.get_node(name).undirected_edges))
+    status, body = query(base_url, "/sample", {"graph": GRAPH_NAME, "graphlet_size": 3,
+                                               "sample_size": graph.get_num_nodes() // 2, "num_of_samples": 2})
+    assert status == 200 and body["num_of_graphlets"] > 0
+    status, body = query(base_url, "/ego", {"graph": GRAPH_NAME, "node": node_name, "graphlet_size": 3})
+    assert status == 200 and body["num_of_graphlets"] > 0
+    status, body = query(base_url, "/seeds", {"graph": GRAPH_NAME, "seeds": list(graph.get_nodes()),
+                                              "graphlet_size": 3})
+    assert status == 200
+    assert get_body_counts(body) == brute_force_counts(*GRAPH, 3)
+
+
+@pytest.mark.parametrize("path, body, error", [
+    ("/census", {"graph": GRAPH_NAME, "graphlet_size": 0}, "graphlet_size"),
+    ("/census", {"graph": "missing", "graphlet_size": 3}, "missing"),
+    ("/census", {"graph": GRAPH_NAME, "graphlet_size": 3, "algorithm": "BFSGraphletCounter"}, "BFSGraphletCounter"),
+    ("/sample", {"graph": GRAPH_NAME, "graphlet_size": 3, "sample_size": 5, "num_of_samples": 0}, "num_of_samples"),
+    ("/sample", {"graph": GRAPH_NAME, "graphlet_size": 3, "sample_size": 5, "num_of_samples": -1}, "num_of_samples"),
+])
+def test_invalid_queries_are_rejected(base_url, path, body, error):
+    status, response = query(base_url, path, body)
+    assert status == 400 and error in response["error"]
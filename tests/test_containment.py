@@ -0,0 +1,88 @@
+import itertools
+
+import pytest
+
+from algorithm import DPGraphletCounter
+from graph import ContainmentMatrix, Graph, Graphlet, containment
+
+GRAPH = ("thrust_human.csv", 80)
+
+
+def count_non_induced(graph, node_groups):
+    """
+    Count the non-induced graphlets of node groups by trying every subset of their induced edges
+    :param graph: the graph
+    :param node_groups: iterable of node name tuples
+    :return: the map of key: graphlet hash, value: count
+    """
+    modes = sorted(graph.mode_map, key=graph.mode_map.get)
+    counts = {}
+    for node_group in node_groups:
+        edges = [(node_name, target_name, mode) for node_name in node_group
+                 for mode, targets in graph.get_node(node_name).edges.items()
+                 for target_name in targets if target_name in node_group]
+        for size in range(len(node_group) - 1, len(edges) + 1):
+            for subset in itertools.combinations(edges, size):
+                subgraph = Graph()
+                for mode in modes:
+                    subgraph.register_mode(mode)
+                for source_name, target_name, mode in subset:
+                    subgraph.add_edge(source_name, target_name, mode)
+                if not is_connected(subgraph, node_group):
+                    continue
+                hash_key = hash(Graphlet([subgraph.get_node(node_name) for node_name in sorted(node_group)],
+                                         subgraph))
+                counts[hash_key] = counts.get(hash_key, 0) + 1
+    return counts
+
+
+def is_connected(subgraph, node_group):
+    """
+    Check if the edges of a subgraph connect all nodes of a group
+    :param subgraph: the graph of the edges
+    :param node_group: tuple of node names
+    :return: True if the group is one component
+    """
+    if set(subgraph.get_nodes()) != set(node_group):
+        return False
+    seen = {node_group[0]}
+    stack = [node_group[0]]
+    while stack:
+        for neighbor_name in subgraph.get_node(stack.pop()).undirected_edges:
+            if neighbor_name not in seen:
+                seen.add(neighbor_name)
+                stack.append(neighbor_name)
+    return len(seen) == len(node_group)
+
+
+@pytest.mark.parametrize("graphlet_size", [3, 4])
+def test_non_induced_counts_match_edge_subsets(load_graph, graphlet_size):
+    graph = load_graph(*GRAPH)
+    # a reservoir larger than any class keeps every group of the class
+    counter = DPGraphletCounter(graph, {}, reservoir_size=10 ** 6)
+    graphlet_map = counter.count_graphlets(graphlet_size)
+    node_groups = [node_group for reservoir in counter.extras.graphlet_examples[graphlet_size].values()
+                   for node_group in reservoir.items]
+    non_induced_map = ContainmentMatrix(graph.mode_map).transform(graphlet_map)
+    assert {hash_key: count for hash_key, (_, count) in non_induced_map.items()} == \
+        count_non_induced(graph, node_groups)
+
+
+def test_edge_subset_limit_is_an_error(load_graph, monkeypatch):
+    graph = load_graph(*GRAPH)
+    graphlet_map = DPGraphletCounter(graph, {}).count_graphlets(4)
+    num_subsets = {hash_key: sum(ContainmentMatrix(graph.mode_map).get_row(g, hash_key).values())
+                   for hash_key, (g, _) in graphlet_map.items()}
+    monkeypatch.setattr(containment, "MAX_EDGE_SUBSETS", 1)
+    containment_matrix = ContainmentMatrix(graph.mode_map)
+    dense_keys = [hash_key for hash_key, num in num_subsets.items() if num > 1]
+    assert dense_keys
+    for hash_key in dense_keys:
+        with pytest.raises(ValueError, match="connecting edge subsets"):
+            containment_matrix.get_row(graphlet_map[hash_key][0], hash_key)
+    # the classes over the limit are reported and left out, the others are still counted in full
+    skipped_keys = []
+    non_induced_map = containment_matrix.transform(graphlet_map, skipped_keys)
+    assert sorted(skipped_keys) == sorted(dense_keys)
+    assert sum(count for _, count in non_induced_map.values()) == \
+        sum(count for hash_key, (_, count) in graphlet_map.items() if hash_key not in dense_keys)
@@ -0,0 +1,72 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+from conftest import get_counts
+from graph.ordering import NODE_ORDERINGS
+
+GRAPHLET_SIZES = [2, 3, 4]
+
+
+def count_sizes(graph, **options):
+    return {size: get_counts(graphlet_map)
+            for size, graphlet_map in DPGraphletCounter(graph, {}, **options).count_graphlets_of_sizes(
+                GRAPHLET_SIZES).items()}
+
+
+def check_sizes(small_graph, brute_force_counts, counts):
+    for size in GRAPHLET_SIZES:
+        assert counts[size] == brute_force_counts(*small_graph, size), "graphlet size {}".format(size)
+
+
+@pytest.mark.parametrize("node_order", NODE_ORDERINGS)
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_multi_size_census_matches_brute_force(load_graph, brute_force_counts, small_graph, node_order, batch_size):
+    graph = load_graph(*small_graph)
+    check_sizes(small_graph, brute_force_counts, count_sizes(graph, node_order=node_order, batch_size=batch_size))
+
+
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_single_size_census_matches_brute_force(load_graph, brute_force_counts, small_graph, batch_size):
+    graph = load_graph(*small_graph)
+    assert get_counts(DPGraphletCounter(graph, {}, batch_size=batch_size).count_graphlets(3)) == \
+        brute_force_counts(*small_graph, 3)
+
+
+@pytest.mark.parametrize("hub_degree_threshold", [2, 4])
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_hub_star_census_matches_brute_force(load_graph, brute_force_counts, small_graph, hub_degree_threshold,
+                                             batch_size):
+    graph = load_graph(*small_graph)
+    check_sizes(small_graph, brute_force_counts, count_sizes(graph, hub_degree_threshold=hub_degree_threshold,
+                                                             batch_size=batch_size))
+
+
+def test_spilled_census_matches_brute_force(load_graph, brute_force_counts, small_graph, tmp_path):
+    graph = load_graph(*small_graph)
+    # a budget of a few groups spills every level with more groups
+    check_sizes(small_graph, brute_force_counts, count_sizes(graph, memory_budget_mb=0.001, spill_dir=str(tmp_path)))
+
+
+@pytest.mark.parametrize("num_shards", [1, 3])
+def test_shards_add_up_to_census(load_graph, brute_force_counts, small_graph, num_shards):
+    graph = load_graph(*small_graph)
+    total_counts = {size: {} for size in GRAPHLET_SIZES}
+    for shard_index in range(num_shards):
+        for size, counts in count_sizes(graph, shard=(shard_index, num_shards)).items():
+            for hash_key, count in counts.items():
+                total_counts[size][hash_key] = total_counts[size].get(hash_key, 0) + count
+    check_sizes(small_graph, brute_force_counts, total_counts)
+
+
+def test_hub_star_census_keeps_examples_of_every_class(load_graph, brute_force_counts, small_graph):
+    graph = load_graph(*small_graph)
+    counter = DPGraphletCounter(graph, {}, reservoir_size=3, hub_degree_threshold=2)
+    counts = {size: get_counts(graphlet_map) for size, graphlet_map in
+              counter.count_graphlets_of_sizes(GRAPHLET_SIZES).items()}
+    check_sizes(small_graph, brute_force_counts, counts)
+    for size in GRAPHLET_SIZES:
+        examples = counter.extras.graphlet_examples.get(size, {})
+        assert set(examples) == set(counts[size])
+        for hash_key, count in counts[size].items():
+            assert len(examples[hash_key].items) == min(3, count)
+            assert examples[hash_key].num_seen == count
@@ -0,0 +1,48 @@
+import pytest
+
+from algorithm import DPGraphletCounter, EgoGraphletCounter
+from algorithm.mode_constraint import ModeConstraint
+from conftest import get_counts
+
+
+@pytest.mark.parametrize("graphlet_size", [2, 3, 4])
+def test_all_seeds_match_census(load_graph, brute_force_counts, small_graph, graphlet_size):
+    graph = load_graph(*small_graph)
+    counter = EgoGraphletCounter(graph, {})
+    assert get_counts(counter.count_graphlets(graphlet_size, list(graph.get_nodes()))) == \
+        brute_force_counts(*small_graph, graphlet_size)
+    # no seeds count the whole graph as well
+    assert get_counts(counter.count_graphlets(graphlet_size)) == brute_force_counts(*small_graph, graphlet_size)
+
+
+def test_single_seeds_count_their_groups(load_graph, brute_force_counts):
+    graph = load_graph("thrust_human.csv", 80)
+    counter = EgoGraphletCounter(graph, {})
+    # every group of 3 nodes is counted once per node it holds
+    seed_total = sum(sum(get_counts(counter.count_graphlets(3, [seed])).values()) for seed in graph.get_nodes())
+    assert seed_total == 3 * sum(brute_force_counts("thrust_human.csv", 80, 3).values())
+
+
+@pytest.mark.parametrize("mode_constraint", [ModeConstraint(allowed_modes=["activation"]),
+                                             ModeConstraint(min_counts={"repression": 1}, max_counts={"activation": 1}),
+                                             ModeConstraint(require_cycle=True)])
+def test_mode_constraint_matches_census(load_graph, small_graph, mode_constraint):
+    graph = load_graph(*small_graph)
+    counter = EgoGraphletCounter(graph, {}, mode_constraint=mode_constraint)
+    for graphlet_size in [2, 3]:
+        assert get_counts(counter.count_graphlets(graphlet_size, list(graph.get_nodes()))) == \
+            get_counts(DPGraphletCounter(graph, {}, mode_constraint).count_graphlets(graphlet_size))
+
+
+def test_several_sizes_count_the_seed_groups(load_graph):
+    graph = load_graph("thrust_mouse.csv", 80)
+    seeds = sorted(graph.get_nodes())[:3]
+    counter = EgoGraphletCounter(graph, {}, seeds=seeds)
+    expected = {graphlet_size: get_counts(EgoGraphletCounter(graph, {}).count_graphlets(graphlet_size, seeds))
+                for graphlet_size in [2, 3, 4]}
+    assert {graphlet_size: get_counts(graphlet_map)
+            for graphlet_size, graphlet_map in counter.count_graphlets_of_sizes([4, 2, 3]).items()} == expected
+    # seeds given to the call replace the seeds of the constructor
+    assert get_counts(counter.count_graphlets_of_sizes([3], seeds[:1])[3]) == \
+        get_counts(counter.count_graphlets(3, seeds[:1]))
+    assert sum(expected[3].values()) < sum(get_counts(DPGraphletCounter(graph, {}).count_graphlets(3)).values())
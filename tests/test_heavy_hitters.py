@@ -0,0 +1,53 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+
+
+def get_num_guaranteed(count_map, count_bounds, missing_bound):
+    """
+    Get the number of leading tracked classes whose lower bound is at least the count of every class after them
+    :return: the number of guaranteed classes
+    """
+    top = sorted(count_map.items(), key=lambda item: item[1][1], reverse=True)
+    min_lower_bound = float("inf")
+    num_guaranteed = 0
+    for i, (hash_key, (_, count)) in enumerate(top):
+        min_lower_bound = min(min_lower_bound, count - count_bounds[hash_key])
+        if min_lower_bound >= (top[i + 1][1][1] if i + 1 < len(top) else missing_bound):
+            num_guaranteed = i + 1
+    return num_guaranteed
+
+
+@pytest.fixture(scope="module")
+def exact(load_graph):
+    return DPGraphletCounter(load_graph("thrust_mouse.csv"), {}, batch_size=1000).count_graphlets(3)
+
+
+@pytest.mark.parametrize("batch_size", [None, 7, 1000])
+@pytest.mark.parametrize("heavy_hitters", [10, 40])
+def test_guaranteed_top_classes_match_exact_census(load_graph, exact, batch_size, heavy_hitters):
+    graph = load_graph("thrust_mouse.csv")
+    counter = DPGraphletCounter(graph, {}, batch_size=batch_size, heavy_hitters=heavy_hitters)
+    tracked = counter.count_graphlets(3)
+    count_bounds = counter.extras.count_bounds[3]
+    missing_bound = counter.extras.missing_bounds[3]
+
+    assert len(tracked) == heavy_hitters
+    for hash_key, (_, count) in tracked.items():
+        true_count = exact[hash_key][1] if hash_key in exact else 0
+        assert true_count <= count <= true_count + count_bounds[hash_key]
+    assert all(count <= missing_bound for hash_key, (_, count) in exact.items() if hash_key not in tracked)
+
+    num_guaranteed = get_num_guaranteed(tracked, count_bounds, missing_bound)
+    assert num_guaranteed > 0
+    exact_top = sorted(exact, key=lambda hash_key: exact[hash_key][1], reverse=True)
+    tracked_top = sorted(tracked, key=lambda hash_key: tracked[hash_key][1], reverse=True)
+    assert set(tracked_top[:num_guaranteed]) == set(exact_top[:num_guaranteed])
+
+
+def test_batch_class_cache_stays_at_sketch_size(load_graph):
+    graph = load_graph("thrust_mouse.csv")
+    counter = DPGraphletCounter(graph, {}, batch_size=7, heavy_hitters=10)
+    counter.count_graphlets(3)
+    assert counter._batch_classifier.num_classes <= 10
+    assert len(counter._class_graphlets) <= 10
@@ -0,0 +1,50 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+from algorithm.mode_constraint import ModeConstraint
+from conftest import get_counts
+
+MODE_CONSTRAINTS = [ModeConstraint(allowed_modes=["activation"]),
+                    ModeConstraint(allowed_modes=["repression"], min_counts={"repression": 2}),
+                    ModeConstraint(min_counts={"repression": 1}, max_counts={"activation": 1}),
+                    ModeConstraint(require_cycle=True),
+                    ModeConstraint(require_cycle=True, cycle_modes=["activation"])]
+
+
+def count_satisfied(graph, mode_constraint, graphlet_size):
+    """
+    Count the graphlets of a full census whose groups meet a mode constraint
+    :param graph: the graph
+    :param mode_constraint: the mode constraint
+    :param graphlet_size: the size of the graphlet
+    :return: the map of key: graphlet hash, value: count
+    """
+    # a reservoir larger than any class keeps every group of the class
+    counter = DPGraphletCounter(graph, {}, reservoir_size=10 ** 6)
+    counter.count_graphlets(graphlet_size)
+    counts = {}
+    for hash_key, reservoir in counter.extras.graphlet_examples.get(graphlet_size, {}).items():
+        num_satisfied = sum(mode_constraint.is_satisfied(graph, node_group) for node_group in reservoir.items)
+        if num_satisfied:
+            counts[hash_key] = num_satisfied
+    return counts
+
+
+@pytest.mark.parametrize("mode_constraint", MODE_CONSTRAINTS)
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_pruned_census_matches_filtered_census(load_graph, small_graph, mode_constraint, batch_size):
+    graph = load_graph(*small_graph)
+    for graphlet_size in [2, 3, 4]:
+        counter = DPGraphletCounter(graph, {}, mode_constraint, batch_size=batch_size)
+        assert get_counts(counter.count_graphlets(graphlet_size)) == \
+            count_satisfied(graph, mode_constraint, graphlet_size), "graphlet size {}".format(graphlet_size)
+
+
+def test_from_config():
+    assert ModeConstraint.from_config(None) is None
+    assert ModeConstraint.from_config({}) is None
+    mode_constraint = ModeConstraint.from_config({"allowed_modes": ["repression"], "min_counts": {"repression": 2},
+                                                  "require_cycle": True})
+    assert mode_constraint.allowed_modes == {"repression"}
+    assert mode_constraint.min_counts == {"repression": 2} and mode_constraint.max_counts == {}
+    assert mode_constraint.require_cycle and mode_constraint.cycle_modes is None
@@ -0,0 +1,23 @@
+import pytest
+
+from algorithm import DPGraphletCounter, MotifMatcher
+from conftest import get_counts
+from graph import Graphlet
+
+
+@pytest.mark.parametrize("graphlet_size", [2, 3, 4])
+def test_matcher_counts_match_census(load_graph, brute_force_counts, small_graph, graphlet_size):
+    graph = load_graph(*small_graph)
+    census = DPGraphletCounter(graph, {}).count_graphlets(graphlet_size)
+    assert get_counts(census) == brute_force_counts(*small_graph, graphlet_size)
+    for hash_key, (g, count) in census.items():
+        assert MotifMatcher(graph, g).count() == count
+
+
+def test_matcher_lists_distinct_induced_occurrences(load_graph):
+    graph = load_graph("thrust_mouse.csv", 80)
+    for hash_key, (g, count) in DPGraphletCounter(graph, {}).count_graphlets(3).items():
+        node_sets = {frozenset(occurrence) for occurrence in MotifMatcher(graph, g).occurrences()}
+        assert len(node_sets) == count
+        for node_set in node_sets:
+            assert hash(Graphlet([graph.get_node(node_name) for node_name in node_set], graph)) == hash_key
@@ -0,0 +1,35 @@
+from collections import Counter
+
+import pytest
+
+from graph import ConfigurationModel
+
+
+def get_degrees(graph):
+    """
+    Count the out and in degrees of every node in every mode
+    :return: (counter of (node name, mode) out edges, counter of (node name, mode) in edges)
+    """
+    edges = graph.get_edges()
+    return Counter((source_name, mode) for source_name, _, mode in edges), \
+        Counter((target_name, mode) for _, target_name, mode in edges)
+
+
+@pytest.mark.parametrize("graph_file", [("thrust_human.csv", 80), ("thrust_mouse.csv", 80), ("thrust_human.csv", None)])
+def test_null_models_keep_the_degrees(load_graph, graph_file):
+    graph = load_graph(*graph_file)
+    self_loops = sorted(edge for edge in graph.get_edges() if edge[0] == edge[1])
+    for null_graph in ConfigurationModel(graph, seed=1).generate(3):
+        edges = null_graph.get_edges()
+        assert get_degrees(null_graph) == get_degrees(graph)
+        assert null_graph.mode_map == graph.mode_map
+        # the self loops of the graph are kept and no other edge is a self loop or repeated
+        assert sorted(edge for edge in edges if edge[0] == edge[1]) == self_loops
+        assert len(set(edges)) == len(edges)
+
+
+def test_null_models_are_seeded_and_independent(load_graph):
+    graph = load_graph("thrust_human.csv", 80)
+    first, second = [sorted(null_graph.get_edges()) for null_graph in ConfigurationModel(graph, seed=2).generate(2)]
+    assert first != second and first != sorted(graph.get_edges())
+    assert sorted(ConfigurationModel(graph, seed=2).sample().get_edges()) == first
@@ -0,0 +1,67 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+from conftest import get_counts
+from graph import NODE_ORDERINGS, get_node_order
+from graph.ordering import get_undirected_degrees
+
+
+def get_neighbors(graph, node_name):
+    """
+    :return: the undirected neighbor names of a node without the node itself
+    """
+    return set(graph.get_node(node_name).undirected_edges) - {node_name}
+
+
+@pytest.mark.parametrize("ordering", NODE_ORDERINGS)
+def test_orderings_rank_every_node_once(load_graph, small_graph, ordering):
+    graph = load_graph(*small_graph)
+    order = get_node_order(graph, ordering)
+    assert sorted(order) == sorted(graph.get_nodes())
+
+
+def test_degree_order_puts_hubs_last(load_graph, small_graph):
+    graph = load_graph(*small_graph)
+    degrees = get_undirected_degrees(graph)
+    order = get_node_order(graph, "degree")
+    assert [degrees[node_name] for node_name in order] == sorted(degrees.values())
+
+
+def test_degeneracy_order_removes_a_node_of_minimum_degree(load_graph, small_graph):
+    graph = load_graph(*small_graph)
+    order = get_node_order(graph, "degeneracy")
+    for i, node_name in enumerate(order):
+        remaining = set(order[i:])
+        remaining_degrees = {name: len(get_neighbors(graph, name) & remaining) for name in remaining}
+        assert remaining_degrees[node_name] == min(remaining_degrees.values())
+
+
+def test_rcm_order_is_a_breadth_first_search_per_component(load_graph, small_graph):
+    graph = load_graph(*small_graph)
+    order = list(reversed(get_node_order(graph, "rcm")))
+    positions = {node_name: i for i, node_name in enumerate(order)}
+    last_parent = -1
+    for i, node_name in enumerate(order):
+        earlier = [positions[neighbor_name] for neighbor_name in get_neighbors(graph, node_name)
+                   if positions[neighbor_name] < i]
+        if earlier:
+            # the parent of a node is its earliest neighbor, and parents are dequeued in order
+            assert min(earlier) >= last_parent
+            last_parent = min(earlier)
+        else:
+            # a new component starts once the earlier components are complete
+            assert all(positions[neighbor_name] < i for other in order[:i] for neighbor_name in
+                       get_neighbors(graph, other))
+            last_parent = i
+
+
+@pytest.mark.parametrize("ordering", NODE_ORDERINGS)
+def test_orderings_keep_the_counts(load_graph, small_graph, brute_force_counts, ordering):
+    graph = load_graph(*small_graph)
+    counter = DPGraphletCounter(graph, {}, node_order=ordering)
+    assert get_counts(counter.count_graphlets(4)) == brute_force_counts(*small_graph, 4)
+
+
+def test_unknown_ordering_is_an_error(load_graph):
+    with pytest.raises(ValueError, match="Unknown node ordering"):
+        get_node_order(load_graph("test1.csv"), "random")
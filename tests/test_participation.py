@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from algorithm import DPGraphletCounter
+from util.participation import ParticipationMatrix
+
+
+def to_dense(participation):
+    """
+    Build the dense matrix of a participation matrix from its CSR arrays
+    :return: the (nodes x classes) array
+    """
+    data, indices, indptr, shape = participation.to_csr()
+    dense = np.zeros(shape)
+    for row in range(shape[0]):
+        dense[row, indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+    return dense
+
+
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_participation_matches_the_groups(load_graph, small_graph, batch_size):
+    graph = load_graph(*small_graph)
+    # a reservoir larger than any class keeps every group of the class
+    counter = DPGraphletCounter(graph, {}, batch_size=batch_size, reservoir_size=10 ** 6, collect_participation=True)
+    graphlet_map = counter.count_graphlets(3)
+    if not graphlet_map:
+        return
+    participation = counter.extras.participation[3]
+    rows = {node_name: i for i, node_name in enumerate(participation.node_names)}
+    columns = {hash_key: i for i, hash_key in enumerate(participation.class_keys)}
+    expected = np.zeros((len(rows), len(columns)))
+    for hash_key, reservoir in counter.extras.graphlet_examples[3].items():
+        for node_group in reservoir.items:
+            for node_name in node_group:
+                expected[rows[node_name], columns[hash_key]] += 1
+    dense = to_dense(participation)
+    assert np.array_equal(dense, expected)
+    # every group is counted once per node
+    assert {hash_key: dense[:, column].sum() / 3 for hash_key, column in columns.items()} == \
+        {hash_key: count for hash_key, (_, count) in graphlet_map.items()}
+
+
+def test_merge_matches_names_and_hashes():
+    first = ParticipationMatrix(["a", "b", "c"])
+    first.add_group(1, ("a", "b", "c"))
+    first.add_group(2, ("a", "b", "c"))
+    second = ParticipationMatrix(["c", "d", "a"])
+    second.add_group(2, ("c", "d", "a"))
+    second.add_group(3, ("c", "d", "a"))
+    first.merge(second)
+    first.scale(0.5)
+    assert first.node_names == ["a", "b", "c", "d"] and first.class_keys == [1, 2, 3]
+    assert np.array_equal(to_dense(first), [[0.5, 1, 0.5], [0.5, 0.5, 0], [0.5, 1, 0.5], [0, 0.5, 0.5]])
+
+
+def test_saved_matrix_loads_with_scipy(tmp_path):
+    sparse = pytest.importorskip("scipy.sparse")
+    participation = ParticipationMatrix(["a", "b", "c", "d"])
+    participation.add_groups(7, np.array([[0, 1, 2], [1, 2, 3]]))
+    file_name = str(tmp_path / "participation.npz")
+    participation.save(file_name)
+    assert np.array_equal(sparse.load_npz(file_name).toarray(), to_dense(participation))
+    with np.load(file_name) as arrays:
+        assert arrays["node_names"].tolist() == ["a", "b", "c", "d"] and arrays["class_keys"].tolist() == [7]
@@ -0,0 +1,56 @@
+import pytest
+
+from algorithm.planner import Planner
+from util.sampled_moments import SampledCountMoments
+
+GRAPH = ("thrust_human.csv", 80)
+
+
+def fixed_estimate(engines):
+    """
+    :return: an estimate method returning fixed engine costs, so the plans do not depend on timings
+    """
+    return lambda graphlet_sizes: {"num_groups": {}, "num_classes": 0, "engines": engines}
+
+
+def test_estimate_of_every_root_is_exact(load_graph, brute_force_counts):
+    graph = load_graph(*GRAPH)
+    estimate = Planner(graph, num_roots=graph.get_num_nodes(), seed=1).estimate([3, 4])
+    for size in [3, 4]:
+        assert estimate["num_groups"][size] == pytest.approx(sum(brute_force_counts(*GRAPH, size).values()))
+    assert estimate["num_classes"] == len(brute_force_counts(*GRAPH, 3)) + len(brute_force_counts(*GRAPH, 4))
+    assert set(estimate["engines"]) == {"DPGraphletCounter", "BruteForceGraphletCounter"}
+
+
+@pytest.mark.parametrize("num_roots", [5, 20])
+def test_estimate_of_sampled_roots_is_positive(load_graph, num_roots):
+    estimate = Planner(load_graph(*GRAPH), num_roots=num_roots, seed=2).estimate([3])
+    assert estimate["num_groups"][1] == pytest.approx(load_graph(*GRAPH).get_num_nodes())
+    for seconds, megabytes in estimate["engines"].values():
+        assert seconds >= 0 and megabytes > 0
+
+
+def test_plan_picks_the_fastest_fitting_counter(load_graph, monkeypatch):
+    planner = Planner(load_graph(*GRAPH), seed=3)
+    monkeypatch.setattr(planner, "estimate", fixed_estimate({"DPGraphletCounter": (2.0, 10.0),
+                                                             "BruteForceGraphletCounter": (1.0, 50.0)}))
+    assert planner.plan([3], 100, 100)["algorithm_to_use"] == "BruteForceGraphletCounter"
+    # the brute force counter does not fit the memory budget
+    assert planner.plan([3], 100, 20)["algorithm_to_use"] == "DPGraphletCounter"
+    # an option only the DP supports keeps the planner on the DP
+    plan = planner.plan([3], 100, 100, options={"heavy_hitters": 10, "mode_constraints": None})
+    assert plan["algorithm_to_use"] == "DPGraphletCounter" and not plan["use_sampling"]
+
+
+def test_plan_samples_when_nothing_fits(load_graph, monkeypatch):
+    planner = Planner(load_graph(*GRAPH), seed=4)
+    num_nodes = load_graph(*GRAPH).get_num_nodes()
+    monkeypatch.setattr(planner, "estimate", fixed_estimate({"DPGraphletCounter": (100.0, 10.0),
+                                                             "BruteForceGraphletCounter": (1000.0, 1.0)}))
+    plan = planner.plan([3, 4], 10, 100)
+    assert plan["algorithm_to_use"] == "DPGraphletCounter" and plan["use_sampling"]
+    # the largest sample whose expected share of the groups of 4 nodes fits the time budget
+    sample_size = plan["sample_size"]
+    assert 4 <= sample_size < num_nodes
+    assert SampledCountMoments.inclusion_probability(num_nodes, sample_size, 4) <= 0.1
+    assert SampledCountMoments.inclusion_probability(num_nodes, sample_size + 1, 4) > 0.1
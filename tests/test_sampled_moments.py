@@ -0,0 +1,31 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from algorithm import DPGraphletCounter
+
+# the graph is small enough to enumerate every sample of SAMPLE_SIZE nodes
+GRAPH = ("thrust_human.csv", 12)
+SAMPLE_SIZE = 6
+
+
+@pytest.mark.parametrize("graphlet_size", [3, 4])
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_moments_match_every_sample(load_graph, graphlet_size, batch_size):
+    graph = load_graph(*GRAPH)
+    node_names = sorted(graph.get_nodes())
+    # a reservoir larger than any class keeps every group of the class
+    counter = DPGraphletCounter(graph, {}, batch_size=batch_size, reservoir_size=10 ** 6,
+                                collect_sampled_moments=True)
+    counter.count_graphlets(graphlet_size)
+    expectations, variances = counter.extras.sampled_moments[graphlet_size].expected_counts(len(node_names),
+                                                                                            SAMPLE_SIZE)
+    groups = {hash_key: [set(node_group) for node_group in reservoir.items]
+              for hash_key, reservoir in counter.extras.graphlet_examples[graphlet_size].items()}
+    assert set(expectations) == set(groups)
+    samples = [set(sample) for sample in itertools.combinations(node_names, SAMPLE_SIZE)]
+    for hash_key, class_groups in groups.items():
+        sampled_counts = np.array([sum(node_group <= sample for node_group in class_groups) for sample in samples])
+        assert expectations[hash_key] == pytest.approx(sampled_counts.mean())
+        assert variances[hash_key] == pytest.approx(sampled_counts.var(), abs=1e-9)
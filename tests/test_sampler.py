@@ -0,0 +1,78 @@
+import pytest
+
+from graph import ForestFireSampler, RandomWalkSampler, Sampler, SnowballSampler, UniformSampler
+
+GRAPH = ("thrust_human.csv", 80)
+SAMPLERS = [UniformSampler, SnowballSampler, ForestFireSampler, RandomWalkSampler]
+
+
+@pytest.fixture(scope="module")
+def component(load_graph):
+    """
+    :return: the largest connected component of the graph, the ego network of its highest degree node
+    """
+    graph = load_graph(*GRAPH)
+    node_name = max(graph.get_nodes(), key=lambda name: len(graph.get_node(name).undirected_edges))
+    return graph.get_ego_network(node_name, graph.get_num_nodes())
+
+
+def count_components(graph):
+    """
+    Count the connected components of a graph
+    :param graph: the graph
+    :return: the number of components
+    """
+    seen = set()
+    num_components = 0
+    for node_name in graph.get_nodes():
+        if node_name in seen:
+            continue
+        num_components += 1
+        seen.add(node_name)
+        stack = [node_name]
+        while stack:
+            for neighbor_name in graph.get_node(stack.pop()).undirected_edges:
+                if neighbor_name not in seen:
+                    seen.add(neighbor_name)
+                    stack.append(neighbor_name)
+    return num_components
+
+
+@pytest.mark.parametrize("sampler_class", SAMPLERS)
+@pytest.mark.parametrize("num_nodes", [1, 10, 40])
+def test_samples_are_seeded_node_sets(load_graph, sampler_class, num_nodes):
+    graph = load_graph(*GRAPH)
+    sample = sampler_class(seed=1).sample_nodes(graph, num_nodes)
+    assert len(sample) == num_nodes and sample <= set(graph.get_nodes())
+    assert sampler_class(seed=1).sample_nodes(graph, num_nodes) == sample
+
+
+@pytest.mark.parametrize("sampler_class", SAMPLERS)
+def test_sample_graph_is_induced(load_graph, sampler_class):
+    graph = load_graph(*GRAPH)
+    sample_graph = graph.sample(20, sampler_class(seed=2))
+    sample = set(sample_graph.get_nodes())
+    assert sorted(sample_graph.get_edges()) == sorted(edge for edge in graph.get_edges()
+                                                      if edge[0] in sample and edge[1] in sample)
+
+
+@pytest.mark.parametrize("sampler", [SnowballSampler(seed=3), RandomWalkSampler(max_stall_steps=10 ** 6, seed=3)])
+def test_samples_of_a_component_are_connected(component, sampler):
+    for num_nodes in [2, 10, 30]:
+        assert count_components(component.sample(num_nodes, sampler)) == 1
+
+
+@pytest.mark.parametrize("sampler_class", SAMPLERS)
+def test_inclusion_probabilities_add_up_to_the_sample_size(load_graph, sampler_class):
+    graph = load_graph(*GRAPH)
+    probabilities = sampler_class(seed=4, num_estimation_runs=20).inclusion_probabilities(graph, 10)
+    assert set(probabilities) == set(graph.get_nodes())
+    assert sum(probabilities.values()) == pytest.approx(10)
+
+
+def test_from_config():
+    assert isinstance(Sampler.from_config(None), UniformSampler)
+    assert isinstance(Sampler.from_config({"type": "forest_fire", "forward_probability": 0.5, "seed": 1}),
+                      ForestFireSampler)
+    with pytest.raises(ValueError, match="Unknown sampler type"):
+        Sampler.from_config({"type": "missing"})
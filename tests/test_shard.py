@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from algorithm import DPGraphletCounter
+from conftest import get_counts
+from main import create_graph, load_data, merge_shards, run_census
+
+NUM_SHARDS = 3
+
+
+@pytest.fixture
+def partial_files(census_config, write_input_file):
+    """
+    Count the shards of a small graph with run_census
+    :return: (the config, the input file, the partial result files by shard)
+    """
+    config = census_config()
+    input_file = write_input_file("thrust_human.csv", 80)
+    for shard_index in range(NUM_SHARDS):
+        run_census(config, input_file, shard=(shard_index, NUM_SHARDS))
+    folder = config["output"]["csv_output"]["folder"]
+    name = "Partial_graphlet_counts_thrust_human_shard_{}_of_{}.json"
+    files = [os.path.join(folder, name.format(shard_index, NUM_SHARDS)) for shard_index in range(NUM_SHARDS)]
+    return config, input_file, files
+
+
+def rewrite_partial(file_name, **changes):
+    """
+    Change the metadata of a partial result file
+    :param file_name: the file name
+    :param changes: the metadata to change
+    """
+    with open(file_name, 'r') as file:
+        partial = json.load(file)
+    partial.update(changes)
+    with open(file_name, 'w') as file:
+        json.dump(partial, file)
+
+
+def test_merged_shards_match_census(partial_files):
+    config, input_file, files = partial_files
+    graph = create_graph(load_data(input_file))
+    census = DPGraphletCounter(graph, {}).count_graphlets_of_sizes([2, 3, 4])
+    merged = merge_shards(config, list(reversed(files)))
+    assert sorted(merged) == [2, 3, 4]
+    for graphlet_size, graphlet_map in census.items():
+        assert get_counts(merged[graphlet_size]) == get_counts(graphlet_map)
+        # the examples are groups of the class
+        for graphlet_key, (example_nodes, _) in merged[graphlet_size].items():
+            assert graphlet_key in graphlet_map and len(example_nodes) == graphlet_size
+
+
+def test_missing_shard_is_an_error(partial_files):
+    config, _, files = partial_files
+    with pytest.raises(ValueError, match="missing"):
+        merge_shards(config, files[:-1])
+
+
+def test_duplicate_shard_is_an_error(partial_files):
+    config, _, files = partial_files
+    with pytest.raises(ValueError, match="more than once"):
+        merge_shards(config, files + [files[0]])
+
+
+def test_shard_out_of_range_is_an_error(partial_files):
+    config, _, files = partial_files
+    rewrite_partial(files[-1], shard=NUM_SHARDS)
+    with pytest.raises(ValueError, match="out of range"):
+        merge_shards(config, files)
+
+
+@pytest.mark.parametrize("changes", [{"input_checksum": "00000000"}, {"num_nodes": 1}, {"node_order": "degree"},
+                                     {"graphlet_sizes": [3]}])
+def test_mismatched_metadata_is_an_error(partial_files, changes):
+    config, _, files = partial_files
+    rewrite_partial(files[1], **changes)
+    with pytest.raises(ValueError, match="different censuses"):
+        merge_shards(config, files)
@@ -0,0 +1,48 @@
+import pytest
+
+from algorithm import DPGraphletCounter
+from conftest import get_counts
+from graph import SharedGraph
+
+
+@pytest.fixture(params=["shm", "file"])
+def shared_graph(request, load_graph, small_graph, tmp_path):
+    """
+    Export a small graph to a shared memory block or a memory mapped file and attach to it by its descriptor
+    :return: (the graph, the attached shared graph)
+    """
+    graph = load_graph(*small_graph)
+    if request.param == "shm":
+        exported = SharedGraph.export(graph)
+    else:
+        exported = SharedGraph.export_to_file(graph, str(tmp_path / "graph.bin"))
+    attached = SharedGraph.open(exported.descriptor)
+    yield graph, attached
+    attached.close()
+    exported.close()
+    exported.unlink()
+
+
+def get_node_edges(graph, node_name):
+    node = graph.get_node(node_name)
+    return ({mode: set(targets) for mode, targets in node.edges.items()}, set(node.undirected_edges))
+
+
+def test_shared_graph_matches_graph(shared_graph):
+    graph, attached = shared_graph
+    assert set(attached.get_nodes()) == set(graph.get_nodes())
+    assert attached.get_num_nodes() == graph.get_num_nodes()
+    assert attached.get_num_edges() == graph.get_num_edges()
+    assert attached.mode_map == graph.mode_map
+    assert sorted(attached.get_edges()) == sorted(graph.get_edges())
+    for node_name in graph.get_nodes():
+        assert get_node_edges(attached, node_name) == get_node_edges(graph, node_name)
+    copy = attached.to_graph()
+    assert copy.mode_map == graph.mode_map and sorted(copy.get_edges()) == sorted(graph.get_edges())
+
+
+def test_census_of_shared_graph_matches_brute_force(shared_graph, small_graph, brute_force_counts):
+    _, attached = shared_graph
+    for graphlet_size in [2, 3, 4]:
+        assert get_counts(DPGraphletCounter(attached, {}).count_graphlets(graphlet_size)) == \
+            brute_force_counts(*small_graph, graphlet_size)
@@ -0,0 +1,35 @@
+import os
+import random
+
+import pytest
+
+from util.spill import SpillableGroupSet
+
+
+def random_groups(num_groups, group_size, seed):
+    """
+    Draw random sorted groups of node ranks, with duplicates
+    :return: list of sorted tuples
+    """
+    rng = random.Random(seed)
+    return [tuple(sorted(rng.sample(range(30), group_size))) for _ in range(num_groups)]
+
+
+@pytest.mark.parametrize("memory_budget_mb", [1e-4, 1e-3, 100])
+@pytest.mark.parametrize("group_size", [1, 3])
+def test_spilled_set_keeps_its_contents(tmp_path, memory_budget_mb, group_size):
+    groups = random_groups(2000, group_size, memory_budget_mb)
+    group_set = SpillableGroupSet(group_size, memory_budget_mb, str(tmp_path))
+    for group in groups:
+        group_set.add(group)
+    assert group_set.is_spilled == (memory_budget_mb < 100)
+    expected = sorted(set(groups))
+    if group_set.is_spilled:
+        # the runs are merged in sorted order without duplicates
+        assert list(group_set) == expected
+    assert sorted(group_set) == expected
+    assert len(group_set) == len(expected)
+    group_set.compact()
+    assert sorted(group_set) == expected and len(group_set) == len(expected)
+    group_set.close()
+    assert os.listdir(tmp_path) == []
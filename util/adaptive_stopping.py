@@ -0,0 +1,96 @@
+import math
+
+
+class AdaptiveStopping:
+    """
+    Tracks the running mean and confidence interval of every graphlet class count over census runs
+    and decides when the estimates are precise enough to stop
+    A class missing from a run counts as zero in that run
+    """
+
+    def __init__(self, target_relative_error=0.05, top_n=10, frequency_threshold=None, confidence_z=1.96,
+                 min_runs=3, max_runs=100):
+        """
+        Initialize the stopping rule
+        :param target_relative_error: the confidence interval half width relative to the mean to reach
+        :param top_n: the number of most frequent classes that must reach the target
+        :param frequency_threshold: if set, all classes with at least this share of the total count must
+        reach the target instead of the top_n classes
+        :param confidence_z: the z value of the confidence interval, 1.96 for 95%
+        :param min_runs: the minimum number of runs before stopping
+        :param max_runs: the maximum number of runs
+        """
+        self.target_relative_error = target_relative_error
+        self.top_n = top_n
+        self.frequency_threshold = frequency_threshold
+        self.confidence_z = confidence_z
+        self.min_runs = max(min_runs, 2)
+        self.max_runs = max_runs
+        self.num_runs = 0
+        # maps of key: graphlet hash, value: sum and sum of squares of the class count over runs
+        self._sums = {}
+        self._sums_of_squares = {}
+
+    @staticmethod
+    def from_config(config):
+        """
+        Create the stopping rule from the adaptive_stopping section of the config
+        :param config: the map of settings, None or not enabled for a fixed number of runs
+        :return: the stopping rule or None
+        """
+        if not config or not config.get("enabled", False):
+            return None
+        config = dict(config)
+        config.pop("enabled")
+        return AdaptiveStopping(**config)
+
+    def add_run(self, graphlet_map):
+        """
+        Add the counts of a finished census run
+        :param graphlet_map: the map of key: graphlet hash, value: (graphlet, count)
+        :return: None
+        """
+        self.num_runs += 1
+        for graphlet_key, graphlet_info in graphlet_map.items():
+            count = graphlet_info[1]
+            self._sums[graphlet_key] = self._sums.get(graphlet_key, 0) + count
+            self._sums_of_squares[graphlet_key] = self._sums_of_squares.get(graphlet_key, 0) + count * count
+
+    def mean(self, graphlet_key):
+        return self._sums.get(graphlet_key, 0) / self.num_runs
+
+    def relative_error(self, graphlet_key):
+        """
+        Get the confidence interval half width of a class relative to its mean
+        :param graphlet_key: the graphlet hash
+        :return: the relative error, infinite if it cannot be estimated yet
+        """
+        mean = self.mean(graphlet_key)
+        if self.num_runs < 2 or mean == 0:
+            return math.inf
+        variance = (self._sums_of_squares[graphlet_key] - self.num_runs * mean * mean) / (self.num_runs - 1)
+        return self.confidence_z * math.sqrt(max(variance, 0) / self.num_runs) / mean
+
+    def get_tracked_classes(self):
+        """
+        Get the classes that must reach the target relative error
+        :return: list of graphlet hashes
+        """
+        ranked = sorted(self._sums, key=self._sums.get, reverse=True)
+        if self.frequency_threshold is not None:
+            total = sum(self._sums.values())
+            return [graphlet_key for graphlet_key in ranked
+                    if self._sums[graphlet_key] >= self.frequency_threshold * total]
+        return ranked[:self.top_n]
+
+    def should_stop(self):
+        """
+        Check if the estimates have converged or the maximum number of runs is reached
+        :return: True if no more runs are needed
+        """
+        if self.num_runs >= self.max_runs:
+            return True
+        if self.num_runs < self.min_runs:
+            return False
+        return all(self.relative_error(graphlet_key) <= self.target_relative_error
+                   for graphlet_key in self.get_tracked_classes())
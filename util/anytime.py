@@ -0,0 +1,94 @@
+import math
+
+
+class RootSampleEstimator:
+    """
+    Extrapolates graphlet counts from the roots processed so far
+    Every node group is counted by exactly one root, so the count of a class is the sum of its per root counts.
+    Roots are processed in random order in rounds whose size is fixed before the round starts. The roots of
+    the earlier rounds are counted exactly, and the last round is a simple random sample of the roots left
+    when it started, so scaling it up to those roots gives an unbiased estimate no matter how the round sizes
+    were chosen from the earlier rounds. The standard error follows from the sample variance of the per root
+    counts of the last round with the finite population correction.
+    Once every root is processed the estimates are the exact counts with a zero error. Before that a zero error
+    does not mean exact: a class that none of the roots of the last round counted has an all zero sample, so its
+    estimate is its count in the earlier rounds with an error of 0, although the roots left may still hold it.
+    """
+
+    def __init__(self, num_roots):
+        """
+        Initialize the estimator
+        :param num_roots: the total number of roots
+        """
+        self.num_roots = num_roots
+        self.num_done = 0
+        # the number of roots in the last round and left when it started
+        self.round_size = 0
+        self._round_population = 0
+        # maps of key: graphlet size, value: map of key: graphlet hash, value: sum of the root counts of the
+        # earlier rounds, and sum and sum of squares of the root counts of the last round
+        self._exact_sums = {}
+        self._round_sums = {}
+        self._round_sums_of_squares = {}
+
+    def start_round(self):
+        """
+        Start a new round, the roots of the last round become exact
+        :return: None
+        """
+        for graphlet_size, sums in self._round_sums.items():
+            exact_sums = self._exact_sums.setdefault(graphlet_size, {})
+            for hash_key, total in sums.items():
+                exact_sums[hash_key] = exact_sums.get(hash_key, 0) + total
+        self._round_sums = {}
+        self._round_sums_of_squares = {}
+        self.round_size = 0
+        self._round_population = self.num_roots - self.num_done
+
+    def add_root(self, root_count_maps):
+        """
+        Add the counts of a processed root to the current round
+        :param root_count_maps: the map of key: graphlet size, value: map of key: graphlet hash, value: count
+        :return: None
+        """
+        self.num_done += 1
+        self.round_size += 1
+        for graphlet_size, count_map in root_count_maps.items():
+            sums = self._round_sums.setdefault(graphlet_size, {})
+            sums_of_squares = self._round_sums_of_squares.setdefault(graphlet_size, {})
+            for hash_key, count in count_map.items():
+                sums[hash_key] = sums.get(hash_key, 0) + count
+                sums_of_squares[hash_key] = sums_of_squares.get(hash_key, 0) + count * count
+
+    @property
+    def completed_fraction(self):
+        return self.num_done / self.num_roots if self.num_roots else 1.0
+
+    @property
+    def is_complete(self):
+        return self.num_done >= self.num_roots
+
+    def estimate(self, graphlet_size):
+        """
+        Estimate the counts of a graphlet size
+        :param graphlet_size: the size of the graphlet
+        :return: (map of key: graphlet hash, value: estimated count, map of key: graphlet hash, value: standard error)
+        """
+        exact_sums = self._exact_sums.get(graphlet_size, {})
+        round_sums = self._round_sums.get(graphlet_size, {})
+        round_sums_of_squares = self._round_sums_of_squares.get(graphlet_size, {})
+        counts, errors = {}, {}
+        n, r = self._round_population, self.round_size
+        # a class missing from the last round counted 0 in each of its roots
+        for hash_key in set(exact_sums) | set(round_sums):
+            total = round_sums.get(hash_key, 0)
+            mean = total / r if r else 0.0
+            counts[hash_key] = exact_sums.get(hash_key, 0) + (total if r == n else n * mean)
+            if r == n:
+                errors[hash_key] = 0.0
+            elif r < 2:
+                errors[hash_key] = math.inf
+            else:
+                variance = (round_sums_of_squares.get(hash_key, 0) - r * mean * mean) / (r - 1)
+                errors[hash_key] = n * math.sqrt(max(variance, 0) * (1 - r / n) / r)
+        return counts, errors
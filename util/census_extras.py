@@ -0,0 +1,84 @@
+import math
+
+
+class CensusExtras:
+    """
+    The extras a census collects next to its counts, by graphlet size
+    A counter fills the extras of its last census; run_graphlet_counting merges the extras of every run into one
+    CensusExtras with merge_run and averages them over the runs with average.
+    """
+
+    def __init__(self):
+        # map of key: graphlet size, value: map of key: graphlet hash, value: reservoir of node name tuples
+        self.graphlet_examples = {}
+        # share of the work done, below 1 when a deadline stopped a count early
+        self.completed_fraction = 1.0
+        # map of key: graphlet size, value: map of key: graphlet hash, value: standard error, empty when the counts
+        # are exact
+        self.count_errors = {}
+        # map of key: graphlet size, value: map of key: graphlet hash, value: maximum overestimate of the count, set
+        # when only the most frequent classes are tracked
+        self.count_bounds = {}
+        # map of key: graphlet size, value: maximum count of a class missing from the tracked classes
+        self.missing_bounds = {}
+        # map of key: graphlet size, value: moments of the groups for the analytic expectation of sampled counts
+        self.sampled_moments = {}
+        # map of key: graphlet size, value: map of key: graphlet hash, value: variance of the count of a uniform sample
+        self.sampled_variances = {}
+        # map of key: graphlet size, value: participation matrix
+        self.participation = {}
+
+    def merge_run(self, run_extras):
+        """
+        Add the extras of one run, the errors, bounds, variances and participation are summed until average
+        :param run_extras: the extras of the run
+        :return: None
+        """
+        for graphlet_size, reservoirs in run_extras.graphlet_examples.items():
+            size_examples = self.graphlet_examples.setdefault(graphlet_size, {})
+            for graphlet_key, reservoir in reservoirs.items():
+                if graphlet_key in size_examples:
+                    size_examples[graphlet_key].merge(reservoir)
+                else:
+                    size_examples[graphlet_key] = reservoir
+        self.completed_fraction = min(self.completed_fraction, run_extras.completed_fraction)
+        # the runs are independent, so the variance of the summed counts is the sum of their variances
+        for graphlet_size, errors in run_extras.count_errors.items():
+            size_errors = self.count_errors.setdefault(graphlet_size, {})
+            for graphlet_key, error in errors.items():
+                size_errors[graphlet_key] = size_errors.get(graphlet_key, 0) + error * error
+        # a class missing from a run is counted as 0 there, off by at most the largest missing count of the run
+        for graphlet_size, bounds in run_extras.count_bounds.items():
+            missing_bound = run_extras.missing_bounds[graphlet_size]
+            size_bounds = self.count_bounds.setdefault(graphlet_size, {})
+            for graphlet_key, bound in bounds.items():
+                size_bounds[graphlet_key] = size_bounds.get(graphlet_key, 0) + bound - missing_bound
+            self.missing_bounds[graphlet_size] = self.missing_bounds.get(graphlet_size, 0) + missing_bound
+        for graphlet_size, variances in run_extras.sampled_variances.items():
+            size_variances = self.sampled_variances.setdefault(graphlet_size, {})
+            for graphlet_key, variance in variances.items():
+                size_variances[graphlet_key] = size_variances.get(graphlet_key, 0) + variance
+        for graphlet_size, participation_matrix in run_extras.participation.items():
+            if graphlet_size in self.participation:
+                self.participation[graphlet_size].merge(participation_matrix)
+            else:
+                self.participation[graphlet_size] = participation_matrix
+
+    def average(self, num_of_runs):
+        """
+        Turn the sums of merge_run into the extras of the average counts of the runs
+        :param num_of_runs: the number of merged runs
+        :return: None
+        """
+        for size_errors in self.count_errors.values():
+            for graphlet_key, variance in size_errors.items():
+                size_errors[graphlet_key] = math.sqrt(variance) / num_of_runs
+        for graphlet_size, size_bounds in self.count_bounds.items():
+            for graphlet_key, bound in size_bounds.items():
+                size_bounds[graphlet_key] = (bound + self.missing_bounds[graphlet_size]) / num_of_runs
+            self.missing_bounds[graphlet_size] /= num_of_runs
+        for size_variances in self.sampled_variances.values():
+            for graphlet_key, variance in size_variances.items():
+                size_variances[graphlet_key] = variance / num_of_runs
+        for participation_matrix in self.participation.values():
+            participation_matrix.scale(1 / num_of_runs)
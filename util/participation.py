@@ -0,0 +1,127 @@
+import numpy as np
+
+# number of pending (node, class) entries kept before they are merged into the sparse counts
+COMPACT_THRESHOLD = 1 << 22
+
+
+class ParticipationMatrix:
+    """
+    Sparse node x graphlet class participation counts, the number of groups of every class a node is in
+    Entries of classified groups are buffered as (node, class) keys and merged into sorted unique keys with
+    counts once the buffer passes a threshold, so memory grows with the non zero entries only and no dense
+    matrix is ever built. The matrix is saved in the CSR layout of scipy.sparse.save_npz, with the node names
+    and graphlet hashes of the rows and columns, so it loads with or without scipy.
+    """
+
+    def __init__(self, node_names):
+        """
+        Initialize the matrix
+        :param node_names: the node names, the row of a node is its position
+        """
+        self.node_names = list(node_names)
+        self._node_indexes = {node_name: i for i, node_name in enumerate(self.node_names)}
+        # graphlet hashes of the columns, in the order they were first seen
+        self.class_keys = []
+        self._class_indexes = {}
+        # sorted unique keys (node row << 32 | class column) and their counts
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.float64)
+        self._pending = []
+        self._num_pending = 0
+
+    def _get_class_index(self, hash_key):
+        if hash_key not in self._class_indexes:
+            self._class_indexes[hash_key] = len(self.class_keys)
+            self.class_keys.append(hash_key)
+        return self._class_indexes[hash_key]
+
+    def add_group(self, hash_key, node_group):
+        """
+        Add a classified node group
+        :param hash_key: the graphlet hash of the group
+        :param node_group: tuple of node names
+        :return: None
+        """
+        self.add_groups(hash_key, np.array([[self._node_indexes[node_name] for node_name in node_group]],
+                                           dtype=np.int64))
+
+    def add_groups(self, hash_key, node_rows):
+        """
+        Add classified node groups of the same class
+        :param hash_key: the graphlet hash of the groups
+        :param node_rows: (N x k) int array of node rows
+        :return: None
+        """
+        keys = (np.asarray(node_rows, dtype=np.int64).reshape(-1) << 32) | self._get_class_index(hash_key)
+        self._pending.append(keys)
+        self._num_pending += len(keys)
+        if self._num_pending >= COMPACT_THRESHOLD:
+            self._compact()
+
+    def _compact(self, extra_counts=None):
+        """
+        Merge the pending keys into the sorted unique keys
+        :param extra_counts: if set, the counts of the pending keys, 1 each otherwise
+        :return: None
+        """
+        if not self._pending:
+            return
+        pending = np.concatenate(self._pending)
+        keys = np.concatenate([self._keys, pending])
+        counts = np.concatenate([self._counts, extra_counts if extra_counts is not None
+                                 else np.ones(len(pending), dtype=np.float64)])
+        self._keys, inverse = np.unique(keys, return_inverse=True)
+        self._counts = np.bincount(inverse.reshape(-1), weights=counts, minlength=len(self._keys))
+        self._pending = []
+        self._num_pending = 0
+
+    def merge(self, other):
+        """
+        Add the counts of another matrix, for example of another sample, matching nodes by name and classes by hash
+        :param other: the other matrix
+        :return: None
+        """
+        other._compact()
+        self._compact()
+        for node_name in other.node_names:
+            if node_name not in self._node_indexes:
+                self._node_indexes[node_name] = len(self.node_names)
+                self.node_names.append(node_name)
+        node_map = np.array([self._node_indexes[node_name] for node_name in other.node_names], dtype=np.int64)
+        class_map = np.array([self._get_class_index(hash_key) for hash_key in other.class_keys], dtype=np.int64)
+        rows, columns = other._keys >> 32, other._keys & 0xFFFFFFFF
+        self._pending.append((node_map[rows] << 32) | class_map[columns])
+        self._compact(other._counts)
+
+    def scale(self, factor):
+        """
+        Multiply all counts, for example to average the counts of several runs
+        :param factor: the factor
+        :return: None
+        """
+        self._compact()
+        self._counts = self._counts * factor
+
+    def to_csr(self):
+        """
+        Get the matrix in CSR layout
+        :return: (data, indices, indptr, shape)
+        """
+        self._compact()
+        rows, columns = self._keys >> 32, self._keys & 0xFFFFFFFF
+        shape = (len(self.node_names), len(self.class_keys))
+        # the keys are sorted by row then column, so the entries are already in CSR order
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=shape[0]))])
+        return self._counts, columns.astype(np.int32), indptr.astype(np.int64), shape
+
+    def save(self, file_name):
+        """
+        Save the matrix to a compressed .npz file readable by scipy.sparse.load_npz, with the arrays node_names
+        (row labels) and class_keys (column graphlet hashes) next to it
+        :param file_name: the file name
+        :return: None
+        """
+        data, indices, indptr, shape = self.to_csr()
+        np.savez_compressed(file_name, format=np.array(b"csr"), shape=np.array(shape), data=data, indices=indices,
+                            indptr=indptr, node_names=np.array([str(node_name) for node_name in self.node_names]),
+                            class_keys=np.array(self.class_keys, dtype=np.int64))
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class Reservoir:
+    """
+    Uniform random sample of a bounded size from a stream of items (reservoir sampling, algorithm R)
+    After n items were added every item is in the sample with probability size / n, using memory for
+    size items only
+    """
+
+    def __init__(self, size, seed=None):
+        """
+        Initialize the reservoir
+        :param size: the maximum number of items kept
+        :param seed: the random seed, None for a random seed
+        """
+        self.size = size
+        self.items = []
+        self.num_seen = 0
+        self._random = np.random.default_rng(seed)
+
+    def add(self, item):
+        """
+        Offer an item to the reservoir
+        :param item: the item
+        :return: None
+        """
+        self.add_many([item])
+
+    def add_many(self, items, convert=None):
+        """
+        Offer several items to the reservoir, the replacement positions are drawn for all items at once
+        :param items: indexable sequence of items
+        :param convert: if set, applied to the items that are kept, for example to turn node ranks into names
+        :return: None
+        """
+        num_items = len(items)
+        convert = convert or (lambda item: item)
+        num_fill = min(max(self.size - len(self.items), 0), num_items)
+        self.items.extend(convert(items[i]) for i in range(num_fill))
+        if num_fill < num_items:
+            # item i is the (num_seen + i + 1)th item and replaces a random position if it falls in the reservoir
+            num_seen = np.arange(self.num_seen + num_fill + 1, self.num_seen + num_items + 1)
+            positions = np.floor(self._random.random(num_items - num_fill) * num_seen).astype(np.int64)
+            for i in np.flatnonzero(positions < self.size).tolist():
+                self.items[positions[i]] = convert(items[num_fill + i])
+        self.num_seen += num_items
+
+    def merge(self, other):
+        """
+        Merge another reservoir into this one, the result is a uniform sample of the items of both streams
+        :param other: the other reservoir
+        :return: None
+        """
+        if other.num_seen == 0:
+            return
+        if self.num_seen == 0:
+            self.items = list(other.items[:self.size])
+            self.num_seen = other.num_seen
+            return
+        num_kept = min(self.size, self.num_seen + other.num_seen)
+        # the number of kept items coming from this stream follows a hypergeometric distribution
+        num_own = int(self._random.hypergeometric(self.num_seen, other.num_seen, num_kept))
+        own = [self.items[i] for i in self._random.choice(len(self.items), num_own, replace=False)]
+        others = [other.items[i] for i in self._random.choice(len(other.items), num_kept - num_own, replace=False)]
+        self.items = own + others
+        self.num_seen += other.num_seen
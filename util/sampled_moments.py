@@ -0,0 +1,175 @@
+import itertools
+import math
+
+import numpy as np
+
+# number of pending node subsets kept before they are merged into the subset counts
+COMPACT_THRESHOLD = 1 << 21
+
+
+class SampledCountMoments:
+    """
+    Expected graphlet counts of uniform node samples and their variances, from one census of the whole graph
+    A node group of k nodes is in a uniform sample of s of the n nodes with probability
+    p_k = C(n - k, s - k) / C(n, s), so the expected sampled count of a class is its count times p_k.
+    Two groups g and h of a class are both in the sample with probability p_|g u h|, so the variance is
+    the sum over ordered pairs of groups of p_(2k - |g n h|) - p_k^2. The number of pairs sharing j nodes
+    follows from the binomial moments B_t = sum over node sets T of t nodes of m_T^2, where m_T is the
+    number of groups of the class containing T, which are collected while the groups are classified.
+    m_T is only known once every group containing T is seen, so the subsets of the groups are buffered as
+    (class, node rows) arrays and merged into sorted unique subsets with counts once the buffer passes a
+    threshold. Memory grows with the distinct (class, subset) pairs, about C(k, t) (t + 2) * 8 bytes per group
+    and subset size t when few groups share subsets; a census passing the memory budget stops with an error.
+    """
+
+    def __init__(self, graphlet_size, node_names, memory_budget_mb=None):
+        """
+        Initialize the moments
+        :param graphlet_size: the number of nodes of the groups
+        :param node_names: the node names, the row of a node is its position
+        :param memory_budget_mb: if set, the subset counts may take at most about this many megabytes
+        """
+        self.graphlet_size = graphlet_size
+        self.node_names = list(node_names)
+        self._node_indexes = {node_name: i for i, node_name in enumerate(self.node_names)}
+        self._memory_budget_mb = memory_budget_mb
+        # graphlet hashes of the class column, in the order they were first seen
+        self.class_keys = []
+        self._class_indexes = {}
+        # map of key: graphlet hash, value: number of groups
+        self._counts = {}
+        # map of key: subset size t, value: sorted unique (class, node rows) rows and the number of groups of the
+        # class containing every subset
+        self._subsets = {t: np.zeros((0, t + 1), dtype=np.int64) for t in range(1, graphlet_size)}
+        self._subset_counts = {t: np.zeros(0, dtype=np.int64) for t in range(1, graphlet_size)}
+        self._pending = {t: [] for t in range(1, graphlet_size)}
+        self._num_pending = 0
+        # positions of the nodes of every subset of size t within a group
+        self._combinations = {t: np.array(list(itertools.combinations(range(graphlet_size), t)), dtype=np.int64)
+                              for t in range(1, graphlet_size)}
+
+    def _get_class_index(self, hash_key):
+        if hash_key not in self._class_indexes:
+            self._class_indexes[hash_key] = len(self.class_keys)
+            self.class_keys.append(hash_key)
+        return self._class_indexes[hash_key]
+
+    def add_group(self, hash_key, node_group):
+        """
+        Add a classified node group
+        :param hash_key: the graphlet hash of the group
+        :param node_group: tuple of node names
+        :return: None
+        """
+        self.add_groups(hash_key, np.array([[self._node_indexes[node_name] for node_name in node_group]],
+                                           dtype=np.int64))
+
+    def add_groups(self, hash_key, node_rows):
+        """
+        Add classified node groups of the same class
+        :param hash_key: the graphlet hash of the groups
+        :param node_rows: (N x k) int array of node rows
+        :return: None
+        """
+        node_rows = np.asarray(node_rows, dtype=np.int64).reshape(-1, self.graphlet_size)
+        class_index = self._get_class_index(hash_key)
+        self._counts[hash_key] = self._counts.get(hash_key, 0) + len(node_rows)
+        # a subset is the same node set in any group as long as the nodes of the groups are in the same order
+        node_rows = np.sort(node_rows, axis=1)
+        for t, combinations in self._combinations.items():
+            subsets = node_rows[:, combinations].reshape(-1, t)
+            self._pending[t].append(np.column_stack([np.full(len(subsets), class_index, dtype=np.int64), subsets]))
+            self._num_pending += len(subsets)
+        if self._num_pending >= COMPACT_THRESHOLD:
+            self._compact()
+
+    def _compact(self, extra_counts=None):
+        """
+        Merge the pending subsets into the sorted unique subsets and check the memory budget
+        :param extra_counts: if set, map of key: subset size t, value: the counts of the pending subsets,
+        1 each otherwise
+        :return: None
+        """
+        if self._num_pending == 0:
+            return
+        for t, pending in self._pending.items():
+            if not pending:
+                continue
+            pending = np.concatenate(pending)
+            counts = np.concatenate([self._subset_counts[t], extra_counts[t] if extra_counts is not None
+                                     else np.ones(len(pending), dtype=np.int64)])
+            self._subsets[t], inverse = np.unique(np.concatenate([self._subsets[t], pending]), axis=0,
+                                                  return_inverse=True)
+            self._subset_counts[t] = np.bincount(inverse.reshape(-1), weights=counts,
+                                                 minlength=len(self._subsets[t])).astype(np.int64)
+            self._pending[t] = []
+        self._num_pending = 0
+        memory_mb = sum(self._subsets[t].nbytes + self._subset_counts[t].nbytes for t in self._subsets) / (1 << 20)
+        if self._memory_budget_mb and memory_mb > self._memory_budget_mb:
+            raise MemoryError("The node subsets of the sampled moments of size {} take {:.0f} MB, more than the "
+                              "memory budget of {} MB; count a smaller graph or sample it instead of using "
+                              "analytic sampling".format(self.graphlet_size, memory_mb, self._memory_budget_mb))
+
+    def merge(self, other):
+        """
+        Merge the moments of groups of another census of the same graph, the groups must be distinct
+        :param other: the other moments
+        :return: None
+        """
+        other._compact()
+        self._compact()
+        for hash_key, count in other._counts.items():
+            self._counts[hash_key] = self._counts.get(hash_key, 0) + count
+        for node_name in other.node_names:
+            if node_name not in self._node_indexes:
+                self._node_indexes[node_name] = len(self.node_names)
+                self.node_names.append(node_name)
+        node_map = np.array([self._node_indexes[node_name] for node_name in other.node_names], dtype=np.int64)
+        class_map = np.array([self._get_class_index(hash_key) for hash_key in other.class_keys], dtype=np.int64)
+        for t, subsets in other._subsets.items():
+            subsets = np.column_stack([class_map[subsets[:, 0]], np.sort(node_map[subsets[:, 1:]], axis=1)])
+            self._pending[t].append(subsets)
+            self._num_pending += len(subsets)
+        self._compact(other._subset_counts)
+
+    @staticmethod
+    def inclusion_probability(num_nodes, sample_size, group_size):
+        """
+        Get the probability of a node group to be in a uniform sample
+        :param num_nodes: the number of nodes of the graph
+        :param sample_size: the number of sampled nodes
+        :param group_size: the number of nodes of the group
+        :return: C(num_nodes - group_size, sample_size - group_size) / C(num_nodes, sample_size)
+        """
+        if group_size > sample_size:
+            return 0.0
+        return math.prod((sample_size - i) / (num_nodes - i) for i in range(group_size))
+
+    def expected_counts(self, num_nodes, sample_size):
+        """
+        Get the expected sampled count of every class and its variance
+        :param num_nodes: the number of nodes of the graph
+        :param sample_size: the number of sampled nodes
+        :return: (map of key: graphlet hash, value: expected count, map of key: graphlet hash, value: variance)
+        """
+        self._compact()
+        k = self.graphlet_size
+        probabilities = [self.inclusion_probability(num_nodes, sample_size, size) for size in range(2 * k + 1)]
+        # map of key: subset size t, value: list of B_t by class index
+        class_moments = {}
+        for t, subset_counts in self._subset_counts.items():
+            moments = np.zeros(len(self.class_keys), dtype=np.int64)
+            np.add.at(moments, self._subsets[t][:, 0], subset_counts * subset_counts)
+            class_moments[t] = moments.tolist()
+        expectations, variances = {}, {}
+        for hash_key, count in self._counts.items():
+            class_index = self._class_indexes[hash_key]
+            moments = [count * count] + [class_moments[t][class_index] for t in range(1, k)] + [count]
+            variance = 0.0
+            for j in range(k + 1):
+                # ordered pairs of groups sharing exactly j nodes, by inclusion exclusion over the moments
+                num_pairs = sum((-1) ** (t - j) * math.comb(t, j) * moments[t] for t in range(j, k + 1))
+                variance += num_pairs * (probabilities[2 * k - j] - probabilities[k] ** 2)
+            expectations[hash_key] = count * probabilities[k]
+            variances[hash_key] = max(variance, 0.0)
+        return expectations, variances
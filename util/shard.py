@@ -0,0 +1,113 @@
+import json
+import zlib
+
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("shard")
+
+PARTIAL_FORMAT = "graphlet_census_shard"
+PARTIAL_VERSION = 1
+# metadata that differs between the partial results of one census
+PER_SHARD_KEYS = ("shard", "num_roots")
+
+
+def get_shard(node_name, num_shards):
+    """
+    Get the shard of a root node
+    The CRC32 of the name is the same in every process, unlike hash() of strings, so independent runs agree
+    :param node_name: the node name
+    :param num_shards: the number of shards
+    :return: the shard index in [0, num_shards)
+    """
+    return zlib.crc32(str(node_name).encode("utf-8")) % num_shards
+
+
+def get_file_checksum(file_name):
+    """
+    Get the CRC32 of a file, to check that all shards counted the same input
+    :param file_name: the file name
+    :return: the checksum as a hex string
+    """
+    checksum = 0
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            checksum = zlib.crc32(chunk, checksum)
+    return "{:08x}".format(checksum)
+
+
+def write_partial(file_name, metadata, graphlet_maps):
+    """
+    Write the partial result of a shard
+    Classes are identified by their graphlet hash, which only depends on the structure of the graphlet and the
+    mode indexes, so equal classes of different shards get equal ids
+    :param file_name: the file name
+    :param metadata: the map describing the census and the shard, with at least "shard" and "num_shards"
+    :param graphlet_maps: the map of key: graphlet size, value: map of key: graphlet hash, value: (graphlet, count)
+    :return: None
+    """
+    partial = {"format": PARTIAL_FORMAT, "version": PARTIAL_VERSION}
+    partial.update(metadata)
+    partial["counts"] = {}
+    for graphlet_size, graphlet_map in graphlet_maps.items():
+        # every class is stored as [count, node names of the example]
+        partial["counts"][str(graphlet_size)] = {
+            str(graphlet_key): [count, [node.name for node in g.nodes]]
+            for graphlet_key, (g, count) in graphlet_map.items()}
+    with open(file_name, 'w') as file:
+        json.dump(partial, file)
+
+
+def merge_partials(file_names):
+    """
+    Merge the partial results of all shards of a census
+    Every shard must be present exactly once and all partial results must describe the same census
+    :param file_names: list of partial result file names
+    :return: (metadata without the per shard keys, map of key: graphlet size, value: map of key: graphlet hash,
+    value: (example node names, count) sorted by count descending)
+    """
+    partials = []
+    for file_name in file_names:
+        with open(file_name, 'r') as file:
+            partial = json.load(file)
+        if partial.get("format") != PARTIAL_FORMAT or partial.get("version") != PARTIAL_VERSION:
+            raise ValueError("Not a partial result of a sharded census: {}".format(file_name))
+        partials.append((file_name, partial))
+    if not partials:
+        raise ValueError("No partial results to merge")
+    first_file_name, first_partial = partials[0]
+    metadata = {key: value for key, value in first_partial.items() if key not in PER_SHARD_KEYS + ("counts",)}
+    for file_name, partial in partials[1:]:
+        for key in (set(metadata) | set(partial)) - set(PER_SHARD_KEYS + ("counts",)):
+            if partial.get(key) != metadata.get(key):
+                raise ValueError("{} and {} are from different censuses, their {} differ".format(
+                    first_file_name, file_name, key))
+    num_shards = metadata["num_shards"]
+    shard_files = {}
+    for file_name, partial in partials:
+        shard_files.setdefault(partial["shard"], []).append(file_name)
+    duplicates = {shard: files for shard, files in shard_files.items() if len(files) > 1}
+    if duplicates:
+        raise ValueError("Shards given more than once: {}".format(duplicates))
+    unknown = sorted(set(shard_files) - set(range(num_shards)))
+    if unknown:
+        raise ValueError("Shards out of range of {}: {}".format(num_shards, unknown))
+    missing = sorted(set(range(num_shards)) - set(shard_files))
+    if missing:
+        raise ValueError("Shards missing of {}: {}".format(num_shards, missing))
+    num_roots = sum(partial["num_roots"] for _, partial in partials)
+    if num_roots != metadata["num_nodes"]:
+        raise ValueError("The shards have {} roots, the graph has {} nodes".format(num_roots, metadata["num_nodes"]))
+    graphlet_maps = {}
+    for _, partial in partials:
+        for graphlet_size, counts in partial["counts"].items():
+            graphlet_map = graphlet_maps.setdefault(int(graphlet_size), {})
+            for graphlet_key, (count, example_nodes) in counts.items():
+                graphlet_key = int(graphlet_key)
+                if graphlet_key in graphlet_map:
+                    example_nodes = graphlet_map[graphlet_key][0]
+                    count += graphlet_map[graphlet_key][1]
+                graphlet_map[graphlet_key] = (tuple(example_nodes), count)
+    logger.info("Merged %d shards", num_shards)
+    return metadata, {graphlet_size: {k: v for k, v in sorted(graphlet_map.items(), key=lambda item: item[1][1],
+                                                              reverse=True)}
+                      for graphlet_size, graphlet_map in sorted(graphlet_maps.items())}
@@ -0,0 +1,97 @@
+import heapq
+
+
+class SpaceSaving:
+    """
+    Approximate counts of the most frequent keys of a weighted stream in fixed memory (SpaceSaving)
+    At most capacity keys are monitored. A new key takes over the monitored key with the smallest count and
+    inherits that count as its error, so every monitored count overestimates the true count by at most its
+    error, every unmonitored key has a true count of at most min_count, and both are at most total / capacity.
+    The monitored key with the smallest count is found with a lazy min heap that is rebuilt when it grows.
+    """
+
+    def __init__(self, capacity):
+        """
+        Initialize the sketch
+        :param capacity: the maximum number of monitored keys
+        """
+        self.capacity = capacity
+        self.total = 0
+        # maps of key: monitored key, value: count, error and the item kept with the key
+        self._counts = {}
+        self._errors = {}
+        self._items = {}
+        # (count, key) entries, stale once the count of the key changed
+        self._heap = []
+
+    def add(self, key, count=1, item=None):
+        """
+        Add a weighted key
+        :param key: the key, comparable with the other keys
+        :param count: the weight
+        :param item: the item kept with the key while it is monitored, for example its graphlet
+        :return: the monitored key that made room for the key, None if no key was evicted
+        """
+        self.total += count
+        evicted_key = None
+        if key in self._counts:
+            self._counts[key] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+            self._items[key] = item
+        else:
+            min_count, evicted_key = self._pop_min()
+            del self._counts[evicted_key], self._errors[evicted_key], self._items[evicted_key]
+            self._counts[key] = min_count + count
+            self._errors[key] = min_count
+            self._items[key] = item
+        heapq.heappush(self._heap, (self._counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(key_count, monitored_key) for monitored_key, key_count in self._counts.items()]
+            heapq.heapify(self._heap)
+        return evicted_key
+
+    def _pop_min(self):
+        """
+        Remove the heap entry of the monitored key with the smallest count, dropping stale entries on the way
+        :return: (count, key)
+        """
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return count, key
+
+    @property
+    def min_count(self):
+        """
+        The bound on the true count of every unmonitored key
+        :return: the smallest monitored count once all slots are used, 0 before
+        """
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def get_top(self):
+        """
+        Get the monitored keys by count descending
+        :return: list of (key, item, count, error), the true count of a key is in [count - error, count]
+        """
+        return [(key, self._items[key], count, self._errors[key])
+                for key, count in sorted(self._counts.items(), key=lambda item: item[1], reverse=True)]
+
+    def num_guaranteed(self):
+        """
+        Get the number of leading keys of get_top that are guaranteed to be the true most frequent keys
+        The first k keys are guaranteed if the lower bound of each of them is at least the count of the next key
+        :return: the number of guaranteed keys
+        """
+        top = self.get_top()
+        min_lower_bound = float("inf")
+        num_guaranteed = 0
+        for i, (_, _, count, error) in enumerate(top):
+            min_lower_bound = min(min_lower_bound, count - error)
+            next_count = top[i + 1][2] if i + 1 < len(top) else self.min_count
+            if min_lower_bound >= next_count:
+                num_guaranteed = i + 1
+        return num_guaranteed
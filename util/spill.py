@@ -0,0 +1,165 @@
+import heapq
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+from util.logger_util import LoggerUtil
+
+logger = LoggerUtil.get_logger("spill")
+
+# number of groups read from a run file at a time
+READ_BLOCK_SIZE = 1 << 16
+# approximate bytes a set entry costs on top of the tuple it holds
+SET_ENTRY_OVERHEAD = 2 * 8
+
+
+class SpillableGroupSet:
+    """
+    Set of node groups (sorted tuples of int node ranks of the same size) with a memory budget
+    Groups are kept in an in-memory set until it passes the budget, then the set is written to disk as a
+    sorted run of int64 records and cleared. Iterating merges the runs and the groups still in memory
+    and drops duplicates, so every group is produced once and in sorted order.
+    Call compact once all groups are added to merge the runs into one, which gives an exact length and
+    cheap repeated iteration, and close to remove the files.
+    """
+
+    def __init__(self, group_size, memory_budget_mb, spill_dir=None):
+        """
+        Initialize the set
+        :param group_size: the number of nodes of every group
+        :param memory_budget_mb: the memory the in-memory groups may use, in megabytes
+        :param spill_dir: the directory for the run files, None for the system temp directory
+        """
+        self._group_size = group_size
+        self._max_groups = max(int(memory_budget_mb * (1 << 20) /
+                                   (sys.getsizeof(tuple(range(group_size))) + SET_ENTRY_OVERHEAD)), 1)
+        self._spill_dir = spill_dir
+        self._directory = None
+        self._groups = set()
+        self._run_paths = []
+        # number of distinct groups in the runs, only known once compacted
+        self._num_spilled = None
+
+    def add(self, group):
+        """
+        Add a group, spills the in-memory groups if the budget is passed
+        :param group: sorted tuple of node ranks
+        :return: None
+        """
+        self._groups.add(group)
+        if len(self._groups) >= self._max_groups:
+            self._spill()
+
+    def __contains__(self, group):
+        """
+        Check if a group is held in memory, spilled groups are not checked
+        :param group: sorted tuple of node ranks
+        :return: True if the group is in memory
+        """
+        return group in self._groups
+
+    def __len__(self):
+        if self._run_paths and self._num_spilled is None:
+            self.compact()
+        return len(self._groups) + (self._num_spilled or 0)
+
+    def __iter__(self):
+        if not self._run_paths:
+            return iter(self._groups)
+        return self._iterate_merged(sorted(self._groups))
+
+    @property
+    def is_spilled(self):
+        return len(self._run_paths) > 0
+
+    def _spill(self):
+        """
+        Write the in-memory groups to a new sorted run and clear them
+        :return: None
+        """
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="ncsg_spill_", dir=self._spill_dir)
+        path = os.path.join(self._directory, "run_{}.bin".format(len(self._run_paths)))
+        self._write_run(path, sorted(self._groups))
+        logger.debug("Spilled %d groups of size %d to %s", len(self._groups), self._group_size, path)
+        self._run_paths.append(path)
+        self._num_spilled = None
+        self._groups = set()
+
+    def _write_run(self, path, groups):
+        """
+        Write groups to a run file as flat int64 records
+        :param path: the path of the run file
+        :param groups: iterable of sorted groups
+        :return: the number of groups written
+        """
+        num_groups = 0
+        records = array('q')
+        with open(path, "wb") as file:
+            for group in groups:
+                records.extend(group)
+                num_groups += 1
+                if num_groups % READ_BLOCK_SIZE == 0:
+                    records.tofile(file)
+                    records = array('q')
+            records.tofile(file)
+        return num_groups
+
+    def _read_run(self, path):
+        """
+        Stream the groups of a run file
+        :param path: the path of the run file
+        :return: generator of groups
+        """
+        k = self._group_size
+        with open(path, "rb") as file:
+            while True:
+                records = array('q')
+                records.frombytes(file.read(READ_BLOCK_SIZE * k * records.itemsize))
+                if not records:
+                    return
+                for i in range(0, len(records), k):
+                    yield tuple(records[i:i + k])
+
+    def _iterate_merged(self, in_memory_groups):
+        """
+        Merge the runs and the sorted in-memory groups, dropping duplicates
+        :param in_memory_groups: sorted list of the groups held in memory
+        :return: generator of distinct groups in sorted order
+        """
+        previous = None
+        for group in heapq.merge(in_memory_groups, *[self._read_run(path) for path in self._run_paths]):
+            if group != previous:
+                yield group
+                previous = group
+
+    def compact(self):
+        """
+        Merge all runs and the in-memory groups into one deduplicated run
+        :return: None
+        """
+        if not self._run_paths:
+            return
+        path = os.path.join(self._directory, "merged_{}.bin".format(len(self._run_paths)))
+        num_groups = self._write_run(path, self._iterate_merged(sorted(self._groups)))
+        self.close(remove_directory=False)
+        self._run_paths = [path]
+        self._num_spilled = num_groups
+        logger.debug("Compacted %d spilled groups of size %d", num_groups, self._group_size)
+
+    def close(self, remove_directory=True):
+        """
+        Drop all groups and remove the run files
+        :param remove_directory: remove the spill directory too
+        :return: None
+        """
+        for path in self._run_paths:
+            os.remove(path)
+        self._run_paths = []
+        self._groups = set()
+        self._num_spilled = None
+        if remove_directory and self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None